@@ -0,0 +1,157 @@
+"""
+Navegador compartilhado entre os controladores.
+Em vez de cada PlaywrightController lançar seu próprio Chromium, os controladores
+criam apenas contextos (milissegundos) em um navegador de longa duração: um Chromium
+já em execução acessado pelo DevTools Protocol (CDP) ou um Chromium lançado uma única
+vez pelo backend. Se o navegador cair, a próxima sessão reconecta sozinha.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Playwright
+
+
+# Modos de navegador: 'launch' (um Chromium por controlador), 'shared' (um Chromium do
+# backend para todos) ou 'cdp' (Chromium externo no endpoint configurado)
+BROWSER_MODES = ('launch', 'shared', 'cdp')
+
+
+class SharedBrowser:
+    """
+    Mantém um navegador de longa duração e o reconecta sob demanda.
+
+    No modo 'shared' há um navegador por modo de exibição (headless ou visível), pois o
+    modo só pode ser escolhido no lançamento. No modo 'cdp' o navegador externo é usado
+    como está, independentemente do modo pedido.
+    """
+
+    def __init__(self, mode: str = 'shared', cdp_endpoint: Optional[str] = None,
+                 connect_attempts: int = 3, launch_profile: Optional[str] = None):
+        """
+        Inicializa o provedor (nada é lançado ou conectado até o primeiro uso).
+
+        Args:
+            mode: 'shared' ou 'cdp'
+            cdp_endpoint: Endpoint do DevTools (ex.: http://localhost:9222), obrigatório no modo 'cdp'
+            connect_attempts: Tentativas de conexão (com espera crescente) antes de falhar
+            launch_profile: Perfil de lançamento no modo 'shared' (padrão: BROWSER_LAUNCH_PROFILE)
+
+        Raises:
+            ValueError: Se o modo for inválido ou faltar o endpoint no modo 'cdp'
+        """
+        if mode not in ('shared', 'cdp'):
+            raise ValueError(f"Modo de navegador compartilhado inválido: '{mode}'")
+        if mode == 'cdp' and not cdp_endpoint:
+            raise ValueError("BROWSER_CDP_ENDPOINT é obrigatório no modo 'cdp'")
+        self.mode = mode
+        self.cdp_endpoint = cdp_endpoint
+        self.connect_attempts = max(1, connect_attempts)
+        self.launch_profile = launch_profile
+        self._playwright: Optional[Playwright] = None
+        self._browsers: Dict[bool, Browser] = {}
+        self._lock = asyncio.Lock()
+        self.connects = 0
+        self.disconnects = 0
+        self.last_connect_ms: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedBrowser"]:
+        """
+        Cria o provedor a partir de BROWSER_MODE e BROWSER_CDP_ENDPOINT.
+
+        Returns:
+            SharedBrowser, ou None no modo 'launch' (cada controlador lança o seu)
+        """
+        mode = os.getenv('BROWSER_MODE', 'launch').strip().lower()
+        if mode not in BROWSER_MODES:
+            raise ValueError(f"BROWSER_MODE inválido: '{mode}' (use {', '.join(BROWSER_MODES)})")
+        if mode == 'launch':
+            return None
+        return cls(mode, cdp_endpoint=os.getenv('BROWSER_CDP_ENDPOINT') or None)
+
+    async def _connect(self, headless: bool) -> Browser:
+        """Lança ou conecta o navegador, com novas tentativas em caso de falha."""
+        from playwright.async_api import async_playwright
+        from automation.playwright_controller import launch_chromium
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.connect_attempts):
+            started = time.perf_counter()
+            try:
+                if self.mode == 'cdp':
+                    browser = await self._playwright.chromium.connect_over_cdp(self.cdp_endpoint)
+                else:
+                    browser = await launch_chromium(self._playwright, headless, self.launch_profile)
+            except Exception as e:
+                last_error = e
+                print(f"[SharedBrowser] Falha ao conectar (tentativa {attempt + 1}): {e}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            self.last_connect_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.connects += 1
+            print(f"[SharedBrowser] Navegador {self.mode} pronto em {self.last_connect_ms} ms")
+            return browser
+        raise RuntimeError(f"Não foi possível conectar ao navegador ({self.mode}): {last_error}")
+
+    def _on_disconnected(self, key: bool, browser: Browser):
+        """Esquece o navegador que caiu (a próxima chamada a acquire reconecta)."""
+        if self._browsers.get(key) is browser:
+            del self._browsers[key]
+            self.disconnects += 1
+            print(f"[SharedBrowser] Navegador desconectado; reconexão na próxima sessão")
+
+    async def acquire(self, headless: bool) -> Browser:
+        """
+        Retorna o navegador compartilhado, conectando ou relançando se necessário.
+
+        Args:
+            headless: Modo de exibição pedido (ignorado no modo 'cdp')
+
+        Returns:
+            Navegador conectado; o chamador cria nele o próprio contexto
+        """
+        key = headless if self.mode == 'shared' else True
+        async with self._lock:
+            browser = self._browsers.get(key)
+            if browser is not None and browser.is_connected():
+                return browser
+            browser = await self._connect(headless)
+            browser.on('disconnected', lambda b: self._on_disconnected(key, b))
+            self._browsers[key] = browser
+            return browser
+
+    def describe(self) -> Dict[str, object]:
+        """Resumo do navegador compartilhado para o status da API."""
+        return {
+            'mode': self.mode,
+            'cdp_endpoint': self.cdp_endpoint,
+            'connected': any(browser.is_connected() for browser in self._browsers.values()),
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'last_connect_ms': self.last_connect_ms,
+        }
+
+    async def close(self):
+        """
+        Encerra o navegador (modo 'shared') ou apenas a conexão (modo 'cdp': o Chromium
+        externo continua rodando).
+        """
+        async with self._lock:
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+            for browser in browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    print(f"[SharedBrowser] Erro ao fechar navegador: {e}")
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
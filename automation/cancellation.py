@@ -0,0 +1,93 @@
+"""
+Cancelamento cooperativo de execuções.
+A execução consulta o token entre etapas (um dia preenchido e salvo por vez) e para na
+próxima fronteira, salvando o que já foi preenchido: o navegador continua logado e a
+sessão pode ser reaproveitada, ao contrário de fechar o navegador no meio de um passo.
+Uma execução ainda na fila (aguardando a sessão) desiste da espera assim que é cancelada.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class RunCancelledError(Exception):
+    """A execução foi cancelada antes de obter a sessão (nada foi processado)."""
+
+
+class CancellationToken:
+    """Sinal de cancelamento compartilhado entre quem pede e quem executa."""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self.requested_at: Optional[float] = None
+        self._event = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """True se o cancelamento foi pedido."""
+        return self.requested_at is not None
+
+    def cancel(self, reason: str = "Cancelado pelo usuário") -> bool:
+        """
+        Pede o cancelamento (a execução para na próxima fronteira de etapa).
+
+        Returns:
+            False se o cancelamento já tinha sido pedido
+        """
+        if self.cancelled:
+            return False
+        self.reason = reason
+        self.requested_at = time.time()
+        self._event.set()
+        return True
+
+    async def wait(self):
+        """Aguarda o pedido de cancelamento."""
+        await self._event.wait()
+
+    def describe(self) -> Dict[str, object]:
+        """Resumo para a API."""
+        return {
+            'cancelled': self.cancelled,
+            'reason': self.reason,
+            'seconds_since_request': (round(time.time() - self.requested_at, 1)
+                                      if self.requested_at is not None else None),
+        }
+
+
+async def acquire_unless_cancelled(lock: asyncio.Lock, token: Optional[CancellationToken]) -> bool:
+    """
+    Adquire o lock, desistindo da espera se o token for cancelado antes.
+
+    Args:
+        lock: Lock a adquirir (ex.: o da sessão de navegador)
+        token: Token da execução (None: espera o lock normalmente)
+
+    Returns:
+        True com o lock adquirido; False (sem o lock) se a execução foi cancelada
+    """
+    if token is None:
+        await lock.acquire()
+        return True
+    if token.cancelled:
+        return False
+
+    acquire = asyncio.ensure_future(lock.acquire())
+    cancelled = asyncio.ensure_future(token.wait())
+    try:
+        await asyncio.wait((acquire, cancelled), return_when=asyncio.FIRST_COMPLETED)
+    except BaseException:
+        cancelled.cancel()
+        acquire.cancel()
+        if acquire.done() and not acquire.cancelled():
+            lock.release()
+        raise
+    cancelled.cancel()
+    if not acquire.done():
+        acquire.cancel()
+        return False
+    if token.cancelled:
+        # Lock e cancelamento chegaram juntos: prevalece o cancelamento
+        lock.release()
+        return False
+    return True
@@ -0,0 +1,281 @@
+"""
+Governador adaptativo de concorrência das ações de rede no QualiWork.
+Limita quantas ações (navegação, login, seleção, preenchimento, salvamento) ficam em
+andamento ao mesmo tempo, somando todas as sessões, e ajusta esse limite pela latência
+observada no estilo AIMD: sobe de um em um enquanto as respostas estão rápidas e cai pela
+metade quando a latência dispara ou uma ação falha.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+
+# Marca a task que já ocupa uma vaga: ações aninhadas (ex.: login -> initialize) não
+# disputam uma segunda vaga, o que travaria com limite 1
+_holding_slot: contextvars.ContextVar[bool] = contextvars.ContextVar('_holding_slot', default=False)
+
+# Segundos de pausa fixa (fixed_delay) acumulados na vaga atual: descontados da latência
+# medida, que deve refletir só o tempo de resposta do QualiWork
+_fixed_delay_s: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    '_fixed_delay_s', default=None)
+
+
+class ActionFailed(Exception):
+    """A ação retornou False (sinal de falha para o governador)."""
+
+
+@dataclass
+class ActionLatency:
+    """Latência observada de um tipo de ação (média móvel exponencial)."""
+    samples: int = 0
+    ewma_ms: Optional[float] = None
+    last_ms: Optional[float] = None
+    failures: int = 0
+
+    def describe(self) -> Dict[str, object]:
+        """Resumo para a API."""
+        return {
+            'samples': self.samples,
+            'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            'last_ms': round(self.last_ms, 1) if self.last_ms is not None else None,
+            'failures': self.failures,
+        }
+
+
+@dataclass
+class GovernorEvent:
+    """Último ajuste do limite e o motivo."""
+    at: float
+    limit: int
+    reason: str
+
+    def describe(self) -> Dict[str, object]:
+        """Resumo para a API."""
+        return {'seconds_ago': round(time.monotonic() - self.at, 1), 'limit': self.limit,
+                'reason': self.reason}
+
+
+@dataclass
+class ConcurrencyGovernor:
+    """
+    Limite dinâmico de ações de rede simultâneas (AIMD).
+
+    - Aumento aditivo: a cada `limit` ações concluídas sem sinal de congestionamento, o
+      limite sobe 1 (até `max_limit`).
+    - Redução multiplicativa: uma ação que falha ou demora mais que `latency_tolerance` vezes
+      a média do seu tipo (ou mais que `max_latency_ms`) reduz o limite pela metade (até
+      `min_limit`). Só uma redução por janela, para não derrubar o limite várias vezes pelo
+      mesmo pico.
+
+    As ações têm latências muito diferentes (login leva segundos, preencher uma célula,
+    milissegundos), por isso cada tipo é comparado com a própria média.
+    """
+    min_limit: int = 1
+    max_limit: int = 6
+    initial_limit: int = 2
+    latency_tolerance: float = 2.0
+    max_latency_ms: Optional[float] = None
+    ewma_alpha: float = 0.2
+    limit: int = field(init=False)
+    in_flight: int = field(init=False, default=0)
+    waiting: int = field(init=False, default=0)
+    increases: int = field(init=False, default=0)
+    decreases: int = field(init=False, default=0)
+    last_event: Optional[GovernorEvent] = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.min_limit = max(1, self.min_limit)
+        self.max_limit = max(self.min_limit, self.max_limit)
+        self.limit = min(max(self.initial_limit, self.min_limit), self.max_limit)
+        self._latency: Dict[str, ActionLatency] = {}
+        self._successes = 0
+        self._completed = 0
+        self._last_decrease_at: Optional[int] = None
+        self._condition: Optional[asyncio.Condition] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ConcurrencyGovernor"]:
+        """
+        Cria o governador a partir das variáveis GOVERNOR_*.
+
+        Returns:
+            ConcurrencyGovernor, ou None se GOVERNOR_ENABLED=0
+        """
+        if os.getenv('GOVERNOR_ENABLED', '1') != '1':
+            return None
+        max_latency = os.getenv('GOVERNOR_MAX_LATENCY_MS', '').strip()
+        return cls(
+            min_limit=int(os.getenv('GOVERNOR_MIN', '1')),
+            max_limit=int(os.getenv('GOVERNOR_MAX', '6')),
+            initial_limit=int(os.getenv('GOVERNOR_INITIAL', '2')),
+            latency_tolerance=float(os.getenv('GOVERNOR_LATENCY_TOLERANCE', '2.0')),
+            max_latency_ms=float(max_latency) if max_latency else None,
+        )
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Cria a condição no event loop em uso (o governador pode ser criado fora dele)."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _set_limit(self, limit: int, reason: str):
+        """Aplica um novo limite e registra o motivo."""
+        self.limit = limit
+        self.last_event = GovernorEvent(time.monotonic(), limit, reason)
+        print(f"[ConcurrencyGovernor] Limite {limit} ({reason})")
+
+    def _record(self, action: str, elapsed_ms: float, failed: bool):
+        """Atualiza a latência da ação e ajusta o limite."""
+        stats = self._latency.setdefault(action, ActionLatency())
+        baseline = stats.ewma_ms
+        stats.samples += 1
+        stats.last_ms = elapsed_ms
+        self._completed += 1
+
+        reason = None
+        if failed:
+            stats.failures += 1
+            reason = f"falha em {action}"
+        elif self.max_latency_ms is not None and elapsed_ms > self.max_latency_ms:
+            reason = f"{action} levou {elapsed_ms:.0f} ms (máx. {self.max_latency_ms:.0f} ms)"
+        elif baseline is not None and elapsed_ms > baseline * self.latency_tolerance:
+            reason = f"{action} levou {elapsed_ms:.0f} ms (média {baseline:.0f} ms)"
+
+        # Falhas não entram na média; picos entram, para que uma lentidão duradoura vire a
+        # nova referência em vez de manter o limite no mínimo para sempre
+        if not failed:
+            stats.ewma_ms = (elapsed_ms if baseline is None
+                             else baseline + self.ewma_alpha * (elapsed_ms - baseline))
+
+        if reason is not None:
+            self._successes = 0
+            # Uma redução por janela: as ações já em andamento viram o mesmo pico
+            if (self._last_decrease_at is None
+                    or self._completed - self._last_decrease_at > self.limit):
+                self._last_decrease_at = self._completed
+                if self.limit > self.min_limit:
+                    self.decreases += 1
+                    self._set_limit(max(self.min_limit, self.limit // 2), reason)
+            return
+
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self._successes = 0
+            self.increases += 1
+            self._set_limit(self.limit + 1, "latência estável")
+
+    @asynccontextmanager
+    async def slot(self, action: str) -> AsyncIterator[None]:
+        """
+        Ocupa uma vaga durante uma ação de rede e mede sua latência.
+
+        Exceções e `ActionFailed` levantados no bloco contam como falha. Pausas feitas com
+        fixed_delay dentro do bloco não entram na latência.
+
+        Args:
+            action: Tipo da ação (agrupa as latências)
+        """
+        if _holding_slot.get():
+            yield
+            return
+
+        condition = self._get_condition()
+        async with condition:
+            self.waiting += 1
+            try:
+                await condition.wait_for(lambda: self.in_flight < self.limit)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+        token = _holding_slot.set(True)
+        delays = [0.0]
+        delay_token = _fixed_delay_s.set(delays)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException as e:
+            # Cancelamento não é sinal de congestionamento
+            failed = not isinstance(e, asyncio.CancelledError)
+            raise
+        finally:
+            _holding_slot.reset(token)
+            _fixed_delay_s.reset(delay_token)
+            elapsed_ms = max(0.0, (time.perf_counter() - started - delays[0]) * 1000)
+            async with condition:
+                self.in_flight -= 1
+                self._record(action, elapsed_ms, failed)
+                condition.notify_all()
+
+    async def run(self, action: str, func: Callable, *args, **kwargs):
+        """
+        Executa uma corrotina dentro de uma vaga.
+
+        Um retorno False (as ações do controlador retornam False quando o QualiWork não
+        responde a tempo) também conta como falha.
+        """
+        if _holding_slot.get():
+            return await func(*args, **kwargs)
+        try:
+            async with self.slot(action):
+                result = await func(*args, **kwargs)
+                if result is False:
+                    raise ActionFailed(action)
+                return result
+        except ActionFailed:
+            return False
+
+    def snapshot(self) -> Dict[str, object]:
+        """Limite atual, ocupação e latências por ação para a API."""
+        return {
+            'limit': self.limit,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'last_change': self.last_event.describe() if self.last_event else None,
+            'latency': {action: stats.describe() for action, stats in sorted(self._latency.items())},
+        }
+
+
+async def fixed_delay(seconds: float):
+    """
+    Pausa fixa dentro de uma ação governada (ex.: espera pela animação de um modal).
+
+    A pausa continua ocupando a vaga, mas não entra na latência da ação: com vários
+    segundos de espera fixa em login ou preenchimento, o tempo medido ficaria dominado
+    pela pausa e mudanças reais na resposta do QualiWork passariam despercebidas.
+    Fora de uma vaga, é um asyncio.sleep comum.
+    """
+    started = time.perf_counter()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        delays = _fixed_delay_s.get()
+        if delays is not None:
+            delays[0] += time.perf_counter() - started
+
+
+def governed(action: str):
+    """
+    Decora um método assíncrono do controlador para rodar sob o governador dele.
+
+    Sem governador (`self.governor` None), o método roda diretamente.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            governor = getattr(self, 'governor', None)
+            if governor is None:
+                return await method(self, *args, **kwargs)
+            return await governor.run(action, method, self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -4,10 +4,65 @@ Gerencia o preenchimento de múltiplas datas com validações.
 Usa API assíncrona do Playwright.
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import asyncio
+import os
+import time
+from automation.cancellation import CancellationToken
 from automation.playwright_controller import PlaywrightController
-from utils.time_generator import generate_daily_hours, validate_hours
+from utils.time_generator import WorkdayPolicy, generate_hours_for_dates, new_seed, validate_hours_batch
+
+
+# Dias preenchidos no formulário antes de cada salvamento (1 = um dia por vez)
+DEFAULT_BATCH_DAYS = int(os.getenv('FILL_BATCH_DAYS', '1'))
+
+# Horários usados quando os gerados não passam na validação (8h exatas)
+FALLBACK_HOURS = {
+    'morning': {'start': '09:00', 'end': '12:00'},
+    'afternoon': {'start': '13:00', 'end': '18:00'}
+}
+
+
+def weekdays_between(start_date: datetime, end_date: datetime) -> List[datetime]:
+    """
+    Lista os dias úteis (segunda a sexta) de um intervalo, inclusive.
+    
+    Args:
+        start_date: Data inicial
+        end_date: Data final
+        
+    Returns:
+        Lista de datas em ordem crescente
+    """
+    current_date = start_date
+    dates = []
+    
+    while current_date <= end_date:
+        # Pula finais de semana (sábado=5, domingo=6)
+        if current_date.weekday() < 5:  # Segunda a sexta
+            dates.append(current_date)
+        current_date += timedelta(days=1)
+    
+    return dates
+
+
+def build_fill_plan(start_date: datetime, end_date: datetime, seed: int,
+                    policy: Optional[WorkdayPolicy] = None) -> Tuple[List[datetime], List[Dict], List[Tuple[bool, str]]]:
+    """
+    Monta o plano de um preenchimento sem tocar no navegador.
+    
+    Args:
+        start_date: Data inicial
+        end_date: Data final
+        seed: Semente da execução
+        policy: Política de jornada (padrão se None)
+        
+    Returns:
+        Tupla (dias úteis, horários de cada dia, validação de cada dia), alinhadas
+    """
+    dates = weekdays_between(start_date, end_date)
+    hours_plan = generate_hours_for_dates(dates, seed=seed, policy=policy)
+    return dates, hours_plan, validate_hours_batch(hours_plan, policy)
 
 
 class FormFiller:
@@ -22,12 +77,174 @@ class FormFiller:
         """
         self.controller = controller
     
+    async def _select_task(self, task_index: int, task_key: Optional[str]) -> Optional[str]:
+        """Seleciona a tarefa pela chave (se informada) ou pelo índice; retorna a mensagem de erro."""
+        if task_key:
+            if not await self.controller.select_task_by_key(task_key):
+                return f"Tarefa não encontrada na tabela: {task_key}"
+        elif not await self.controller.select_task(task_index):
+            return f"Erro ao selecionar tarefa no índice {task_index}"
+        return None
+    
+    async def _open_task_form(self, date: datetime, task_index: int,
+                              task_key: Optional[str] = None) -> Optional[str]:
+        """
+        Navega para o mês da data, seleciona a tarefa e abre o formulário de apontamento.
+        
+        Args:
+            date: Data cujo mês/ano deve ser aberto
+            task_index: Índice da tarefa a selecionar
+            task_key: Chave estável da tarefa (tem prioridade sobre o índice)
+            
+        Returns:
+            Mensagem de erro ou None se o formulário foi aberto
+        """
+        if not await self.controller.navigate_to_apontamentos(date.month, date.year):
+            return f"Erro ao navegar para mês/ano {date.month:02d}/{date.year}"
+        
+        # Seleciona tarefa diretamente da tabela (não precisa clicar em "Fazer Apontamento")
+        # A navegação já carregou as tarefas
+        select_error = await self._select_task(task_index, task_key)
+        if select_error:
+            return select_error
+        
+        # Após selecionar a tarefa, pode ser necessário clicar em "Fazer Apontamento" 
+        # ou a página já redireciona. Vamos tentar clicar se o botão existir
+        try:
+            fazer_apontamento_btn = self.controller.page.locator('xpath=//*[@id="btnFazerApontamento"]')
+            count = await fazer_apontamento_btn.count()
+            if count > 0:
+                await fazer_apontamento_btn.click()
+                await asyncio.sleep(2)
+        except:
+            # Se não encontrar o botão, continua (pode já estar na página correta)
+            pass
+        
+        return None
+    
+    async def _ensure_row(self, row_index: int) -> bool:
+        """
+        Garante que a linha linhaH{row_index} existe no formulário.
+        
+        O sistema cria uma nova linha quando a anterior é preenchida; se ela não aparecer,
+        tenta adicioná-la manualmente.
+        
+        Returns:
+            True se a linha está disponível, False se o formulário não aceita mais linhas
+        """
+        await asyncio.sleep(2)  # Aguarda linha ser criada automaticamente
+        row = self.controller.page.locator(f'xpath=//*[@id="linhaH{row_index}"]')
+        try:
+            await row.wait_for(state="visible", timeout=10000)
+            return True
+        except Exception:
+            # Se não apareceu, tenta adicionar manualmente
+            await self.controller.add_new_entry_row()
+            await asyncio.sleep(1)
+            return await row.count() > 0
+    
+    async def _save_batch(self, dates: List[str], auto_save: bool = False) -> bool:
+        """
+        Verifica o botão de salvar ao fim de um lote de dias e aguarda a verificação manual.
+        
+        Args:
+            dates: Datas (DD/MM/AAAA) preenchidas no lote
+            auto_save: Clica em salvar e confirma o salvamento em vez de aguardar o usuário
+        
+        Returns:
+            True se o lote foi salvo (sempre False sem auto_save: o salvamento é manual)
+        """
+        label = ', '.join(dates)
+        # Os saldos lidos da tabela de tarefas não incluem as horas deste lote
+        self.controller.task_balances_at = None
+        if auto_save:
+            print(f"[FormFiller] Salvando {label}")
+            return await self.controller.save_entry(confirm=True)
+        
+        print(f"[FormFiller] Verificando botão de salvar para {label}")
+        save_available = await self.controller.save_entry()
+        if not save_available:
+            print(f"[FormFiller] AVISO: Botão de salvar não encontrado para {label}")
+            # Não falha, apenas avisa - o usuário pode salvar manualmente
+        else:
+            print(f"[FormFiller] Botão de salvar disponível - aguardando salvamento manual para {label}")
+        
+        # Aguarda um pouco para o usuário verificar e salvar manualmente
+        print(f"[FormFiller] Aguardando 3 segundos para verificação manual...")
+        await asyncio.sleep(3)
+        return False
+    
+    async def _close_batch(self, batch: List[Dict[str, any]], results: Dict[str, any],
+                           auto_save: bool) -> bool:
+        """
+        Salva um lote e registra seus dias em results.
+        
+        Returns:
+            False se auto_save está ativo e o salvamento não foi confirmado (os dias do lote
+            não entram em 'filled_dates')
+        """
+        batch_dates = [day['date'] for day in batch]
+        saved = await self._save_batch(batch_dates, auto_save)
+        results['batches'] += 1
+        if auto_save and not saved:
+            results['errors'].append(f"Salvamento não confirmado para {', '.join(batch_dates)}")
+            return False
+        
+        for day in batch:
+            results['filled_dates'].append(day['date'])
+            results['total_entries'] += 2
+            results['entries'].extend(day['entries'])
+            print(f"[FormFiller] ✓ Data {day['date']} processada com sucesso!")
+        if saved:
+            results['saved_dates'].extend(batch_dates)
+        return True
+    
+    async def _recycle_page_if_over_budget(self, row_latency: float, date_str: str,
+                                           next_date: datetime, task_index: int,
+                                           results: Dict[str, any],
+                                           task_key: Optional[str] = None,
+                                           days: int = 1) -> Optional[str]:
+        """
+        Troca a página por uma nova (mesmo login) se ela estourou o orçamento de recursos.
+        
+        Chamado uma vez por lote salvo; `days` é o tamanho do lote (a saúde da página é
+        medida a cada `check_every` dias, não lotes).
+        
+        Após a troca, reabre o formulário no mês do próximo dia e registra o evento em
+        results['page_recycles'].
+        
+        Returns:
+            Mensagem de erro se não foi possível reabrir o formulário, None caso contrário
+        """
+        reason = await self.controller.check_page_budget(row_latency, days)
+        if not reason:
+            return None
+        
+        print(f"[FormFiller] Página acima do orçamento ({reason}), reciclando após {date_str}")
+        recycle_seconds = await self.controller.recycle_page()
+        open_error = await self._open_task_form(next_date, task_index, task_key)
+        results['page_recycles'].append({
+            'after_date': date_str,
+            'reason': reason,
+            'recycle_seconds': round(recycle_seconds, 3),
+            'reopen_error': open_error
+        })
+        if open_error:
+            return f"Falha ao reabrir formulário após reciclar página: {open_error}"
+        return None
+    
     async def fill_date_range(self, start_date: datetime, end_date: datetime,
                        task_index: int, description_morning: str,
                        description_afternoon: str, 
                        callback=None,
                        description_morning_by_date=None,
-                       description_afternoon_by_date=None) -> Dict[str, any]:
+                       description_afternoon_by_date=None,
+                       policy: Optional[WorkdayPolicy] = None,
+                       seed: Optional[int] = None,
+                       task_key: Optional[str] = None,
+                       batch_days: Optional[int] = None,
+                       cancel_token: Optional[CancellationToken] = None,
+                       auto_save: bool = False) -> Dict[str, any]:
         """
         Preenche apontamentos para um intervalo de datas.
         
@@ -38,6 +255,20 @@ class FormFiller:
             description_morning: Descrição para entrada da manhã
             description_afternoon: Descrição para entrada da tarde
             callback: Função de callback para atualizar progresso (opcional)
+            policy: Política de jornada usada para gerar e validar horários (padrão se None)
+            seed: Semente da execução; com a mesma semente, política e datas os horários
+                gerados são idênticos (nova semente se None)
+            task_key: Chave estável da tarefa ("proposta|projeto|tarefa"); se informada, a
+                tarefa é localizada pela chave na tabela atual em vez do índice
+            batch_days: Dias preenchidos no formulário (2 linhas por dia) antes de cada
+                salvamento (padrão: FILL_BATCH_DAYS); limitado ao máximo de linhas que o
+                formulário aceita, detectado na primeira vez que uma linha não aparece
+            cancel_token: Token de cancelamento, consultado antes de cada dia; ao ser
+                cancelado, os dias já preenchidos são salvos e o restante é devolvido em
+                'remaining_dates'
+            auto_save: Clica em salvar ao fim de cada lote e só conta os dias cujo
+                salvamento foi confirmado; uma falha ao salvar interrompe o preenchimento
+                (padrão: o usuário salva manualmente)
             
         Returns:
             Dicionário com resultados:
@@ -45,35 +276,56 @@ class FormFiller:
                 'success': bool,
                 'filled_dates': List[str],
                 'errors': List[str],
-                'total_entries': int
+                'total_entries': int,
+                'seed': int,
+                'page_recycles': List[Dict],
+                'entries': List[Dict],  # {'date', 'shift', 'start', 'end', 'description'}
+                'batches': int,  # Quantidade de salvamentos
+                'cancelled': bool,
+                'remaining_dates': List[str],  # Dias não processados por cancelamento
+                'saved_dates': List[str]  # Dias com salvamento confirmado (só com auto_save)
             }
         """
+        if seed is None:
+            seed = new_seed()
+        
+        batch_days = max(1, batch_days or DEFAULT_BATCH_DAYS)
+        if self.controller.max_form_rows:
+            batch_days = max(1, min(batch_days, self.controller.max_form_rows // 2))
+        
         results = {
             'success': True,
             'filled_dates': [],
             'errors': [],
-            'total_entries': 0
+            'total_entries': 0,
+            'seed': seed,
+            'page_recycles': [],
+            'entries': [],
+            'batches': 0,
+            'cancelled': False,
+            'remaining_dates': [],
+            'saved_dates': []
         }
         
-        # Gera lista de datas
-        current_date = start_date
-        dates_to_fill = []
-        
-        while current_date <= end_date:
-            # Pula finais de semana (sábado=5, domingo=6)
-            if current_date.weekday() < 5:  # Segunda a sexta
-                dates_to_fill.append(current_date)
-            current_date += timedelta(days=1)
+        # Gera a lista de datas e gera e valida os horários de todas de uma vez
+        dates_to_fill, hours_plan, hours_validation = build_fill_plan(start_date, end_date, seed, policy)
         
         total_dates = len(dates_to_fill)
         
+        if cancel_token is not None and cancel_token.cancelled:
+            results['success'] = False
+            results['cancelled'] = True
+            results['remaining_dates'] = [date.strftime('%d/%m/%Y') for date in dates_to_fill]
+            return results
+        
         try:
             # Navega para apontamentos com mês/ano (usa a primeira data)
             if dates_to_fill:
                 first_date = dates_to_fill[0]
-                if not await self.controller.navigate_to_apontamentos(first_date.month, first_date.year):
+                open_error = await self._open_task_form(first_date, task_index, task_key)
+                if open_error:
                     results['success'] = False
-                    results['errors'].append(f"Erro ao navegar para mês/ano {first_date.month:02d}/{first_date.year}")
+                    results['errors'].append(open_error)
                     return results
             else:
                 # Se não há datas, apenas navega
@@ -81,50 +333,41 @@ class FormFiller:
                     results['success'] = False
                     results['errors'].append("Erro ao navegar para página de apontamentos")
                     return results
+                
+                select_error = await self._select_task(task_index, task_key)
+                if select_error:
+                    results['success'] = False
+                    results['errors'].append(select_error)
+                    return results
             
-            # Seleciona tarefa diretamente da tabela (não precisa clicar em "Fazer Apontamento")
-            # A navegação já carregou as tarefas
-            if not await self.controller.select_task(task_index):
-                results['success'] = False
-                results['errors'].append(f"Erro ao selecionar tarefa no índice {task_index}")
-                return results
-            
-            # Após selecionar a tarefa, pode ser necessário clicar em "Fazer Apontamento" 
-            # ou a página já redireciona. Vamos tentar clicar se o botão existir
-            try:
-                fazer_apontamento_btn = self.controller.page.locator('xpath=//*[@id="btnFazerApontamento"]')
-                count = await fazer_apontamento_btn.count()
-                if count > 0:
-                    await fazer_apontamento_btn.click()
-                    await asyncio.sleep(2)
-            except:
-                # Se não encontrar o botão, continua (pode já estar na página correta)
-                pass
+            # Dias preenchidos no formulário e ainda não salvos (lote atual)
+            batch: List[Dict[str, any]] = []
+            batch_started = time.perf_counter()
             
             # Preenche cada data
             for idx, date in enumerate(dates_to_fill):
+                # Fronteira de etapa: para antes de começar o dia (o lote pendente é salvo abaixo)
+                if cancel_token is not None and cancel_token.cancelled:
+                    results['cancelled'] = True
+                    results['remaining_dates'] = [day.strftime('%d/%m/%Y') for day in dates_to_fill[idx:]]
+                    print(f"[FormFiller] Cancelado ({cancel_token.reason}); "
+                          f"{len(results['remaining_dates'])} dia(s) não processado(s)")
+                    break
+                
                 try:
                     print(f"\n[FormFiller] Processando data: {date.strftime('%d/%m/%Y')}")
                     
-                    # Gera horários para o dia
-                    daily_hours = generate_daily_hours()
+                    # Horários do dia (gerados em lote antes do loop)
+                    daily_hours = hours_plan[idx]
                     print(f"[FormFiller] Horários gerados - Manhã: {daily_hours['morning']['start']}-{daily_hours['morning']['end']}, Tarde: {daily_hours['afternoon']['start']}-{daily_hours['afternoon']['end']}")
                     
-                    # Valida horários gerados
-                    is_valid, error_msg = validate_hours(
-                        daily_hours['morning']['start'],
-                        daily_hours['morning']['end'],
-                        daily_hours['afternoon']['start'],
-                        daily_hours['afternoon']['end']
-                    )
+                    # Resultado da validação feita em lote
+                    is_valid, error_msg = hours_validation[idx]
                     
                     if not is_valid:
                         print(f"[FormFiller] AVISO: {error_msg}, usando horários padrão")
                         # Usa horários padrão válidos (8h exatas) se a validação falhar
-                        daily_hours = {
-                            'morning': {'start': '09:00', 'end': '12:00'},
-                            'afternoon': {'start': '13:00', 'end': '18:00'}
-                        }
+                        daily_hours = FALLBACK_HOURS
                         results['errors'].append(f"Data {date.strftime('%d/%m/%Y')}: {error_msg} (usando horários padrão)")
                     
                     # Formata data como DD/MM/AAAA
@@ -153,14 +396,17 @@ class FormFiller:
                     if not desc_afternoon:
                         desc_afternoon = description_afternoon
                     
-                    # Preenche primeira entrada (manhã) - linha 0 (linhaH0)
+                    # Cada dia do lote ocupa duas linhas: manhã em linhaH{2k}, tarde em linhaH{2k+1}
+                    morning_row = 2 * len(batch)
+                    
+                    # Preenche primeira entrada (manhã)
                     print(f"[FormFiller] Preenchendo entrada da manhã para {date_str}")
                     if not await self.controller.fill_time_entry(
                         date_str,
                         daily_hours['morning']['start'],
                         daily_hours['morning']['end'],
                         desc_morning,
-                        row_index=0
+                        row_index=morning_row
                     ):
                         error_msg = f"Erro ao preencher entrada da manhã para {date_str}"
                         print(f"[FormFiller] ERRO: {error_msg}")
@@ -168,27 +414,18 @@ class FormFiller:
                         continue
                     print(f"[FormFiller] Entrada da manhã preenchida com sucesso")
                     
-                    # Aguarda segunda linha aparecer automaticamente após preencher a primeira
-                    # O sistema cria automaticamente uma nova linha quando preenchemos linhaH0
-                    await asyncio.sleep(2)  # Aguarda linha ser criada automaticamente
-                    
-                    # Verifica se a segunda linha (linhaH1) apareceu
-                    try:
-                        segunda_linha = self.controller.page.locator('xpath=//*[@id="linhaH1"]')
-                        await segunda_linha.wait_for(state="visible", timeout=10000)
-                    except:
-                        # Se não apareceu, tenta adicionar manualmente
-                        await self.controller.add_new_entry_row()
-                        await asyncio.sleep(1)
+                    # Aguarda a linha da tarde aparecer (o sistema cria uma nova linha quando
+                    # preenchemos a anterior); se não aparecer, tenta adicionar manualmente
+                    await self._ensure_row(morning_row + 1)
                     
-                    # Preenche segunda entrada (tarde) - linha 1 (linhaH1)
+                    # Preenche segunda entrada (tarde)
                     print(f"[FormFiller] Preenchendo entrada da tarde para {date_str}")
                     if not await self.controller.fill_time_entry(
                         date_str,
                         daily_hours['afternoon']['start'],
                         daily_hours['afternoon']['end'],
                         desc_afternoon,
-                        row_index=1
+                        row_index=morning_row + 1
                     ):
                         error_msg = f"Erro ao preencher entrada da tarde para {date_str}"
                         print(f"[FormFiller] ERRO: {error_msg}")
@@ -196,27 +433,50 @@ class FormFiller:
                         continue
                     print(f"[FormFiller] Entrada da tarde preenchida com sucesso")
                     
-                    # Verifica se botão de salvar está disponível (salvamento será manual)
-                    print(f"[FormFiller] Verificando botão de salvar para {date_str}")
-                    save_available = await self.controller.save_entry()
-                    if not save_available:
-                        print(f"[FormFiller] AVISO: Botão de salvar não encontrado para {date_str}")
-                        # Não falha, apenas avisa - o usuário pode salvar manualmente
-                    else:
-                        print(f"[FormFiller] Botão de salvar disponível - aguardando salvamento manual para {date_str}")
+                    batch.append({
+                        'date': date_str,
+                        'entries': [
+                            {'date': date_str, 'shift': 'morning', **daily_hours['morning'],
+                             'description': desc_morning},
+                            {'date': date_str, 'shift': 'afternoon', **daily_hours['afternoon'],
+                             'description': desc_afternoon},
+                        ]
+                    })
                     
-                    # Aguarda um pouco para o usuário verificar e salvar manualmente
-                    print(f"[FormFiller] Aguardando 3 segundos para verificação manual...")
-                    await asyncio.sleep(3)
+                    # Fecha o lote se está cheio, se é o último dia ou se o formulário não
+                    # aceita mais linhas para o próximo dia
+                    is_last = idx + 1 == total_dates
+                    if not is_last and len(batch) < batch_days:
+                        if await self._ensure_row(morning_row + 2):
+                            continue
+                        self.controller.max_form_rows = morning_row + 2
+                        batch_days = len(batch)
+                        print(f"[FormFiller] Formulário aceita no máximo {morning_row + 2} linhas; "
+                              f"lotes limitados a {batch_days} dias")
                     
-                    results['filled_dates'].append(date_str)
-                    results['total_entries'] += 2
-                    print(f"[FormFiller] ✓ Data {date_str} processada com sucesso!")
+                    # Latência por dia medida antes da pausa de verificação manual
+                    row_latency = (time.perf_counter() - batch_started) / len(batch)
+                    batch_dates = [day['date'] for day in batch]
+                    saved = await self._close_batch(batch, results, auto_save)
+                    batch = []
+                    if not saved:
+                        break
                     
                     # Chama callback se fornecido
                     if callback:
                         progress = ((idx + 1) / total_dates) * 100
-                        callback(progress, f"Preenchido: {date_str}")
+                        callback(progress, f"Preenchido: {', '.join(batch_dates)}")
+                    
+                    # Recicla a página se estourou o orçamento (entre lotes, nunca com dias não salvos)
+                    if not is_last:
+                        recycle_error = await self._recycle_page_if_over_budget(
+                            row_latency, date_str, dates_to_fill[idx + 1], task_index, results,
+                            task_key, days=len(batch_dates)
+                        )
+                        if recycle_error:
+                            results['errors'].append(recycle_error)
+                            break
+                    batch_started = time.perf_counter()
                     
                 except Exception as e:
                     error_msg = f"Erro ao processar data {date.strftime('%d/%m/%Y')}: {str(e)}"
@@ -226,7 +486,11 @@ class FormFiller:
                     results['errors'].append(error_msg)
                     continue
             
-            if results['errors']:
+            # Dias preenchidos depois do último salvamento (ex.: último dia falhou no meio do lote)
+            if batch:
+                await self._close_batch(batch, results, auto_save)
+            
+            if results['errors'] or results['cancelled']:
                 results['success'] = False
             
             return results
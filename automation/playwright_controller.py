@@ -2,46 +2,228 @@
 Controlador do Playwright para automação do navegador.
 Gerencia login, navegação e interações com o sistema QualiWork.
 Usa API assíncrona do Playwright para compatibilidade com FastAPI.
+O Playwright só é importado ao abrir o navegador: importar este módulo é barato.
 """
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-from typing import List, Dict, Optional
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Dict, Optional
 import asyncio
+import os
+import time
+
+from automation.concurrency_governor import fixed_delay, governed
+from utils.task_balance import TaskBalance
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Browser, BrowserContext, Playwright
+    from automation.browser_pool import SharedBrowser
+    from automation.concurrency_governor import ConcurrencyGovernor
+
+
+# Script que mede a saúde da página (heap JS só existe no Chromium)
+PAGE_HEALTH_SCRIPT = """() => ({
+    js_heap_bytes: (performance.memory && performance.memory.usedJSHeapSize) || null,
+    dom_nodes: document.getElementsByTagName('*').length
+})"""
+
+
+# Lê a tabela de tarefas em uma única chamada: texto das células de cada linha de dados,
+# com a posição da linha (tr[n] no XPath de seleção)
+TASK_TABLE_SCRIPT = """() => {
+    const table = document.getElementById('tbTarefasRecurso');
+    if (!table) return null;
+    let rows = Array.from(table.querySelectorAll('tbody tr'));
+    if (rows.length === 0) rows = Array.from(table.querySelectorAll('tr')).slice(1);
+    return rows.map((row, position) => ({
+        position,
+        cells: Array.from(row.querySelectorAll('td')).map(cell => cell.innerText.trim())
+    }));
+}"""
+
+# Colunas da tabela de tarefas, na ordem das células
+TASK_COLUMNS = ('proposta', 'cliente', 'projeto', 'tarefa', 'horas_liberadas', 'horas_apontadas', 'saldo')
+
+
+def make_task_key(proposta: str, projeto: str, tarefa: str) -> str:
+    """
+    Chave estável de uma tarefa ("proposta|projeto|tarefa"), independente da ordem da tabela.
+    
+    Espaços repetidos são normalizados para a chave não mudar por formatação.
+    """
+    return '|'.join(' '.join(part.split()) for part in (proposta, projeto, tarefa))
+
+
+def _parse_task_rows(rows: List[Dict]) -> tuple:
+    """
+    Converte as linhas lidas por TASK_TABLE_SCRIPT em tarefas e monta o índice chave -> linha
+    e os saldos em minutos na mesma passada.
+    
+    Returns:
+        Tupla (lista de tarefas, índice {chave: posição da linha}, saldos {chave: TaskBalance})
+    """
+    tasks = []
+    index: Dict[str, int] = {}
+    balances: Dict[str, TaskBalance] = {}
+    for row in rows:
+        cells = row['cells']
+        if len(cells) < len(TASK_COLUMNS):
+            continue
+        task = dict(zip(TASK_COLUMNS, cells))
+        # Só adiciona se tiver dados válidos
+        if not (task['proposta'] or task['cliente'] or task['projeto']):
+            continue
+        key = make_task_key(task['proposta'], task['projeto'], task['tarefa'])
+        if key in index:
+            # Mesma tarefa em duas linhas: a seleção por chave usa a primeira
+            print(f"[PlaywrightController] AVISO: tarefa duplicada na tabela: {key}")
+        else:
+            index[key] = row['position']
+            balances[key] = TaskBalance.from_task({**task, 'key': key})
+        task['key'] = key
+        # Horas em minutos (None se a célula não pôde ser lida), ao lado dos textos da tabela
+        task.update(balances[key].describe())
+        tasks.append(task)
+    return tasks, index, balances
+
+
+# Página de login do QualiWork (primeira navegação de toda sessão)
+LOGIN_URL = "https://qualiwork.qualiit.com.br/Login"
+
+
+# Perfis de lançamento do Chromium (BROWSER_LAUNCH_PROFILE): argumentos do processo e
+# opções de cada contexto. Compare-os com `python -m benchmarks.launch_profiles`.
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+LAUNCH_PROFILES: Dict[str, Dict] = {
+    'default': {
+        'args': ['--disable-blink-features=AutomationControlled'],
+        'context': {'viewport': {'width': 1920, 'height': 1080}, 'user_agent': _USER_AGENT},
+    },
+    # Sem GPU e serviços em segundo plano, com menos processos de renderização e janela
+    # menor. O Playwright já desliga tradução, sync, atualizações de componentes, extensões
+    # e rede em segundo plano por padrão; os argumentos repetidos mantêm o perfil explícito
+    'lean': {
+        'args': [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-gpu',
+            '--disable-extensions',
+            '--disable-background-networking',
+            '--disable-component-update',
+            '--disable-sync',
+            '--disable-default-apps',
+            '--no-first-run',
+            '--mute-audio',
+            '--renderer-process-limit=2',
+        ],
+        'context': {'viewport': {'width': 1280, 'height': 800}, 'user_agent': _USER_AGENT},
+    },
+}
+LAUNCH_ARGS = LAUNCH_PROFILES['default']['args']
+CONTEXT_OPTIONS = LAUNCH_PROFILES['default']['context']
+
+
+def resolve_launch_profile(name: Optional[str] = None) -> str:
+    """
+    Valida o nome de um perfil de lançamento.
+    
+    Args:
+        name: Nome do perfil (padrão: BROWSER_LAUNCH_PROFILE ou 'default')
+    
+    Raises:
+        ValueError: Se o perfil não existir
+    """
+    name = (name or os.getenv('BROWSER_LAUNCH_PROFILE') or 'default').strip().lower()
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"BROWSER_LAUNCH_PROFILE inválido: '{name}' (use {', '.join(LAUNCH_PROFILES)})")
+    return name
+
+
+async def launch_chromium(playwright: Playwright, headless: bool, profile: Optional[str] = None) -> Browser:
+    """Lança o Chromium com os argumentos do perfil (padrão: BROWSER_LAUNCH_PROFILE)."""
+    args = LAUNCH_PROFILES[resolve_launch_profile(profile)]['args']
+    return await playwright.chromium.launch(headless=headless, args=args)
+
+
+@dataclass
+class PageBudget:
+    """
+    Orçamento de recursos de uma página antes de ser reciclada.
+    
+    Limites None são ignorados. A saúde da página é medida a cada `check_every` dias
+    preenchidos; a latência de cada dia é verificada sempre.
+    """
+    max_js_heap_mb: Optional[float] = 300.0
+    max_dom_nodes: Optional[int] = 60000
+    max_row_latency_s: Optional[float] = 30.0
+    check_every: int = 5
 
 
 class PlaywrightController:
     """Controla automação do navegador usando Playwright (API assíncrona)."""
     
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, page_budget: Optional[PageBudget] = None,
+                 shared_browser: Optional[SharedBrowser] = None,
+                 governor: Optional[ConcurrencyGovernor] = None,
+                 launch_profile: Optional[str] = None):
         """
         Inicializa o controlador do Playwright.
         
         Args:
             headless: Se True, executa sem exibir navegador
+            page_budget: Orçamento de recursos da página (None desativa a reciclagem)
+            shared_browser: Navegador compartilhado; se informado, o controlador cria apenas
+                o próprio contexto nele em vez de lançar um Chromium
+            governor: Governador de concorrência compartilhado entre as sessões; limita as
+                ações de rede simultâneas pela latência do QualiWork (None: sem limite)
+            launch_profile: Perfil de LAUNCH_PROFILES (padrão: BROWSER_LAUNCH_PROFILE); com
+                navegador compartilhado, vale só para as opções do contexto
         """
+        self.launch_profile = resolve_launch_profile(launch_profile)
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.headless = headless
+        self.page_budget = page_budget
+        self._days_since_health_check = 0
+        self._logged_in_as: Optional[str] = None
+        self.task_rows: Dict[str, int] = {}  # Chave da tarefa -> linha, da última extração
+        self.task_balances: Dict[str, TaskBalance] = {}  # Chave da tarefa -> saldo, idem
+        self.task_balances_at: Optional[float] = None  # time.monotonic() da última extração
+        self.max_form_rows: Optional[int] = None  # Máximo de linhas do formulário, se já detectado
+        self.shared_browser = shared_browser
+        self.governor = governor
+        self.last_init_ms: Optional[float] = None
         self._initialized = False
     
+    def is_alive(self) -> bool:
+        """True se o navegador foi inicializado e continua conectado."""
+        return self._initialized and self.browser is not None and self.browser.is_connected()
+    
     async def initialize(self):
-        """Inicializa o Playwright e o navegador."""
+        """Inicializa o Playwright e o navegador (ou apenas o contexto, se compartilhado)."""
         if self._initialized:
-            return
-        
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
+            if self.browser is not None and self.browser.is_connected():
+                return
+            # O navegador caiu (ex.: Chromium compartilhado reiniciado): descarta o estado
+            print("[PlaywrightController] Navegador desconectado, reinicializando")
+            await self.close()
+        
+        started = time.perf_counter()
+        if self.shared_browser is not None:
+            self.browser = await self.shared_browser.acquire(self.headless)
+        else:
+            # Import tardio: o Playwright custa dezenas de ms e só é necessário aqui
+            from playwright.async_api import async_playwright
+            
+            self.playwright = await async_playwright().start()
+            self.browser = await launch_chromium(self.playwright, self.headless, self.launch_profile)
+        self.context = await self.browser.new_context(**LAUNCH_PROFILES[self.launch_profile]['context'])
         self.page = await self.context.new_page()
+        self.last_init_ms = round((time.perf_counter() - started) * 1000, 1)
         self._initialized = True
     
+    @governed('login')
     async def login(self, email: str, password: str) -> bool:
         """
         Realiza login no sistema.
@@ -53,13 +235,12 @@ class PlaywrightController:
         Returns:
             True se login foi bem-sucedido, False caso contrário
         """
-        if not self._initialized:
-            await self.initialize()
+        await self.initialize()
         
         try:
             # Navega para página de login
-            await self.page.goto("https://qualiwork.qualiit.com.br/Login", wait_until="networkidle")
-            await asyncio.sleep(1)
+            await self.page.goto(LOGIN_URL, wait_until="networkidle")
+            await fixed_delay(1)
             
             # Preenche campos de login usando XPaths específicos
             # Aguarda campos aparecerem
@@ -67,13 +248,13 @@ class PlaywrightController:
             await email_input.wait_for(state="visible", timeout=10000)
             await email_input.fill(email)
             
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             password_input = self.page.locator('xpath=//*[@id="inputPassword"]')
             await password_input.wait_for(state="visible", timeout=10000)
             await password_input.fill(password)
             
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             # Clica no botão de login
             login_selectors = [
@@ -101,13 +282,14 @@ class PlaywrightController:
             
             # Aguarda redirecionamento ou verifica se login foi bem-sucedido
             await self.page.wait_for_load_state("networkidle", timeout=10000)
-            await asyncio.sleep(2)
+            await fixed_delay(2)
             
             # Verifica se está logado (URL mudou ou elemento específico apareceu)
             current_url = self.page.url
             apontamentos_locator = self.page.locator('text="Apontamentos"')
             apontamentos_count = await apontamentos_locator.count()
             if "Login" not in current_url or apontamentos_count > 0:
+                self._logged_in_as = email
                 return True
             
             return False
@@ -115,33 +297,53 @@ class PlaywrightController:
             print(f"Erro durante login: {e}")
             return False
     
-    async def navigate_to_apontamentos(self, month: int = None, year: int = None) -> bool:
+    async def ensure_logged_in(self, email: str, password: str) -> bool:
+        """
+        Reaproveita a sessão já logada da conta ou faz login.
+        
+        Considera a sessão válida se o navegador está aberto, o último login foi da mesma
+        conta e a página atual não é a de login (ex.: sessão expirada redireciona para lá).
+        
+        Returns:
+            True se está logado
+        """
+        if (self.is_alive() and self.page is not None and self._logged_in_as == email
+                and "Login" not in self.page.url):
+            return True
+        return await self.login(email, password)
+    
+    @governed('navigate_to_apontamentos')
+    async def navigate_to_apontamentos(self, month: int = None, year: int = None,
+                                       page: Optional[Page] = None) -> bool:
         """
         Navega para a página de apontamentos.
         
         Args:
             month: Mês (1-12) - opcional, se fornecido navega direto com parâmetro
             year: Ano (ex: 2026) - opcional, se fornecido navega direto com parâmetro
+            page: Página a usar (padrão: página principal do controlador)
         
         Returns:
             True se navegação foi bem-sucedida, False caso contrário
         """
+        page = page or self.page
         try:
             if month and year:
                 # Navega diretamente com parâmetro mesAno na URL
                 month_year_str = f"{month:02d}/{year}"
                 url = f"https://qualiwork.qualiit.com.br/Apontamentos/Apontar/?mesAno={month_year_str}"
-                await self.page.goto(url, wait_until="networkidle")
+                await page.goto(url, wait_until="networkidle")
             else:
                 # Navega para página padrão
-                await self.page.goto("https://qualiwork.qualiit.com.br/Apontamentos", wait_until="networkidle")
+                await page.goto("https://qualiwork.qualiit.com.br/Apontamentos", wait_until="networkidle")
             
-            await asyncio.sleep(2)
+            await fixed_delay(2)
             return True
         except Exception as e:
             print(f"Erro ao navegar para apontamentos: {e}")
             return False
     
+    @governed('select_month_year')
     async def select_month_year(self, month: int, year: int) -> bool:
         """
         Seleciona mês e ano navegando diretamente pela URL.
@@ -160,13 +362,14 @@ class PlaywrightController:
             # Navega diretamente com o parâmetro na URL
             url = f"https://qualiwork.qualiit.com.br/Apontamentos/Apontar/?mesAno={month_year_str}"
             await self.page.goto(url, wait_until="networkidle")
-            await asyncio.sleep(2)
+            await fixed_delay(2)
             
             return True
         except Exception as e:
             print(f"Erro ao selecionar mês/ano: {e}")
             return False
     
+    @governed('click_fazer_apontamento')
     async def click_fazer_apontamento(self) -> bool:
         """
         Clica no botão "Fazer Apontamento".
@@ -178,18 +381,25 @@ class PlaywrightController:
             # Localiza o botão pelo XPath fornecido
             button = self.page.locator('xpath=//*[@id="btnFazerApontamento"]')
             await button.click()
-            await asyncio.sleep(2)  # Aguarda modal aparecer
+            await fixed_delay(2)  # Aguarda modal aparecer
             
             return True
         except Exception as e:
             print(f"Erro ao clicar em Fazer Apontamento: {e}")
             return False
     
-    async def get_available_tasks(self) -> List[Dict[str, str]]:
+    @governed('get_available_tasks')
+    async def get_available_tasks(self, page: Optional[Page] = None) -> List[Dict[str, str]]:
         """
         Extrai lista de tarefas disponíveis da tabela no modal.
         Aguarda o modal aparecer automaticamente ao acessar a URL com mesAno.
         
+        A tabela é lida em uma única chamada ao navegador; o índice chave -> linha
+        (`task_rows`) é montado na mesma passada quando a página é a principal.
+        
+        Args:
+            page: Página a usar (padrão: página principal do controlador)
+        
         Returns:
             Lista de dicionários com informações das tarefas:
             [
@@ -200,73 +410,41 @@ class PlaywrightController:
                     'tarefa': '...',
                     'horas_liberadas': '...',
                     'horas_apontadas': '...',
-                    'saldo': '...'
+                    'saldo': '...',
+                    'key': 'proposta|projeto|tarefa',
+                    'horas_liberadas_min': int | None,  # Colunas de horas em minutos
+                    'horas_apontadas_min': int | None,
+                    'saldo_min': int | None
                 },
                 ...
             ]
         """
-        tasks = []
+        main_page = page is None or page is self.page
+        page = page or self.page
         try:
             # Aguarda a página carregar completamente
-            await self.page.wait_for_load_state("networkidle", timeout=15000)
-            await asyncio.sleep(2)
+            await page.wait_for_load_state("networkidle", timeout=15000)
+            await fixed_delay(2)
             
             # Aguarda o modal aparecer usando o XPath específico
-            modal_container = self.page.locator('xpath=//*[@id="zoomTarefas"]')
+            modal_container = page.locator('xpath=//*[@id="zoomTarefas"]')
             await modal_container.wait_for(state="visible", timeout=15000)
             print("Modal de tarefas encontrado")
             
             # Aguarda a tabela dentro do modal aparecer
-            table = self.page.locator('xpath=//*[@id="tbTarefasRecurso"]')
+            table = page.locator('xpath=//*[@id="tbTarefasRecurso"]')
             await table.wait_for(state="visible", timeout=10000)
             print("Tabela de tarefas encontrada")
             
-            await asyncio.sleep(1)
-            
-            # Extrai linhas da tabela
-            rows = await table.locator('tbody tr').all()
-            if len(rows) == 0:
-                # Tenta sem tbody
-                rows = await table.locator('tr').all()
-                # Remove cabeçalho se existir
-                if len(rows) > 0:
-                    rows = rows[1:] if len(rows) > 1 else rows
+            await fixed_delay(1)
             
+            rows = await page.evaluate(TASK_TABLE_SCRIPT) or []
             print(f"Encontradas {len(rows)} linhas na tabela")
             
-            # Extrai cada linha
-            for i, row in enumerate(rows, start=1):
-                try:
-                    cells = await row.locator('td').all()
-                    
-                    if len(cells) >= 7:
-                        # Extrai texto de cada célula
-                        proposta = (await cells[0].inner_text()).strip() if len(cells) > 0 else ""
-                        cliente = (await cells[1].inner_text()).strip() if len(cells) > 1 else ""
-                        projeto = (await cells[2].inner_text()).strip() if len(cells) > 2 else ""
-                        tarefa = (await cells[3].inner_text()).strip() if len(cells) > 3 else ""
-                        horas_liberadas = (await cells[4].inner_text()).strip() if len(cells) > 4 else ""
-                        horas_apontadas = (await cells[5].inner_text()).strip() if len(cells) > 5 else ""
-                        saldo = (await cells[6].inner_text()).strip() if len(cells) > 6 else ""
-                        
-                        # Só adiciona se tiver dados válidos
-                        if proposta or cliente or projeto:
-                            task_info = {
-                                'proposta': proposta,
-                                'cliente': cliente,
-                                'projeto': projeto,
-                                'tarefa': tarefa,
-                                'horas_liberadas': horas_liberadas,
-                                'horas_apontadas': horas_apontadas,
-                                'saldo': saldo
-                            }
-                            tasks.append(task_info)
-                            print(f"Tarefa {i} extraída: {proposta} - {cliente} - {projeto}")
-                except Exception as e:
-                    print(f"Erro ao extrair linha {i}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+            tasks, index, balances = _parse_task_rows(rows)
+            if main_page:
+                self.task_rows = index
+                self._store_balances(balances)
             
             print(f"Total de tarefas extraídas: {len(tasks)}")
             return tasks
@@ -276,6 +454,62 @@ class PlaywrightController:
             traceback.print_exc()
             return []
     
+    def _store_balances(self, balances: Dict[str, TaskBalance]):
+        """Guarda os saldos da última leitura da tabela na página principal."""
+        self.task_balances = balances
+        self.task_balances_at = time.monotonic()
+    
+    async def _load_month_tasks(self, month: int, year: int) -> List[Dict[str, str]]:
+        """Extrai as tarefas de um mês em uma página própria, fechando-a ao final."""
+        page = await self.open_extra_page()
+        try:
+            if not await self.navigate_to_apontamentos(month, year, page=page):
+                raise RuntimeError("Erro ao navegar para página")
+            tasks = await self.get_available_tasks(page=page)
+            if not tasks:
+                raise RuntimeError("Nenhuma tarefa encontrada")
+            return tasks
+        finally:
+            await page.close()
+    
+    async def get_tasks_for_months(self, months: List[tuple], max_concurrency: int = 3,
+                                   timeout: float = 90.0) -> tuple:
+        """
+        Extrai as tarefas de vários meses em paralelo, cada um em sua própria página.
+        
+        Exige login prévio (as páginas compartilham o contexto logado). Um mês lento ou com
+        erro não derruba os demais: o erro é registrado e os outros meses são retornados.
+        
+        Args:
+            months: Lista de (mês, ano)
+            max_concurrency: Máximo de páginas extraindo ao mesmo tempo
+            timeout: Tempo máximo por mês (segundos)
+            
+        Returns:
+            Tupla (tarefas por "MM/AAAA", lista de {'month': "MM/AAAA", 'error': str})
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def load(month: int, year: int):
+            async with semaphore:
+                return await asyncio.wait_for(self._load_month_tasks(month, year), timeout)
+        
+        labels = [f"{month:02d}/{year}" for month, year in months]
+        outcomes = await asyncio.gather(*(load(month, year) for month, year in months),
+                                        return_exceptions=True)
+        
+        tasks_by_month = {}
+        errors = []
+        for label, outcome in zip(labels, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                errors.append({'month': label, 'error': f"Tempo esgotado ({timeout:.0f}s)"})
+            elif isinstance(outcome, BaseException):
+                errors.append({'month': label, 'error': str(outcome)})
+            else:
+                tasks_by_month[label] = outcome
+        return tasks_by_month, errors
+    
+    @governed('select_task')
     async def select_task(self, task_index: int = 0) -> bool:
         """
         Seleciona uma tarefa da tabela pelo índice.
@@ -300,7 +534,7 @@ class PlaywrightController:
             count = await task_cell.count()
             if count > 0:
                 await task_cell.click()
-                await asyncio.sleep(2)  # Aguarda página carregar após seleção
+                await fixed_delay(2)  # Aguarda página carregar após seleção
                 return True
             
             return False
@@ -308,6 +542,42 @@ class PlaywrightController:
             print(f"Erro ao selecionar tarefa: {e}")
             return False
     
+    @governed('select_task_by_key')
+    async def select_task_by_key(self, task_key: str) -> bool:
+        """
+        Seleciona uma tarefa pela chave estável ("proposta|projeto|tarefa").
+        
+        A chave é resolvida contra a tabela atual (lida em uma única chamada), então uma
+        mudança na ordem das linhas não seleciona a tarefa errada. Se a chave não existe
+        na tabela, falha imediatamente, sem clicar em nada.
+        
+        Args:
+            task_key: Chave da tarefa (campo 'key' de get_available_tasks)
+            
+        Returns:
+            True se seleção foi bem-sucedida, False caso contrário
+        """
+        try:
+            table = self.page.locator('xpath=//*[@id="tbTarefasRecurso"]')
+            await table.wait_for(state="visible", timeout=10000)
+            
+            _, index, balances = _parse_task_rows(await self.page.evaluate(TASK_TABLE_SCRIPT) or [])
+            self.task_rows = index
+            self._store_balances(balances)
+            position = index.get(task_key)
+            if position is None:
+                print(f"[PlaywrightController] Tarefa não encontrada na tabela: {task_key}")
+                return False
+            
+            task_cell = self.page.locator(f'xpath=//*[@id="tbTarefasRecurso"]/tbody/tr[{position + 1}]/td[3]')
+            await task_cell.click()
+            await fixed_delay(2)  # Aguarda página carregar após seleção
+            return True
+        except Exception as e:
+            print(f"Erro ao selecionar tarefa: {e}")
+            return False
+    
+    @governed('fill_time_entry')
     async def fill_time_entry(self, date: str, start: str, end: str, description: str, row_index: int = 0) -> bool:
         """
         Preenche uma entrada de horário usando XPaths específicos.
@@ -345,37 +615,37 @@ class PlaywrightController:
             date_input = self.page.locator(date_xpath)
             await date_input.wait_for(state="visible", timeout=10000)
             await date_input.click()
-            await asyncio.sleep(0.3)
+            await fixed_delay(0.3)
             await date_input.fill(date)
             print(f"[PlaywrightController] Data preenchida: {date}")
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             print(f"[PlaywrightController] Preenchendo horário de início...")
             start_input = self.page.locator(start_xpath)
             await start_input.wait_for(state="visible", timeout=10000)
             await start_input.click()
-            await asyncio.sleep(0.3)
+            await fixed_delay(0.3)
             await start_input.fill(start)
             print(f"[PlaywrightController] Início preenchido: {start}")
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             print(f"[PlaywrightController] Preenchendo horário de fim...")
             end_input = self.page.locator(end_xpath)
             await end_input.wait_for(state="visible", timeout=10000)
             await end_input.click()
-            await asyncio.sleep(0.3)
+            await fixed_delay(0.3)
             await end_input.fill(end)
             print(f"[PlaywrightController] Fim preenchido: {end}")
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             print(f"[PlaywrightController] Preenchendo descrição...")
             desc_input = self.page.locator(desc_xpath)
             await desc_input.wait_for(state="visible", timeout=10000)
             await desc_input.click()
-            await asyncio.sleep(0.3)
+            await fixed_delay(0.3)
             await desc_input.fill(description)
             print(f"[PlaywrightController] Descrição preenchida: {description[:50]}...")
-            await asyncio.sleep(0.5)
+            await fixed_delay(0.5)
             
             print(f"[PlaywrightController] ✓ Linha {row_index} preenchida com sucesso!")
             return True
@@ -385,6 +655,7 @@ class PlaywrightController:
             traceback.print_exc()
             return False
     
+    @governed('add_new_entry_row')
     async def add_new_entry_row(self) -> bool:
         """
         Adiciona uma nova linha para preenchimento (segunda entrada do dia).
@@ -399,7 +670,7 @@ class PlaywrightController:
             count = await add_button.count()
             if count > 0:
                 await add_button.click()
-                await asyncio.sleep(1)
+                await fixed_delay(1)
                 return True
             
             # Se não encontrar botão, pode ser que precise clicar em uma área específica
@@ -409,14 +680,20 @@ class PlaywrightController:
             print(f"Erro ao adicionar nova linha: {e}")
             return False
     
-    async def save_entry(self) -> bool:
+    @governed('save_entry')
+    async def save_entry(self, confirm: bool = False) -> bool:
         """
         Salva a entrada preenchida.
-        NOTA: Este método apenas localiza o botão, mas NÃO clica nele.
+        NOTA: Por padrão este método apenas localiza o botão, mas NÃO clica nele.
         O salvamento deve ser feito manualmente pelo usuário para verificação.
         
+        Args:
+            confirm: Clica no botão e aguarda o salvamento (preenchimento sem supervisão,
+                ex.: agendador com SCHEDULE_AUTO_SAVE)
+        
         Returns:
-            True se o botão foi encontrado, False caso contrário
+            True se o botão foi encontrado (com confirm: se o salvamento foi concluído
+            sem mensagem de erro na página), False caso contrário
         """
         try:
             print("[PlaywrightController] Localizando botão de salvar...")
@@ -424,21 +701,163 @@ class PlaywrightController:
             save_button = self.page.locator('button:has-text("SALVAR"), button[type="submit"], button:has-text("Salvar")').first
             count = await save_button.count()
             
-            if count > 0:
+            if count == 0:
+                print("[PlaywrightController] AVISO: Botão de salvar não encontrado")
+                return False
+            if not confirm:
                 print("[PlaywrightController] ✓ Botão de salvar encontrado! (aguardando salvamento manual)")
                 # NÃO clica automaticamente - deixa o usuário salvar manualmente
-                # await save_button.click()
-                # await asyncio.sleep(2)  # Aguarda salvamento
                 return True
-            else:
-                print("[PlaywrightController] AVISO: Botão de salvar não encontrado")
+            
+            await save_button.click()
+            await self.page.wait_for_load_state("networkidle", timeout=30000)
+            # O sistema exibe a falha de validação/gravação como alerta na própria página
+            error = self.page.locator('.alert-danger:visible, .validation-summary-errors:visible, .field-validation-error:visible')
+            if await error.count() > 0:
+                message = (await error.first.inner_text()).strip()
+                print(f"[PlaywrightController] ERRO: salvamento recusado pela página: {message}")
                 return False
+            print("[PlaywrightController] ✓ Apontamentos salvos")
+            return True
         except Exception as e:
-            print(f"[PlaywrightController] ERRO ao localizar botão de salvar: {e}")
+            print(f"[PlaywrightController] ERRO ao salvar: {e}")
             import traceback
             traceback.print_exc()
             return False
     
+    async def open_extra_page(self) -> Page:
+        """
+        Abre uma página adicional no mesmo contexto (compartilha o login).
+        
+        Returns:
+            Nova página; o chamador é responsável por fechá-la
+        """
+        await self.initialize()
+        return await self.context.new_page()
+    
+    async def get_page_health(self) -> Dict[str, Optional[float]]:
+        """
+        Mede a saúde da página atual.
+        
+        Returns:
+            Dicionário com 'js_heap_mb' (None se indisponível) e 'dom_nodes'
+        """
+        health = await self.page.evaluate(PAGE_HEALTH_SCRIPT)
+        heap_bytes = health.get('js_heap_bytes')
+        return {
+            'js_heap_mb': round(heap_bytes / (1024 * 1024), 1) if heap_bytes else None,
+            'dom_nodes': health.get('dom_nodes'),
+        }
+    
+    async def check_page_budget(self, row_latency_s: float, days: int = 1) -> Optional[str]:
+        """
+        Registra os dias preenchidos desde a última chamada (um lote) e verifica se a página
+        estourou o orçamento.
+        
+        Args:
+            row_latency_s: Latência média por dia preenchido (segundos)
+            days: Dias preenchidos desde a última chamada (contam para `check_every`)
+            
+        Returns:
+            Motivo do estouro ou None se a página está dentro do orçamento
+        """
+        budget = self.page_budget
+        if budget is None:
+            return None
+        
+        if budget.max_row_latency_s is not None and row_latency_s > budget.max_row_latency_s:
+            return f"latência de {row_latency_s:.1f}s por dia (limite {budget.max_row_latency_s:.1f}s)"
+        
+        self._days_since_health_check += days
+        if self._days_since_health_check < budget.check_every:
+            return None
+        self._days_since_health_check = 0
+        
+        try:
+            health = await self.get_page_health()
+        except Exception as e:
+            print(f"[PlaywrightController] AVISO: não foi possível medir a página: {e}")
+            return None
+        
+        if (budget.max_js_heap_mb is not None and health['js_heap_mb'] is not None
+                and health['js_heap_mb'] > budget.max_js_heap_mb):
+            return f"heap JS de {health['js_heap_mb']} MB (limite {budget.max_js_heap_mb} MB)"
+        
+        if budget.max_dom_nodes is not None and health['dom_nodes'] > budget.max_dom_nodes:
+            return f"{health['dom_nodes']} nós no DOM (limite {budget.max_dom_nodes})"
+        
+        return None
+    
+    async def recycle_page(self) -> float:
+        """
+        Troca a página atual por uma nova no mesmo contexto (a sessão de login é mantida).
+        
+        O chamador deve navegar novamente para onde estava.
+        
+        Returns:
+            Tempo gasto na troca (segundos)
+        """
+        started = time.perf_counter()
+        old_page = self.page
+        self.page = await self.context.new_page()
+        self._days_since_health_check = 0
+        try:
+            await old_page.close()
+        except Exception as e:
+            print(f"[PlaywrightController] AVISO: erro ao fechar página antiga: {e}")
+        return time.perf_counter() - started
+    
+    async def set_headless(self, headless: bool) -> bool:
+        """
+        Ajusta o modo do navegador (com ou sem janela).
+        
+        O modo só pode ser escolhido no lançamento: se o navegador já está aberto em outro
+        modo, ele é fechado e será relançado no próximo login.
+        
+        Args:
+            headless: True para executar sem janela
+            
+        Returns:
+            True se o navegador precisou ser fechado para trocar de modo
+        """
+        if headless == self.headless:
+            return False
+        self.headless = headless
+        if not self._initialized:
+            return False
+        print(f"[PlaywrightController] Relançando navegador em modo {'headless' if headless else 'visível'}")
+        await self.close()
+        return True
+    
+    async def capture_screenshot(self, full_page: bool = True) -> bytes:
+        """
+        Captura a página atual para revisão (funciona também em modo headless).
+        
+        Args:
+            full_page: Se True, captura a página inteira e não só a área visível
+            
+        Returns:
+            Imagem PNG
+        """
+        if self.page is None:
+            raise RuntimeError("Navegador não está aberto")
+        return await self.page.screenshot(full_page=full_page, type='png')
+    
+    async def capture_dom_snapshot(self) -> Dict[str, str]:
+        """
+        Captura o HTML atual da página para revisão.
+        
+        Returns:
+            Dicionário com 'url', 'title' e 'html'
+        """
+        if self.page is None:
+            raise RuntimeError("Navegador não está aberto")
+        return {
+            'url': self.page.url,
+            'title': await self.page.title(),
+            'html': await self.page.content(),
+        }
+    
     def show_browser(self):
         """Torna o navegador visível (se estava em modo headless)."""
         if self.headless and self.browser:
@@ -447,16 +866,23 @@ class PlaywrightController:
             self.headless = False
     
     async def close(self):
-        """Fecha o navegador e limpa recursos."""
+        """Fecha o navegador e limpa recursos (com navegador compartilhado, só o contexto)."""
         try:
             if self.page:
                 await self.page.close()
             if self.context:
                 await self.context.close()
-            if self.browser:
+            if self.browser and self.shared_browser is None:
                 await self.browser.close()
             if self.playwright:
                 await self.playwright.stop()
-            self._initialized = False
         except Exception as e:
             print(f"Erro ao fechar navegador: {e}")
+        finally:
+            # Permite reinicializar depois (initialize() relança o navegador)
+            self.page = None
+            self.context = None
+            self.browser = None
+            self.playwright = None
+            self._logged_in_as = None
+            self._initialized = False
@@ -0,0 +1,117 @@
+"""
+Medição de memória (RSS) da árvore de processos do backend.
+Soma o Python, o driver do Playwright e os processos do Chromium abertos por ele.
+Usa psutil se estiver instalado; caso contrário, lê /proc (Linux).
+"""
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional
+    psutil = None
+
+
+# Nomes de processo considerados parte do navegador
+BROWSER_PROCESS_MARKERS = ('chrom', 'headless_shell')
+
+
+def _is_browser(name: str) -> bool:
+    """Retorna True se o nome do processo parece ser do Chromium."""
+    lowered = name.lower()
+    return any(marker in lowered for marker in BROWSER_PROCESS_MARKERS)
+
+
+def _tree_with_psutil(root_pid: int) -> List[Dict[str, object]]:
+    """Lista (pid, nome, rss) da árvore de processos usando psutil."""
+    root = psutil.Process(root_pid)
+    processes = []
+    for process in [root] + root.children(recursive=True):
+        try:
+            processes.append({
+                'pid': process.pid,
+                'name': process.name(),
+                'rss': process.memory_info().rss,
+            })
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return processes
+
+
+def _read_proc_status(pid: int) -> Optional[Dict[str, object]]:
+    """Lê nome e VmRSS de /proc/<pid>/status."""
+    try:
+        text = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    name, rss = '', 0
+    for line in text.splitlines():
+        if line.startswith('Name:'):
+            name = line.split(':', 1)[1].strip()
+        elif line.startswith('VmRSS:'):
+            rss = int(line.split()[1]) * 1024  # kB -> bytes
+    return {'pid': pid, 'name': name, 'rss': rss}
+
+
+def _tree_with_proc(root_pid: int) -> List[Dict[str, object]]:
+    """Lista (pid, nome, rss) da árvore de processos lendo /proc."""
+    children: Dict[int, List[int]] = {}
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            # O nome do processo fica entre parênteses e pode conter espaços
+            stat = (entry / 'stat').read_text()
+            ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    processes = []
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        status = _read_proc_status(pid)
+        if status is not None:
+            processes.append(status)
+        pending.extend(children.get(pid, []))
+    return processes
+
+
+def process_tree_memory(root_pid: Optional[int] = None) -> Dict[str, object]:
+    """
+    Mede o RSS da árvore de processos (backend + driver + Chromium).
+
+    Operação bloqueante (percorre a tabela de processos): no backend, chame via pool de threads.
+
+    Args:
+        root_pid: Processo raiz (padrão: o processo atual)
+
+    Returns:
+        Dicionário com:
+        {
+            'available': bool,
+            'total_rss_mb': float,
+            'browser_rss_mb': float,
+            'browser_processes': int,
+            'processes': int
+        }
+    """
+    root_pid = root_pid or os.getpid()
+    if psutil is not None:
+        processes = _tree_with_psutil(root_pid)
+    elif Path('/proc').is_dir():
+        processes = _tree_with_proc(root_pid)
+    else:
+        return {'available': False, 'reason': 'Instale psutil para medir memória neste sistema'}
+
+    browser = [p for p in processes if _is_browser(str(p['name']))]
+    to_mb = 1024 * 1024
+    return {
+        'available': True,
+        'total_rss_mb': round(sum(p['rss'] for p in processes) / to_mb, 1),
+        'browser_rss_mb': round(sum(p['rss'] for p in browser) / to_mb, 1),
+        'browser_processes': len(browser),
+        'processes': len(processes),
+    }
@@ -2,66 +2,214 @@
 API Backend FastAPI para comunicação com automação Playwright.
 Seguindo princípios de arquitetura limpa e SOLID.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
-import uvicorn
+import asyncio
+import base64
+import contextvars
+import json
+import time
+import uuid
 from contextlib import asynccontextmanager
 
-import sys
-from pathlib import Path
+import os
 
-# Adiciona diretório raiz ao path para imports
-root_dir = Path(__file__).parent.parent
-if str(root_dir) not in sys.path:
-    sys.path.insert(0, str(root_dir))
-
-from automation.playwright_controller import PlaywrightController
-from automation.form_filler import FormFiller
-from security.credential_manager import CredentialManager
+# Imports do projeto são baratos: Playwright e cryptography só são carregados no primeiro uso
+from automation.form_filler import FALLBACK_HOURS, build_fill_plan, weekdays_between
+from automation.browser_pool import SharedBrowser
+from automation.cancellation import CancellationToken, RunCancelledError
+from automation.concurrency_governor import ConcurrencyGovernor
+from automation.playwright_controller import PageBudget, PlaywrightController, resolve_launch_profile
+from automation.resource_usage import process_tree_memory
+from security.credential_manager import get_credential_service
+from backend.history_store import HistoryStore
+from backend.plan_import import PlanImporter, PlanImportError, detect_format
+from backend.run_profiler import RUN_ID_PATTERN, list_profiles, profile_path, profile_run
+from backend.async_utils import LoopLagMonitor, run_blocking, shutdown_executor
+from backend.scheduler import DailyScheduler, ScheduleConfig
+from backend.session_registry import WorkerUnavailableError, create_registry
+from backend.session_manager import SessionLimitError, SessionManager
+from security.credential_vault import normalize_account_id
+from utils.task_balance import (BalanceError, TaskBalance, check_plan_balances, day_minutes,
+                                describe_overbooking, parse_hours, spread_by_balance)
+from utils.time_generator import generate_hours_for_dates, new_seed
+from utils.workday_policy import WorkdayPolicyConfig, load_policy_config
 
 
 # Modelos Pydantic para validação
 class CredentialsRequest(BaseModel):
     email: str
     password: str
+    account_id: Optional[str] = None  # Padrão: o próprio email
+    make_default: bool = False
 
 
 class LoadTasksRequest(BaseModel):
     month: int
     year: int
+    account_id: Optional[str] = None  # Padrão: conta padrão do cofre
+    headless: Optional[bool] = None  # Padrão: BROWSER_HEADLESS
+    profile: bool = False  # Grava um perfil speedscope da requisição
+
+
+class MonthYear(BaseModel):
+    month: int
+    year: int
+
+
+class LoadTasksBulkRequest(BaseModel):
+    months: List[MonthYear]
+    account_id: Optional[str] = None  # Padrão: conta padrão do cofre
+    headless: Optional[bool] = None  # Padrão: BROWSER_HEADLESS
+    profile: bool = False  # Grava um perfil speedscope da requisição
 
 
 class PeriodData(BaseModel):
     de: str  # DD/MM/AAAA
     ate: str  # DD/MM/AAAA
-    task_index: int
+    task_index: int = 0
+    task_key: Optional[str] = None  # Chave estável da tarefa (tem prioridade sobre task_index)
+    task_keys: Optional[List[str]] = None  # Distribui os dias entre estas tarefas pelo saldo
     desc_morning: str
     desc_afternoon: str
 
 
+class PlanPeriod(BaseModel):
+    de: str  # DD/MM/AAAA
+    ate: str  # DD/MM/AAAA
+    task_key: Optional[str] = None
+    task_keys: Optional[List[str]] = None  # Distribui os dias entre estas tarefas pelo saldo
+
+
+class HoursPlanRequest(BaseModel):
+    periods: List[PlanPeriod]
+    seed: int
+    contract: Optional[str] = None
+    balances: Optional[Dict[str, Union[str, float]]] = None  # Saldo por chave de tarefa ("12,5", "40:00")
+
+
 class ExecuteAutomationRequest(BaseModel):
     periods: List[PeriodData]
-    headless: bool = True
+    headless: Optional[bool] = None  # Padrão: BROWSER_HEADLESS
+    contract: Optional[str] = None  # Contrato de jornada (workday_policies.json)
+    seed: Optional[int] = None  # Semente de uma execução anterior para reproduzir os horários
+    account_id: Optional[str] = None  # Padrão: conta padrão do cofre
+    batch_days: Optional[int] = None  # Dias por salvamento (padrão: FILL_BATCH_DAYS)
+    profile: bool = False  # Grava um perfil speedscope da execução
+    run_id: Optional[str] = None  # ID (uuid hex) escolhido pelo cliente para cancelar antes da resposta
+    check_balance: bool = True  # Recusa o plano se alguma tarefa passar do saldo
+    auto_save: bool = False  # Clica em salvar e confirma cada lote (sem isso, o salvamento é manual)
+
+
+def _optional_env(name: str, default: str) -> Optional[float]:
+    """Lê um limite numérico do ambiente ('0' ou vazio desativa o limite)."""
+    value = float(os.getenv(name, default) or 0)
+    return value or None
+
+
+# Modo padrão do navegador quando a requisição não informa `headless`
+default_headless = os.getenv('BROWSER_HEADLESS', '0').lower() in ('1', 'true', 'yes')
+# Perfil de lançamento do Chromium (BROWSER_LAUNCH_PROFILE), validado na inicialização
+browser_launch_profile = resolve_launch_profile()
+
+# Idade máxima (segundos) dos saldos lidos da tabela de tarefas antes de uma nova leitura
+BALANCE_MAX_AGE = float(os.getenv('BALANCE_MAX_AGE', '300'))
+
+# Orçamento de recursos da página durante preenchimentos longos (reciclagem de página)
+page_budget = PageBudget(
+    max_js_heap_mb=_optional_env('PAGE_MAX_JS_HEAP_MB', '300'),
+    max_dom_nodes=_optional_env('PAGE_MAX_DOM_NODES', '60000'),
+    max_row_latency_s=_optional_env('PAGE_MAX_ROW_LATENCY', '30'),
+    check_every=int(os.getenv('PAGE_HEALTH_CHECK_EVERY', '5')),
+)
+
+# Estado global: uma sessão de navegador por conta, com limite de navegadores ativos
+# Navegador compartilhado (BROWSER_MODE=shared|cdp): as sessões criam apenas contextos nele
+shared_browser = SharedBrowser.from_env()
+# Limite adaptativo de ações de rede simultâneas, somando todas as sessões
+concurrency_governor = ConcurrencyGovernor.from_env()
+session_manager = SessionManager(
+    max_sessions=int(os.getenv('MAX_BROWSER_SESSIONS', '2')),
+    controller_factory=lambda: PlaywrightController(
+        headless=default_headless, page_budget=page_budget, shared_browser=shared_browser,
+        governor=concurrency_governor, launch_profile=browser_launch_profile
+    ),
+    # Sessão despejada deixa de ser deste worker no registro
+    on_evict=lambda key: session_registry.release_session(key)
+)
+workday_policies = WorkdayPolicyConfig()
+loop_lag_monitor = LoopLagMonitor(
+    warn_threshold_ms=float(os.getenv('LOOP_LAG_WARN_MS', '100'))
+)
+# Histórico local das execuções e apontamentos (SQLite)
+history_store = HistoryStore()
+# Execuções em andamento neste worker (run_id -> registro com token de cancelamento)
+active_runs: Dict[str, Dict] = {}
+# Dono de cada sessão/execução entre os workers (BACKEND_WORKERS > 1 usa SQLite)
+session_registry = create_registry()
+# Marca requisições já repassadas por outro worker (não são repassadas de novo)
+_routed_job: contextvars.ContextVar[bool] = contextvars.ContextVar('_routed_job', default=False)
+
+
+async def _owns_session(key: str) -> bool:
+    """Assume a sessão para este worker; False se ela pertence a outro worker vivo."""
+    return await session_registry.claim_session(key) == session_registry.worker_id
 
 
-# Estado global (singleton para Playwright)
-playwright_controller: Optional[PlaywrightController] = None
-form_filler: Optional[FormFiller] = None
+# Preenchimento diário incremental (SCHEDULE_TIME vazio desativa)
+scheduler = DailyScheduler(
+    ScheduleConfig.from_env(),
+    session_manager,
+    load_credentials=lambda account_id: _load_saved_credentials(account_id),
+    resolve_policy=lambda email, contract: workday_policies.resolve(account=email, contract=contract),
+    history=history_store,
+    owns_session=_owns_session
+)
+
+
+async def _warm_credential_service():
+    """Deriva a chave de credenciais uma única vez para o processo (fora do event loop)."""
+    try:
+        credential_service = await run_blocking(get_credential_service)
+        print(f"[Startup] Chave de credenciais derivada em {credential_service.key_derivation_ms:.1f} ms")
+    except Exception as e:
+        print(f"[Startup] AVISO: não foi possível preparar as credenciais: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia ciclo de vida da aplicação."""
     # Startup
+    global workday_policies
+    # Políticas de jornada são carregadas e compiladas uma única vez
+    workday_policies = load_policy_config()
+    # Deriva a chave de credenciais em segundo plano: o servidor já responde ao health check
+    # enquanto isso; a primeira requisição de credenciais aguarda o mesmo singleton
+    warmup = asyncio.get_running_loop().create_task(_warm_credential_service())
+    loop_lag_monitor.start()
+    # Fecha navegadores ociosos (relançados sob demanda na próxima requisição)
+    session_manager.start_reaper(float(os.getenv('BROWSER_IDLE_TIMEOUT', '600')))
+    await session_registry.start(_dispatch_job)
+    # Com vários workers, só um roda o agendador (outro assume se ele parar; se este
+    # worker perder a liderança, o agendador local é parado)
+    session_registry.lead('scheduler', scheduler.start, on_lost=scheduler.stop)
     yield
     # Shutdown
-    global playwright_controller
-    if playwright_controller:
-        await playwright_controller.close()
+    warmup.cancel()
+    await scheduler.stop()
+    await session_manager.close_all()
+    await session_registry.stop()
+    if shared_browser is not None:
+        await shared_browser.close()
+    await loop_lag_monitor.stop()
+    await run_blocking(history_store.close)
+    shutdown_executor()
 
 
 app = FastAPI(
@@ -81,6 +229,187 @@ app.add_middleware(
 )
 
 
+async def _use_headless(controller: PlaywrightController, headless: Optional[bool]):
+    """Aplica o modo pedido na requisição (relança o navegador da sessão se o modo mudou)."""
+    await controller.set_headless(default_headless if headless is None else headless)
+
+
+async def _record_history(run: Dict, account: str, periods: List[Dict], source: str = 'api'):
+    """Grava uma execução no histórico (uma falha no histórico não falha a execução)."""
+    try:
+        await run_blocking(history_store.record_run, run, account, periods, source)
+    except Exception as e:
+        print(f"[History] AVISO: não foi possível gravar a execução {run['run_id']}: {e}")
+
+
+@asynccontextmanager
+async def _track_run(run_id: str, session_key: str, result: Dict):
+    """
+    Registra a execução em `active_runs` enquanto ela roda (inclusive aguardando a sessão).
+
+    Produz o token de cancelamento; ao sair, marca a execução como concluída para quem
+    aguarda o cancelamento (o resultado é o próprio dicionário `result`).
+    """
+    token = CancellationToken()
+    run = {
+        'run_id': run_id,
+        'session': session_key,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'token': token,
+        'result': result,
+        'done': asyncio.Event(),
+    }
+    active_runs[run_id] = run
+    await session_registry.register_run(run_id, session_key)
+    try:
+        yield token
+    finally:
+        active_runs.pop(run_id, None)
+        run['done'].set()
+        await session_registry.finish_run(run_id)
+
+
+def _job_response(response: Dict) -> Response:
+    """Converte a resposta de um job repassado em resposta HTTP."""
+    if 'content_b64' in response:
+        return Response(content=base64.b64decode(response['content_b64']),
+                        media_type=response['media_type'], status_code=response['status_code'])
+    return JSONResponse(response['body'], status_code=response['status_code'])
+
+
+async def _forward(owner: str, kind: str, payload: Dict) -> Response:
+    """Executa a requisição no worker dono da sessão e devolve a resposta dele."""
+    try:
+        return _job_response(await session_registry.submit(owner, kind, payload))
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _route(key: str, kind: str, payload: Dict) -> Optional[Response]:
+    """
+    Repassa a requisição ao worker dono da sessão, assumindo-a se estiver livre.
+    
+    Returns:
+        Resposta do outro worker, ou None se a sessão é deste worker (executar aqui)
+    """
+    if _routed_job.get():
+        return None
+    owner = await session_registry.claim_session(key)
+    if owner == session_registry.worker_id:
+        return None
+    return await _forward(owner, kind, payload)
+
+
+async def _route_existing(key: str, kind: str, payload: Dict) -> Optional[Response]:
+    """Como _route, para sessões que precisam já existir (não assume a sessão)."""
+    if _routed_job.get() or session_manager.get(normalize_account_id(key)) is not None:
+        return None
+    owner = await session_registry.session_owner(normalize_account_id(key))
+    if owner is None or owner == session_registry.worker_id:
+        return None
+    return await _forward(owner, kind, payload)
+
+
+def _balance_plan(periods: List, seed: int, policy, balances: Dict[str, TaskBalance],
+                  index_keys: Dict[int, str]) -> Tuple[List, Dict]:
+    """
+    Distribui os dias dos períodos com `task_keys` entre as tarefas, na proporção do saldo,
+    e soma o plano inteiro por tarefa para conferir contra os saldos.
+    
+    Args:
+        periods: Períodos da requisição (PeriodData ou PlanPeriod)
+        seed: Semente da execução (os horários de cada dia não mudam com a distribuição)
+        policy: Política de jornada
+        balances: Saldos por chave de tarefa
+        index_keys: Posição da linha -> chave, para períodos que informam só task_index
+    
+    Returns:
+        Tupla (períodos a executar, um por tarefa; relatório de check_plan_balances com a
+        distribuição em 'spread')
+    
+    Raises:
+        BalanceError: Os dias de um período não cabem no saldo das tarefas indicadas
+    """
+    expanded = []
+    plan_minutes: Dict[str, int] = {}
+    spread = []
+    for period in periods:
+        try:
+            de_date = datetime.strptime(period.de, '%d/%m/%Y')
+            ate_date = datetime.strptime(period.ate, '%d/%m/%Y')
+        except ValueError:
+            expanded.append(period)  # A data inválida é reportada na execução do período
+            continue
+        
+        dates, hours, validation = build_fill_plan(de_date, ate_date, seed, policy)
+        minutes = [day_minutes(daily_hours if valid else FALLBACK_HOURS)
+                   for daily_hours, (valid, _) in zip(hours, validation)]
+        
+        if not period.task_keys:
+            expanded.append(period)
+            key = period.task_key or index_keys.get(getattr(period, 'task_index', None))
+            if key:
+                plan_minutes[key] = plan_minutes.get(key, 0) + sum(minutes)
+            continue
+        
+        candidates = [balances.get(key) or TaskBalance(key, None, None, None) for key in period.task_keys]
+        for key, start, end in spread_by_balance(minutes, candidates):
+            de, ate = dates[start].strftime('%d/%m/%Y'), dates[end - 1].strftime('%d/%m/%Y')
+            expanded.append(period.model_copy(update={'de': de, 'ate': ate, 'task_key': key,
+                                                      'task_keys': None}))
+            plan_minutes[key] = plan_minutes.get(key, 0) + sum(minutes[start:end])
+            spread.append({'task_key': key, 'de': de, 'ate': ate, 'days': end - start,
+                           'minutes': sum(minutes[start:end])})
+    
+    report = check_plan_balances(plan_minutes, balances)
+    report['spread'] = spread
+    return expanded, report
+
+
+async def _task_balances(controller: PlaywrightController, periods: List[PeriodData]) -> Dict[str, TaskBalance]:
+    """
+    Saldos das tarefas da conta: os da última leitura da tabela, se recentes, ou lidos de
+    novo no mês do primeiro período.
+    """
+    if controller.task_balances and controller.task_balances_at is not None \
+            and time.monotonic() - controller.task_balances_at < BALANCE_MAX_AGE:
+        return controller.task_balances
+    
+    month = datetime.now()
+    for period in periods:
+        try:
+            month = datetime.strptime(period.de, '%d/%m/%Y')
+            break
+        except ValueError:
+            continue
+    if await controller.navigate_to_apontamentos(month.month, month.year):
+        await controller.get_available_tasks()
+    return controller.task_balances
+
+
+async def _history_account(account_id: Optional[str]) -> str:
+    """Conta das consultas de histórico (padrão: email da conta padrão, como nas execuções)."""
+    if account_id:
+        return normalize_account_id(account_id)
+    email, _ = await _load_saved_credentials()
+    return normalize_account_id(email)
+
+
+async def _load_saved_credentials(account_id: Optional[str] = None) -> tuple[str, str]:
+    """
+    Carrega as credenciais de uma conta salva (conta padrão se None).
+    
+    Raises:
+        HTTPException: 400 se não houver credenciais para a conta
+    """
+    credential_service = await run_blocking(get_credential_service)
+    credentials = await run_blocking(credential_service.load_credentials, account_id)
+    if not credentials:
+        raise HTTPException(status_code=400, detail="Credenciais não encontradas")
+    
+    return credentials
+
+
 @app.get("/")
 async def root():
     """Health check."""
@@ -101,8 +430,14 @@ async def health_check():
 async def save_credentials(request: CredentialsRequest):
     """Salva credenciais criptografadas."""
     try:
-        credential_manager = CredentialManager()
-        success = credential_manager.save_credentials(request.email, request.password)
+        credential_manager = await run_blocking(get_credential_service)
+        success = await run_blocking(
+            credential_manager.save_credentials,
+            request.email,
+            request.password,
+            request.account_id,
+            request.make_default
+        )
         
         if success:
             return {"success": True, "message": "Credenciais salvas com sucesso"}
@@ -116,67 +451,156 @@ async def save_credentials(request: CredentialsRequest):
 async def load_credentials():
     """Carrega credenciais salvas."""
     try:
-        credential_manager = CredentialManager()
-        if credential_manager.has_credentials():
-            credentials = credential_manager.load_credentials()
-            if credentials:
-                email, _ = credentials
-                return {"success": True, "email": email, "has_credentials": True}
+        credential_manager = await run_blocking(get_credential_service)
+        credentials = await run_blocking(credential_manager.load_credentials)
+        if credentials:
+            email, _ = credentials
+            accounts = await run_blocking(credential_manager.list_accounts)
+            return {"success": True, "email": email, "has_credentials": True, "accounts": len(accounts)}
         
         return {"success": True, "has_credentials": False}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/credentials/accounts")
+async def list_credential_accounts():
+    """Lista as contas salvas no cofre (sem senhas)."""
+    try:
+        credential_manager = await run_blocking(get_credential_service)
+        accounts = await run_blocking(credential_manager.list_accounts)
+        return {"success": True, "accounts": accounts}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/credentials")
+async def delete_credentials():
+    """Remove todas as credenciais salvas (e as cópias mantidas em memória)."""
+    try:
+        credential_manager = await run_blocking(get_credential_service)
+        if await run_blocking(credential_manager.delete_credentials):
+            return {"success": True, "message": "Credenciais removidas"}
+        raise HTTPException(status_code=500, detail="Erro ao remover credenciais")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/credentials/{account_id}")
+async def delete_account_credentials(account_id: str):
+    """Remove as credenciais de uma conta."""
+    try:
+        credential_manager = await run_blocking(get_credential_service)
+        if await run_blocking(credential_manager.delete_credentials, account_id):
+            return {"success": True, "message": f"Credenciais da conta {account_id} removidas"}
+        raise HTTPException(status_code=404, detail="Conta não encontrada")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/tasks/load")
 async def load_tasks(request: LoadTasksRequest):
     """Carrega tarefas disponíveis do sistema."""
-    global playwright_controller
-    
     try:
-        # Carrega credenciais
-        credential_manager = CredentialManager()
-        if not credential_manager.has_credentials():
-            raise HTTPException(status_code=400, detail="Credenciais não encontradas")
-        
-        credentials = credential_manager.load_credentials()
-        if not credentials:
-            raise HTTPException(status_code=400, detail="Erro ao carregar credenciais")
-        
-        email, password = credentials
+        # Carrega credenciais (I/O e criptografia fora do event loop)
+        email, password = await _load_saved_credentials(request.account_id)
         
-        # Inicializa Playwright (sempre visível para verificação manual)
-        if not playwright_controller:
-            playwright_controller = PlaywrightController(headless=False)
-            await playwright_controller.initialize()
-        else:
-            # Reutiliza ou reinicializa se necessário
-            try:
-                _ = playwright_controller.page.url
-            except:
-                await playwright_controller.initialize()
-        
-        # Login
-        if not await playwright_controller.login(email, password):
-            raise HTTPException(status_code=401, detail="Falha no login")
-        
-        # Navega para página com mês/ano
-        if not await playwright_controller.navigate_to_apontamentos(request.month, request.year):
-            raise HTTPException(status_code=500, detail="Erro ao navegar para página")
-        
-        # Extrai tarefas
-        tasks = await playwright_controller.get_available_tasks()
+        # Cada conta usa sua própria sessão de navegador, com acesso exclusivo, no worker
+        # dono da sessão
+        session_key = normalize_account_id(request.account_id or email)
+        routed = await _route(session_key, 'tasks-load', request.model_dump())
+        if routed is not None:
+            return routed
+        run_id = uuid.uuid4().hex
+        async with session_manager.session(session_key) as session, \
+                profile_run(run_id, 'tasks-load', request.profile) as profile:
+            controller = session.controller
+            await _use_headless(controller, request.headless)
+            
+            # Login (inicializa o navegador se necessário)
+            if not await controller.login(email, password):
+                raise HTTPException(status_code=401, detail="Falha no login")
+            
+            # Navega para página com mês/ano
+            if not await controller.navigate_to_apontamentos(request.month, request.year):
+                raise HTTPException(status_code=500, detail="Erro ao navegar para página")
+            
+            # Extrai tarefas
+            tasks = await controller.get_available_tasks()
         
         if not tasks:
             raise HTTPException(status_code=404, detail="Nenhuma tarefa encontrada")
         
-        return {
+        result = {
             "success": True,
             "tasks": tasks,
             "count": len(tasks)
         }
+        if profile:
+            result["profile"] = profile
+        return result
     except HTTPException:
         raise
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao carregar tarefas: {str(e)}")
+
+
+@app.post("/api/tasks/load-bulk")
+async def load_tasks_bulk(request: LoadTasksBulkRequest):
+    """
+    Carrega tarefas de vários meses em uma única chamada.
+    
+    Faz um único login e extrai os meses em paralelo, cada um em sua própria página do
+    contexto logado. Meses com erro são listados em `errors` sem falhar os demais.
+    """
+    if not request.months:
+        raise HTTPException(status_code=400, detail="Informe ao menos um mês")
+    
+    months = list(dict.fromkeys((item.month, item.year) for item in request.months))
+    for month, year in months:
+        if not 1 <= month <= 12:
+            raise HTTPException(status_code=400, detail=f"Mês inválido: {month}")
+    
+    try:
+        email, password = await _load_saved_credentials(request.account_id)
+        
+        session_key = normalize_account_id(request.account_id or email)
+        routed = await _route(session_key, 'tasks-load-bulk', request.model_dump())
+        if routed is not None:
+            return routed
+        run_id = uuid.uuid4().hex
+        async with session_manager.session(session_key) as session, \
+                profile_run(run_id, 'tasks-load-bulk', request.profile) as profile:
+            controller = session.controller
+            await _use_headless(controller, request.headless)
+            
+            if not await controller.login(email, password):
+                raise HTTPException(status_code=401, detail="Falha no login")
+            
+            tasks_by_month, errors = await controller.get_tasks_for_months(
+                months,
+                max_concurrency=int(os.getenv('TASK_LOAD_CONCURRENCY', '3')),
+                timeout=float(os.getenv('TASK_LOAD_TIMEOUT', '90'))
+            )
+        
+        result = {
+            "success": not errors,
+            "tasks_by_month": tasks_by_month,
+            "errors": errors
+        }
+        if profile:
+            result["profile"] = profile
+        return result
+    except HTTPException:
+        raise
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao carregar tarefas: {str(e)}")
 
@@ -184,92 +608,507 @@ async def load_tasks(request: LoadTasksRequest):
 @app.post("/api/automation/execute")
 async def execute_automation(request: ExecuteAutomationRequest):
     """Executa automação de preenchimento."""
-    global playwright_controller, form_filler
-    
     try:
-        # Carrega credenciais
-        credential_manager = CredentialManager()
-        if not credential_manager.has_credentials():
-            raise HTTPException(status_code=400, detail="Credenciais não encontradas")
-        
-        credentials = credential_manager.load_credentials()
-        if not credentials:
-            raise HTTPException(status_code=400, detail="Erro ao carregar credenciais")
+        # Carrega credenciais (I/O e criptografia fora do event loop)
+        email, password = await _load_saved_credentials(request.account_id)
         
-        email, password = credentials
+        # Resolve política de jornada (contrato explícito ou configurado para a conta)
+        try:
+            policy = workday_policies.resolve(account=email, contract=request.contract)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
         
-        # Inicializa Playwright (sempre visível para verificação manual)
-        # Ignora request.headless e sempre mostra o navegador
-        if not playwright_controller:
-            playwright_controller = PlaywrightController(headless=False)
-            await playwright_controller.initialize()
+        session_key = normalize_account_id(request.account_id or email)
+        routed = await _route(session_key, 'execute', request.model_dump())
+        if routed is not None:
+            return routed
         
-        # Login
-        if not await playwright_controller.login(email, password):
-            raise HTTPException(status_code=401, detail="Falha no login")
+        # Cada execução tem sua própria semente: o plano de horários pode ser reconstruído
+        # a partir de (seed, policy, datas) sem guardar cada entrada
+        seed = request.seed if request.seed is not None else new_seed()
         
-        # Inicializa FormFiller
-        form_filler = FormFiller(playwright_controller)
+        run_id = request.run_id or uuid.uuid4().hex
+        if not RUN_ID_PATTERN.match(run_id):
+            raise HTTPException(status_code=400, detail="run_id deve ser um uuid em hexadecimal (32 caracteres)")
+        if run_id in active_runs:
+            raise HTTPException(status_code=409, detail=f"Execução {run_id} já está em andamento")
         
         # Processa cada período
+        started_at = datetime.now().isoformat(timespec='seconds')
+        periods_history = []
         all_results = {
             'success': True,
+            'run_id': run_id,
+            'session': session_key,
+            'seed': seed,
+            'policy': policy.name,
             'filled_dates': [],
             'errors': [],
-            'total_entries': 0
+            'total_entries': 0,
+            'batches': 0,
+            'page_recycles': [],
+            'cancelled': False,
+            'remaining_dates': [],
+            'saved_dates': []
         }
         
-        for period in request.periods:
-            # Converte strings de data para datetime
-            try:
-                de_date = datetime.strptime(period.de, '%d/%m/%Y')
-                ate_date = datetime.strptime(period.ate, '%d/%m/%Y')
-            except:
-                all_results['errors'].append(f"Data inválida: {period.de} - {period.ate}")
-                continue
+        # Cada conta usa sua própria sessão de navegador (e FormFiller), com acesso exclusivo.
+        # A execução pode ser cancelada (POST /api/automation/runs/{run_id}/cancel) inclusive
+        # enquanto aguarda a sessão: a espera termina na hora (RunCancelledError, abaixo)
+        async with _track_run(run_id, session_key, all_results) as cancel_token, \
+                session_manager.session(session_key, cancel_token) as session, \
+                profile_run(run_id, 'execute', request.profile) as profile:
+            await _use_headless(session.controller, request.headless)
             
-            # Executa preenchimento
-            results = await form_filler.fill_date_range(
-                de_date,
-                ate_date,
-                period.task_index,
-                period.desc_morning,
-                period.desc_afternoon
-            )
+            # Login (inicializa o navegador se necessário). Em modo headless, a revisão é
+            # feita pelos endpoints de screenshot/DOM da sessão. Cancelada ao obter a
+            # sessão, a execução nem faz login: cada período volta inteiro em remaining_dates
+            if not cancel_token.cancelled and not await session.controller.login(email, password):
+                raise HTTPException(status_code=401, detail="Falha no login")
             
-            # Agrega resultados
-            if not results['success']:
-                all_results['success'] = False
+            # Confere o plano inteiro contra o saldo das tarefas (e distribui os períodos com
+            # task_keys) antes de preencher qualquer dia
+            periods = request.periods
+            if not cancel_token.cancelled and (request.check_balance
+                                               or any(period.task_keys for period in periods)):
+                balances = await _task_balances(session.controller, periods)
+                index_keys = {position: key for key, position in session.controller.task_rows.items()}
+                try:
+                    # Monta o plano inteiro (CPU): fora do event loop, como em /api/automation/plan
+                    periods, balance = await run_blocking(_balance_plan, periods, seed, policy,
+                                                          balances, index_keys)
+                except BalanceError as e:
+                    raise HTTPException(status_code=409, detail=str(e))
+                all_results['balance'] = balance
+                if request.check_balance and not balance['ok']:
+                    raise HTTPException(status_code=409, detail=describe_overbooking(balance))
             
-            all_results['filled_dates'].extend(results['filled_dates'])
-            all_results['errors'].extend(results['errors'])
-            all_results['total_entries'] += results['total_entries']
+            for period in periods:
+                # Converte strings de data para datetime
+                try:
+                    de_date = datetime.strptime(period.de, '%d/%m/%Y')
+                    ate_date = datetime.strptime(period.ate, '%d/%m/%Y')
+                except:
+                    all_results['errors'].append(f"Data inválida: {period.de} - {period.ate}")
+                    continue
+                
+                # Executa preenchimento
+                results = await session.form_filler.fill_date_range(
+                    de_date,
+                    ate_date,
+                    period.task_index,
+                    period.desc_morning,
+                    period.desc_afternoon,
+                    policy=policy,
+                    seed=seed,
+                    task_key=period.task_key,
+                    batch_days=request.batch_days,
+                    cancel_token=cancel_token,
+                    auto_save=request.auto_save
+                )
+                
+                # Agrega resultados
+                if not results['success']:
+                    all_results['success'] = False
+                
+                all_results['filled_dates'].extend(results['filled_dates'])
+                all_results['errors'].extend(results['errors'])
+                all_results['total_entries'] += results['total_entries']
+                all_results['batches'] += results['batches']
+                all_results['page_recycles'].extend(results['page_recycles'])
+                all_results['remaining_dates'].extend(results['remaining_dates'])
+                all_results['saved_dates'].extend(results['saved_dates'])
+                if results['cancelled']:
+                    all_results['cancelled'] = True
+                # Como no agendador, só dias com salvamento confirmado entram no histórico: no
+                # salvamento manual, o backend não sabe se o usuário salvou
+                saved = set(results['saved_dates'])
+                periods_history.append({**period.model_dump(),
+                                        'entries': [entry for entry in results['entries'] if entry['date'] in saved]})
+        
+        if profile:
+            all_results['profile'] = profile
+        
+        # Grava a execução inteira no histórico em uma única transação
+        recorded = sum(len(period['entries']) for period in periods_history)
+        await _record_history({**all_results, 'started_at': started_at, 'total_entries': recorded},
+                              session_key, periods_history)
         
         return all_results
+    except RunCancelledError as e:
+        # Cancelada enquanto aguardava a sessão: nada foi processado nem vai ao histórico
+        return _cancelled_in_queue(all_results, request.periods, str(e))
     except HTTPException:
         raise
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na automação: {str(e)}")
 
 
+def _cancelled_in_queue(all_results: Dict, periods: List, reason: str) -> Dict:
+    """Resultado de uma execução cancelada na fila: cada período volta inteiro em remaining_dates."""
+    print(f"[API] Execução {all_results['run_id']} cancelada na fila ({reason})")
+    for period in periods:
+        try:
+            de_date = datetime.strptime(period.de, '%d/%m/%Y')
+            ate_date = datetime.strptime(period.ate, '%d/%m/%Y')
+        except ValueError:
+            all_results['errors'].append(f"Data inválida: {period.de} - {period.ate}")
+            continue
+        all_results['remaining_dates'].extend(day.strftime('%d/%m/%Y')
+                                              for day in weekdays_between(de_date, ate_date))
+    all_results['success'] = False
+    all_results['cancelled'] = True
+    return all_results
+
+
+@app.post("/api/automation/import")
+async def import_plan(request: Request, file_format: Optional[str] = Query(None, alias='format'),
+                      dry_run: bool = False, contract: Optional[str] = None,
+                      seed: Optional[int] = None, headless: Optional[bool] = None,
+                      batch_days: Optional[int] = None, run_id: Optional[str] = None,
+                      auto_save: bool = False):
+    """
+    Importa um plano em CSV ou JSONL (corpo da requisição) e preenche os dias.
+    
+    Cada linha é um dia (account, task_key, date, desc_morning, desc_afternoon). O corpo é
+    lido em streaming: cada linha é validada ao chegar e os dias válidos são preenchidos em
+    lotes por conta (IMPORT_CHUNK_DAYS). Linhas inválidas ou não preenchidas aparecem em
+    `row_errors` com o número da linha. Com `dry_run=true`, só valida.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    if not RUN_ID_PATTERN.match(run_id):
+        raise HTTPException(status_code=400, detail="run_id deve ser um uuid em hexadecimal (32 caracteres)")
+    if run_id in active_runs:
+        raise HTTPException(status_code=409, detail=f"Execução {run_id} já está em andamento")
+    if contract:
+        try:
+            workday_policies.resolve(contract=contract)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e.args[0]))
+    
+    importer = PlanImporter(
+        session_manager,
+        load_credentials=_load_saved_credentials,
+        resolve_policy=lambda email, contract: workday_policies.resolve(account=email, contract=contract),
+        history=history_store,
+        owns_session=_owns_session
+    )
+    result: Dict = {}
+    try:
+        async with _track_run(run_id, 'import', result) as cancel_token:
+            return await importer.run(
+                request.stream(),
+                file_format or detect_format(request.headers.get('content-type')),
+                seed=seed if seed is not None else new_seed(),
+                run_id=run_id,
+                contract=contract,
+                dry_run=dry_run,
+                headless=None if dry_run else (default_headless if headless is None else headless),
+                batch_days=batch_days,
+                cancel_token=cancel_token,
+                result=result,
+                auto_save=auto_save
+            )
+    except PlanImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SessionLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na importação: {str(e)}")
+
+
+@app.get("/api/automation/runs")
+async def list_active_runs():
+    """Lista as execuções em andamento em todos os workers (inclusive as que aguardam a sessão)."""
+    runs = []
+    for run in await session_registry.list_runs():
+        local = active_runs.get(run['run_id'])
+        runs.append({
+            'run_id': run['run_id'],
+            'session': run['session'],
+            'worker_id': run['worker_id'],
+            'started_at': local['started_at'] if local else datetime.fromtimestamp(run['started_at']).isoformat(timespec='seconds'),
+            **(local['token'].describe() if local else {}),
+        })
+    return {"runs": runs}
+
+
+@app.post("/api/automation/runs/{run_id}/cancel")
+async def cancel_run(run_id: str, wait: bool = False, timeout: float = 120.0):
+    """
+    Cancela uma execução em andamento.
+    
+    A execução para na próxima fronteira de etapa (antes do próximo dia), salva os dias já
+    preenchidos e libera a sessão, que continua logada. Com `wait=true`, aguarda a
+    parada e retorna o resultado parcial.
+    """
+    run = active_runs.get(run_id)
+    if run is None:
+        owner = None if _routed_job.get() else await session_registry.run_owner(run_id)
+        if owner is not None and owner != session_registry.worker_id:
+            return await _forward(owner, 'cancel', {'run_id': run_id, 'wait': wait, 'timeout': timeout})
+        raise HTTPException(status_code=404, detail="Execução não encontrada ou já concluída")
+    
+    first_request = run['token'].cancel()
+    response = {"success": True, "run_id": run_id, "already_cancelled": not first_request}
+    if wait:
+        try:
+            await asyncio.wait_for(run['done'].wait(), timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Execução ainda não parou; consulte /api/automation/runs")
+        response["result"] = run['result']
+    return response
+
+
+def _hours_plan(periods: List, seed: int, policy) -> List[Dict]:
+    """
+    Gera os horários de cada dia útil dos períodos (síncrono; chame via pool de threads).
+    
+    Raises:
+        ValueError: Se a data de algum período for inválida
+    """
+    plan = []
+    for period in periods:
+        try:
+            de_date = datetime.strptime(period.de, '%d/%m/%Y')
+            ate_date = datetime.strptime(period.ate, '%d/%m/%Y')
+        except ValueError:
+            raise ValueError(f"Data inválida: {period.de} - {period.ate}")
+        
+        dates = weekdays_between(de_date, ate_date)
+        hours = generate_hours_for_dates(dates, seed=seed, policy=policy)
+        task = {'task_key': period.task_key} if period.task_key else {}
+        plan.extend(
+            {'date': day.strftime('%d/%m/%Y'), **task, **daily_hours}
+            for day, daily_hours in zip(dates, hours)
+        )
+    return plan
+
+
+@app.post("/api/automation/plan")
+async def get_hours_plan(request: HoursPlanRequest):
+    """
+    Reconstrói o plano de horários de uma execução a partir de (seed, política, datas).
+    
+    Não abre o navegador: serve para comparar com o que já foi preenchido ou para
+    retomar uma execução interrompida com os mesmos horários.
+    """
+    try:
+        policy = workday_policies.resolve(contract=request.contract)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    
+    # Com saldos (texto da coluna ou horas) ou task_keys, confere e distribui o plano offline
+    periods = request.periods
+    balance = None
+    if request.balances is not None or any(period.task_keys for period in periods):
+        balances = {key: TaskBalance(key, None, None, parse_hours(str(value)))
+                    for key, value in (request.balances or {}).items()}
+        try:
+            periods, balance = await run_blocking(_balance_plan, periods, request.seed, policy,
+                                                  balances, {})
+        except BalanceError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Planos longos (meses/anos) custam dezenas de ms de CPU: geração fora do event loop
+    try:
+        plan = await run_blocking(_hours_plan, periods, request.seed, policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = {"success": True, "seed": request.seed, "policy": policy.name, "plan": plan}
+    if balance is not None:
+        result["balance"] = balance
+    # A conversão para JSON de milhares de dias também é CPU: feita no pool de threads
+    return JSONResponse(await run_blocking(jsonable_encoder, result))
+
+
 @app.get("/api/automation/status")
 async def get_automation_status():
     """Retorna status da automação."""
-    global playwright_controller
+    sessions = session_manager.list_sessions()
     
-    browser_open = False
-    if playwright_controller:
-        try:
-            # Verifica se a página existe e está inicializada
-            browser_open = playwright_controller.page is not None and playwright_controller._initialized
-        except:
-            browser_open = False
+    try:
+        memory = await run_blocking(process_tree_memory)
+    except Exception as e:
+        memory = {'available': False, 'reason': str(e)}
     
     return {
-        "playwright_initialized": playwright_controller is not None,
-        "browser_open": browser_open
+        "playwright_initialized": bool(sessions),
+        "browser_open": any(session['browser_open'] for session in sessions),
+        "sessions": len(sessions),
+        "launch_profile": browser_launch_profile,
+        "shared_browser": shared_browser.describe() if shared_browser is not None else None,
+        "governor": concurrency_governor.snapshot() if concurrency_governor is not None else None,
+        "registry": await session_registry.describe(),
+        "memory": memory,
+        "event_loop_lag": loop_lag_monitor.snapshot()
+    }
+
+
+@app.get("/api/sessions")
+async def list_sessions():
+    """Lista as sessões de navegador ativas e suas idades."""
+    return {
+        "max_sessions": session_manager.max_sessions,
+        "sessions": session_manager.list_sessions()
+    }
+
+
+def _open_session(key: str):
+    """Retorna a sessão com navegador aberto ou 404."""
+    session = session_manager.get(normalize_account_id(key))
+    if session is None or not session.browser_open:
+        raise HTTPException(status_code=404, detail="Sessão sem navegador aberto")
+    return session
+
+
+@app.get("/api/sessions/{key}/screenshot")
+async def get_session_screenshot(key: str, full_page: bool = True):
+    """
+    Captura a página atual da sessão (PNG) para revisão sem janela visível.
+    
+    Não adquire o lock da sessão: pode ser chamado durante uma execução em andamento.
+    """
+    routed = await _route_existing(key, 'screenshot', {'key': key, 'full_page': full_page})
+    if routed is not None:
+        return routed
+    session = _open_session(key)
+    try:
+        image = await session.controller.capture_screenshot(full_page=full_page)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao capturar tela: {str(e)}")
+    return Response(content=image, media_type="image/png")
+
+
+@app.get("/api/sessions/{key}/dom")
+async def get_session_dom(key: str):
+    """Retorna URL, título e HTML atual da página da sessão para revisão."""
+    routed = await _route_existing(key, 'dom', {'key': key})
+    if routed is not None:
+        return routed
+    session = _open_session(key)
+    try:
+        snapshot = await session.controller.capture_dom_snapshot()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao capturar DOM: {str(e)}")
+    return {"success": True, "session": session.key, **snapshot}
+
+
+@app.get("/api/profiles")
+async def get_profiles():
+    """Lista os perfis gravados por execuções com profile=true."""
+    return {"profiles": await run_blocking(list_profiles)}
+
+
+@app.get("/api/profiles/{run_id}")
+async def get_profile(run_id: str):
+    """Baixa o perfil speedscope de uma execução (abra em https://www.speedscope.app)."""
+    path = profile_path(run_id)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(path, media_type="application/json", filename=path.name)
+
+
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """Retorna configuração, próxima execução, dias pendentes e último resultado do agendador."""
+    return await scheduler.status()
+
+
+@app.post("/api/scheduler/run")
+async def run_scheduler_now():
+    """Executa agora o preenchimento incremental (dias pendentes até hoje)."""
+    if not scheduler.config.enabled:
+        raise HTTPException(status_code=400, detail="Agendador não configurado (SCHEDULE_TIME, descrições e SCHEDULE_AUTO_SAVE)")
+    try:
+        return await scheduler.run_once()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+
+@app.get("/api/history/runs")
+async def list_history_runs(account_id: Optional[str] = None, limit: int = 20):
+    """Lista as execuções mais recentes gravadas no histórico local."""
+    account = await _history_account(account_id)
+    runs = await run_blocking(history_store.list_runs, account, limit)
+    return {"success": True, "account": account, "runs": runs}
+
+
+@app.get("/api/history/runs/{run_id}")
+async def get_history_run(run_id: str):
+    """Retorna uma execução com seus períodos e apontamentos."""
+    run = await run_blocking(history_store.get_run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return {"success": True, "run": run}
+
+
+@app.get("/api/history/entries")
+async def list_history_entries(account_id: Optional[str] = None, start: Optional[str] = None,
+                               end: Optional[str] = None, task_index: Optional[int] = None,
+                               task_key: Optional[str] = None):
+    """Lista os apontamentos preenchidos (datas em DD/MM/AAAA ou AAAA-MM-DD)."""
+    account = await _history_account(account_id)
+    try:
+        entries = await run_blocking(history_store.query_entries, account, start, end,
+                                     task_index, task_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data inválida: {e}")
+    return {"success": True, "account": account, "entries": entries, "count": len(entries)}
+
+
+@app.get("/api/history/summary")
+async def get_history_summary(account_id: Optional[str] = None, start: Optional[str] = None,
+                              end: Optional[str] = None):
+    """Soma as horas preenchidas por tarefa e mês, a partir do histórico local."""
+    account = await _history_account(account_id)
+    try:
+        summary = await run_blocking(history_store.hours_by_task_month, account, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data inválida: {e}")
+    return {"success": True, "account": account, "summary": summary}
+
+
+async def _dispatch_job(kind: str, payload: Dict) -> Dict:
+    """
+    Executa localmente uma requisição repassada por outro worker.
+    
+    Returns:
+        {'status_code', 'body'} ou, para respostas binárias, {'status_code', 'media_type',
+        'content_b64'}
+    """
+    handlers = {
+        'tasks-load': lambda: load_tasks(LoadTasksRequest(**payload)),
+        'tasks-load-bulk': lambda: load_tasks_bulk(LoadTasksBulkRequest(**payload)),
+        'execute': lambda: execute_automation(ExecuteAutomationRequest(**payload)),
+        'screenshot': lambda: get_session_screenshot(**payload),
+        'dom': lambda: get_session_dom(**payload),
+        'cancel': lambda: cancel_run(**payload),
     }
+    if kind not in handlers:
+        return {'status_code': 400, 'body': {'detail': f"Job desconhecido: {kind}"}}
+    
+    token = _routed_job.set(True)
+    try:
+        result = await handlers[kind]()
+    except HTTPException as e:
+        return {'status_code': e.status_code, 'body': {'detail': e.detail}}
+    finally:
+        _routed_job.reset(token)
+    
+    if isinstance(result, JSONResponse):
+        return {'status_code': result.status_code, 'body': json.loads(result.body)}
+    if isinstance(result, Response):
+        return {'status_code': result.status_code, 'media_type': result.media_type,
+                'content_b64': base64.b64encode(result.body).decode('ascii')}
+    return {'status_code': 200, 'body': jsonable_encoder(result)}
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Ponto de entrada único: mesmo host/porta/workers de "python -m backend.server"
+    from backend.server import main
+    main()
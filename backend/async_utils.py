@@ -0,0 +1,137 @@
+"""
+Utilitários para manter o event loop do asyncio livre de trabalho bloqueante.
+Inclui um pool de threads limitado para I/O e criptografia e um monitor de
+atraso (lag) do event loop.
+"""
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+# Pool limitado: PBKDF2, leitura/escrita de arquivos e chmod rodam aqui, nunca no loop
+BLOCKING_POOL_SIZE = int(os.getenv('BLOCKING_POOL_SIZE', '4'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Retorna o pool de threads, criando-o na primeira chamada."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE,
+                                       thread_name_prefix='blocking')
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Executa uma função bloqueante no pool de threads sem travar o event loop.
+    
+    Args:
+        func: Função síncrona a executar
+        *args: Argumentos posicionais
+        **kwargs: Argumentos nomeados
+        
+    Returns:
+        Retorno da função
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Encerra o pool de threads (chamado no shutdown da aplicação)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+class LoopLagMonitor:
+    """
+    Mede quanto tempo o event loop ficou bloqueado.
+    
+    Agenda um sleep curto em intervalo fixo e compara o horário em que acordou com o
+    horário esperado: a diferença é o tempo em que o loop não conseguiu rodar nada.
+    """
+    
+    def __init__(self, interval: float = 0.1, warn_threshold_ms: float = 100.0):
+        """
+        Inicializa o monitor.
+        
+        Args:
+            interval: Intervalo entre medições (segundos)
+            warn_threshold_ms: Atraso a partir do qual um aviso é registrado
+        """
+        self.interval = interval
+        self.warn_threshold_ms = warn_threshold_ms
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+    
+    def reset(self):
+        """Zera as estatísticas coletadas."""
+        self.samples = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.over_threshold = 0
+    
+    def start(self):
+        """Inicia o monitoramento no event loop atual."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self):
+        """Para o monitoramento."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        """Laço de medição."""
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - expected) * 1000))
+    
+    def record(self, lag_ms: float):
+        """Registra uma medição de atraso."""
+        self.samples += 1
+        self.last_lag_ms = lag_ms
+        self.total_lag_ms += lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms > self.warn_threshold_ms:
+            self.over_threshold += 1
+            print(f"[LoopLagMonitor] AVISO: event loop bloqueado por {lag_ms:.1f} ms")
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Retorna as estatísticas atuais."""
+        return {
+            'samples': self.samples,
+            'last_lag_ms': round(self.last_lag_ms, 2),
+            'max_lag_ms': round(self.max_lag_ms, 2),
+            'avg_lag_ms': round(self.total_lag_ms / self.samples, 2) if self.samples else 0.0,
+            'over_threshold': self.over_threshold,
+            'warn_threshold_ms': self.warn_threshold_ms,
+        }
+    
+    def assert_below(self, threshold_ms: float):
+        """
+        Falha se o maior atraso medido ultrapassou o limite (para uso em testes).
+        
+        Raises:
+            AssertionError: Se max_lag_ms > threshold_ms
+        """
+        if self.max_lag_ms > threshold_ms:
+            raise AssertionError(
+                f"Event loop bloqueado por {self.max_lag_ms:.1f} ms (limite {threshold_ms:.1f} ms)"
+            )
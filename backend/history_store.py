@@ -0,0 +1,288 @@
+"""
+Histórico local (SQLite) das execuções e dos apontamentos preenchidos.
+Permite consultar o que foi preenchido por conta, data e tarefa sem abrir o navegador.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_HISTORY_FILE = Path(__file__).parent.parent / "history.sqlite3"
+
+# Versão do esquema (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    source TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    seed INTEGER,
+    policy TEXT,
+    success INTEGER NOT NULL,
+    total_entries INTEGER NOT NULL,
+    errors TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_account ON runs(account, started_at);
+
+CREATE TABLE IF NOT EXISTS periods (
+    period_id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    task_key TEXT,  -- Chave estável "proposta|projeto|tarefa", quando informada
+    desc_morning TEXT,
+    desc_afternoon TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_periods_run ON periods(run_id);
+
+CREATE TABLE IF NOT EXISTS entries (
+    entry_id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    period_id INTEGER REFERENCES periods(period_id) ON DELETE SET NULL,
+    account TEXT NOT NULL,
+    entry_date TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    task_key TEXT,
+    shift TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    minutes INTEGER NOT NULL,
+    description TEXT
+);
+-- Um apontamento por (conta, data, tarefa, turno), com a tarefa pela chave e o índice só
+-- quando não há chave: importações e a distribuição por saldo gravam task_index=0 com
+-- chaves diferentes no mesmo dia
+CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_unique
+    ON entries(account, entry_date, COALESCE(task_key, 'indice:' || task_index), shift);
+CREATE INDEX IF NOT EXISTS idx_entries_account_date ON entries(account, entry_date);
+CREATE INDEX IF NOT EXISTS idx_entries_account_task ON entries(account, task_index, entry_date);
+CREATE INDEX IF NOT EXISTS idx_entries_account_task_key ON entries(account, task_key, entry_date);
+"""
+
+# Alvo do upsert de entries (mesma expressão de idx_entries_unique)
+ENTRY_CONFLICT_TARGET = "(account, entry_date, COALESCE(task_key, 'indice:' || task_index), shift)"
+
+
+def _iso_date(value: str) -> str:
+    """Converte DD/MM/AAAA (ou AAAA-MM-DD) para AAAA-MM-DD."""
+    if '/' in value:
+        return datetime.strptime(value, '%d/%m/%Y').strftime('%Y-%m-%d')
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+def _minutes(start: str, end: str) -> int:
+    """Minutos entre dois horários HH:MM."""
+    start_h, start_m = map(int, start.split(':'))
+    end_h, end_m = map(int, end.split(':'))
+    return (end_h * 60 + end_m) - (start_h * 60 + start_m)
+
+
+class HistoryStore:
+    """
+    Armazena execuções, períodos e apontamentos em um arquivo SQLite.
+
+    Todas as operações são síncronas e rápidas (índices por conta, data e tarefa): no
+    backend, chame via pool de threads. Uma única conexão é compartilhada entre threads,
+    serializada por um lock; cada execução é gravada em uma única transação.
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        """
+        Abre (ou cria) o banco de histórico.
+
+        Args:
+            db_file: Caminho do banco (padrão: HISTORY_FILE ou history.sqlite3 na raiz)
+        """
+        self.db_file = Path(db_file or os.getenv('HISTORY_FILE') or DEFAULT_HISTORY_FILE)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Retorna a conexão, criando o banco e o esquema na primeira chamada."""
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------ escrita
+
+    def record_run(self, run: Dict[str, object], account: str, periods: List[Dict[str, object]],
+                   source: str = 'api'):
+        """
+        Grava uma execução, seus períodos e os apontamentos preenchidos em uma única transação.
+
+        Args:
+            run: Resultado da execução ('run_id', 'seed', 'policy', 'success', 'errors',
+                'total_entries' e, opcionalmente, 'started_at')
+            account: Conta (ID normalizado)
+            periods: Lista de {'de', 'ate', 'task_index', 'task_key', 'desc_morning',
+                'desc_afternoon', 'entries'}, com 'entries' no formato do FormFiller
+            source: Origem da execução ('api' ou 'scheduler')
+        """
+        finished_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, account, source, started_at, finished_at, "
+                    "seed, policy, success, total_entries, errors) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run['run_id'], account, source, run.get('started_at') or finished_at, finished_at,
+                     run.get('seed'), run.get('policy'), int(bool(run['success'])),
+                     run['total_entries'], json.dumps(run['errors'], ensure_ascii=False))
+                )
+                for period in periods:
+                    period_id = conn.execute(
+                        "INSERT INTO periods (run_id, start_date, end_date, task_index, task_key, "
+                        "desc_morning, desc_afternoon) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (run['run_id'], _iso_date(period['de']), _iso_date(period['ate']),
+                         period['task_index'], period.get('task_key'), period.get('desc_morning'),
+                         period.get('desc_afternoon'))
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO entries (run_id, period_id, account, entry_date, task_index, task_key, "
+                        "shift, start_time, end_time, minutes, description) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                        f"ON CONFLICT {ENTRY_CONFLICT_TARGET} DO UPDATE SET "
+                        "run_id=excluded.run_id, period_id=excluded.period_id, task_index=excluded.task_index, "
+                        "start_time=excluded.start_time, end_time=excluded.end_time, "
+                        "minutes=excluded.minutes, description=excluded.description",
+                        [
+                            (run['run_id'], period_id, account, _iso_date(entry['date']),
+                             period['task_index'], period.get('task_key'), entry['shift'],
+                             entry['start'], entry['end'],
+                             _minutes(entry['start'], entry['end']), entry.get('description'))
+                            for entry in period.get('entries', [])
+                        ]
+                    )
+
+    # ------------------------------------------------------------------ consultas
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, object]]:
+        """Executa uma consulta e retorna as linhas como dicionários."""
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_runs(self, account: Optional[str] = None, limit: int = 20) -> List[Dict[str, object]]:
+        """
+        Lista as execuções mais recentes.
+
+        Args:
+            account: Filtra por conta (todas se None)
+            limit: Quantidade máxima de execuções
+
+        Returns:
+            Execuções da mais recente para a mais antiga
+        """
+        where, params = ("WHERE account = ?", (account,)) if account else ("", ())
+        runs = self._query(
+            f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ?", params + (limit,)
+        )
+        for run in runs:
+            run['success'] = bool(run['success'])
+            run['errors'] = json.loads(run['errors'])
+        return runs
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, object]]:
+        """
+        Retorna uma execução com seus períodos e apontamentos (None se não existir).
+        """
+        runs = self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if not runs:
+            return None
+        run = runs[0]
+        run['success'] = bool(run['success'])
+        run['errors'] = json.loads(run['errors'])
+        run['periods'] = self._query(
+            "SELECT * FROM periods WHERE run_id = ? ORDER BY period_id", (run_id,)
+        )
+        run['entries'] = self._query(
+            "SELECT entry_date, task_index, task_key, shift, start_time, end_time, minutes, description "
+            "FROM entries WHERE run_id = ? ORDER BY entry_date, shift DESC", (run_id,)
+        )
+        return run
+
+    def query_entries(self, account: str, start: Optional[str] = None, end: Optional[str] = None,
+                      task_index: Optional[int] = None,
+                      task_key: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Lista os apontamentos de uma conta.
+
+        Args:
+            account: Conta (ID normalizado)
+            start: Data inicial (DD/MM/AAAA ou AAAA-MM-DD, inclusive)
+            end: Data final (inclusive)
+            task_index: Filtra por índice da tarefa
+            task_key: Filtra por chave estável da tarefa
+
+        Returns:
+            Apontamentos em ordem de data (manhã antes da tarde)
+        """
+        sql = ("SELECT entry_date, task_index, task_key, shift, start_time, end_time, minutes, "
+               "description, run_id "
+               "FROM entries WHERE account = ?")
+        params: list = [account]
+        if start:
+            sql += " AND entry_date >= ?"
+            params.append(_iso_date(start))
+        if end:
+            sql += " AND entry_date <= ?"
+            params.append(_iso_date(end))
+        if task_index is not None:
+            sql += " AND task_index = ?"
+            params.append(task_index)
+        if task_key is not None:
+            sql += " AND task_key = ?"
+            params.append(task_key)
+        sql += " ORDER BY entry_date, shift DESC"
+        return self._query(sql, tuple(params))
+
+    def hours_by_task_month(self, account: str, start: Optional[str] = None,
+                            end: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Soma as horas preenchidas por tarefa e mês.
+
+        Tarefas com chave estável são agrupadas pela chave (o índice pode mudar entre meses);
+        as demais, pelo índice.
+
+        Returns:
+            Lista de {'month': 'AAAA-MM', 'task_key', 'task_index', 'days', 'minutes', 'hours'}
+        """
+        sql = ("SELECT substr(entry_date, 1, 7) AS month, task_key, MIN(task_index) AS task_index, "
+               "COUNT(DISTINCT entry_date) AS days, SUM(minutes) AS minutes "
+               "FROM entries WHERE account = ?")
+        params: list = [account]
+        if start:
+            sql += " AND entry_date >= ?"
+            params.append(_iso_date(start))
+        if end:
+            sql += " AND entry_date <= ?"
+            params.append(_iso_date(end))
+        sql += (" GROUP BY month, COALESCE(task_key, 'indice:' || task_index) "
+                "ORDER BY month, task_index")
+        rows = self._query(sql, tuple(params))
+        for row in rows:
+            row['hours'] = round(row['minutes'] / 60, 2)
+        return rows
@@ -0,0 +1,524 @@
+"""
+Importação em massa de planos de apontamento (CSV ou JSONL) em streaming.
+Cada linha é um dia: (conta, chave da tarefa, data, descrição da manhã, descrição da tarde).
+O arquivo é lido aos pedaços, cada linha é validada ao chegar e os dias válidos são
+preenchidos em lotes por conta, sem carregar o arquivo inteiro em memória.
+"""
+import codecs
+import csv
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from automation.cancellation import CancellationToken, RunCancelledError
+from automation.playwright_controller import make_task_key
+from backend.async_utils import run_blocking
+from backend.history_store import HistoryStore
+from backend.session_manager import SessionLimitError, SessionManager
+from security.credential_vault import normalize_account_id
+from utils.time_generator import WorkdayPolicy
+
+
+# Colunas do arquivo (CSV com cabeçalho; JSONL com estas chaves)
+IMPORT_FIELDS = ('account', 'task_key', 'date', 'desc_morning', 'desc_afternoon')
+REQUIRED_FIELDS = ('task_key', 'date', 'desc_morning', 'desc_afternoon')
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+# Dias acumulados por conta antes de cada lote de preenchimento
+IMPORT_CHUNK_DAYS = int(os.getenv('IMPORT_CHUNK_DAYS', '20'))
+# Erros por linha listados na resposta (os demais só são contados)
+IMPORT_MAX_ROW_ERRORS = int(os.getenv('IMPORT_MAX_ROW_ERRORS', '1000'))
+# Tamanho máximo de uma linha (protege contra arquivos sem quebra de linha)
+IMPORT_MAX_LINE_BYTES = 64 * 1024
+
+
+class PlanImportError(Exception):
+    """Arquivo ilegível como um todo (formato, cabeçalho ou linha grande demais)."""
+
+
+@dataclass
+class ImportRow:
+    """Um dia válido do arquivo."""
+    line: int
+    account: str  # Conta como informada no arquivo ('' = conta padrão)
+    task_key: str
+    date: datetime
+    desc_morning: str
+    desc_afternoon: str
+
+
+@dataclass
+class AccountState:
+    """Credenciais, política e lote pendente de uma conta do arquivo."""
+    key: str  # ID normalizado (sessão e histórico)
+    email: str
+    password: str
+    policy: WorkdayPolicy
+    pending: List[ImportRow]
+
+
+def detect_format(content_type: Optional[str]) -> str:
+    """Formato pelo Content-Type (JSON/NDJSON -> 'jsonl'; demais -> 'csv')."""
+    content_type = (content_type or '').lower()
+    return 'jsonl' if 'json' in content_type else 'csv'
+
+
+def _parse_date(value: str) -> datetime:
+    """Converte DD/MM/AAAA ou AAAA-MM-DD."""
+    value = value.strip()
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: '{value}' (use DD/MM/AAAA ou AAAA-MM-DD)")
+
+
+def _clean_text(value: object) -> str:
+    """Texto de uma célula em uma única linha (descrições são repassadas por linha)."""
+    return ' '.join(str(value or '').split())
+
+
+def _parse_task_key(value: str) -> str:
+    """Valida e normaliza a chave "proposta|projeto|tarefa" (como make_task_key a monta)."""
+    parts = value.split('|')
+    if len(parts) != 3 or not all(part.strip() for part in parts):
+        raise ValueError(f"Chave de tarefa inválida: '{value}' (use proposta|projeto|tarefa)")
+    return make_task_key(*parts)
+
+
+def parse_row(line: int, record: Dict[str, object]) -> ImportRow:
+    """
+    Valida os campos de uma linha.
+
+    Raises:
+        ValueError: Com a mensagem do erro da linha
+    """
+    values = {field: _clean_text(record.get(field)) for field in IMPORT_FIELDS}
+    missing = [field for field in REQUIRED_FIELDS if not values[field]]
+    if missing:
+        raise ValueError(f"Campos obrigatórios vazios: {', '.join(missing)}")
+    task_key = _parse_task_key(values['task_key'])
+    day = _parse_date(values['date'])
+    if day.weekday() >= 5:
+        raise ValueError(f"{day.strftime('%d/%m/%Y')} é fim de semana")
+    return ImportRow(line, values['account'], task_key, day,
+                     values['desc_morning'], values['desc_afternoon'])
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Quebra um stream de bytes UTF-8 em linhas, sem acumular o corpo inteiro.
+
+    Yields:
+        (número da linha, texto sem a quebra de linha)
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    line_no = 0
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if '\n' not in buffer:
+            if len(buffer) > IMPORT_MAX_LINE_BYTES:
+                raise PlanImportError(f"Linha {line_no + 1} maior que {IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip('\r')
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield line_no + 1, buffer.rstrip('\r')
+
+
+async def iter_records(chunks: AsyncIterator[bytes],
+                       file_format: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Lê os registros do arquivo em streaming.
+
+    CSV exige cabeçalho com as colunas de IMPORT_FIELDS (separador ',' ou ';', detectado
+    no cabeçalho); campos entre aspas podem ter quebras de linha. JSONL tem um objeto por
+    linha. Linhas vazias são ignoradas.
+
+    Yields:
+        (linha, dicionário do registro) ou (linha, mensagem de erro) se a linha for ilegível
+
+    Raises:
+        PlanImportError: Formato desconhecido ou cabeçalho inválido
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise PlanImportError(f"Formato inválido: '{file_format}' (use {', '.join(IMPORT_FORMATS)})")
+
+    header: Optional[List[str]] = None
+    delimiter = ','
+    pending_text = ''  # Registro CSV com aspas abertas continuando na próxima linha
+    pending_line = 0
+
+    async for line_no, text in iter_lines(chunks):
+        if file_format == 'jsonl':
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line_no, f"JSON inválido: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, "Cada linha deve ser um objeto JSON"
+                continue
+            yield line_no, record
+            continue
+
+        if pending_text:
+            pending_text += '\n' + text
+        else:
+            if not text.strip():
+                continue
+            pending_text, pending_line = text, line_no
+        # Aspas em número ímpar: o campo continua na próxima linha
+        if pending_text.count('"') % 2:
+            if len(pending_text) > IMPORT_MAX_LINE_BYTES:
+                raise PlanImportError(f"Registro da linha {pending_line} sem aspas de fechamento")
+            continue
+        text, record_line, pending_text = pending_text, pending_line, ''
+
+        if header is None:
+            delimiter = ';' if text.count(';') > text.count(',') else ','
+            header = [name.strip().lower() for name in next(csv.reader([text], delimiter=delimiter))]
+            missing = [field for field in REQUIRED_FIELDS if field not in header]
+            if missing:
+                raise PlanImportError(f"Cabeçalho sem as colunas: {', '.join(missing)}")
+            continue
+
+        values = next(csv.reader([text], delimiter=delimiter))
+        if len(values) != len(header):
+            yield record_line, f"Esperadas {len(header)} colunas, encontradas {len(values)}"
+            continue
+        yield record_line, dict(zip(header, values))
+
+    if pending_text:
+        yield pending_line, "Registro sem aspas de fechamento"
+
+
+def fill_ranges(rows: List[ImportRow]) -> List[List[ImportRow]]:
+    """
+    Agrupa os dias de uma conta em intervalos preenchíveis por fill_date_range.
+
+    Um intervalo tem a mesma tarefa, o mesmo mês e dias úteis consecutivos (assim as
+    descrições por dia ficam alinhadas com os dias úteis do intervalo).
+    """
+    ranges: List[List[ImportRow]] = []
+    for row in sorted(rows, key=lambda item: (item.task_key, item.date)):
+        current = ranges[-1] if ranges else None
+        if current is not None:
+            previous = current[-1]
+            next_weekday = previous.date + timedelta(days=3 if previous.date.weekday() == 4 else 1)
+            if (row.task_key == previous.task_key and row.date == next_weekday
+                    and row.date.month == previous.date.month):
+                current.append(row)
+                continue
+        ranges.append([row])
+    return ranges
+
+
+class PlanImporter:
+    """
+    Importa um arquivo de plano: valida cada linha e preenche os dias em lotes por conta.
+
+    Memória: só os lotes pendentes (até `chunk_days` dias por conta), o conjunto de
+    (conta, data) já vistos, para rejeitar dias duplicados, e os erros listados.
+    """
+
+    def __init__(self, session_manager: SessionManager,
+                 load_credentials: Callable[[Optional[str]], Awaitable[Tuple[str, str]]],
+                 resolve_policy: Callable[[str, Optional[str]], WorkdayPolicy],
+                 history: Optional[HistoryStore] = None,
+                 owns_session: Optional[Callable[[str], Awaitable[bool]]] = None,
+                 chunk_days: int = IMPORT_CHUNK_DAYS,
+                 max_row_errors: int = IMPORT_MAX_ROW_ERRORS):
+        """
+        Inicializa o importador.
+
+        Args:
+            session_manager: Sessões de navegador por conta
+            load_credentials: Carrega (email, senha) de uma conta do cofre (None = padrão)
+            resolve_policy: Resolve a política de jornada de (email, contrato)
+            history: Histórico onde cada lote preenchido é gravado
+            owns_session: Com vários workers, assume a sessão da conta para este worker
+                (False se ela pertence a outro worker: os dias da conta falham)
+            chunk_days: Dias acumulados por conta antes de cada lote
+            max_row_errors: Erros por linha listados na resposta
+        """
+        self.session_manager = session_manager
+        self._load_credentials = load_credentials
+        self._resolve_policy = resolve_policy
+        self.history = history
+        self._owns_session = owns_session
+        self.chunk_days = max(1, chunk_days)
+        self.max_row_errors = max(0, max_row_errors)
+
+    def _row_error(self, result: Dict[str, object], line: int, error: str,
+                   date: Optional[str] = None, counter: str = 'rejected'):
+        """
+        Registra o erro de uma linha (listado até o limite, sempre contado).
+
+        `counter` é 'rejected' (linha inválida) ou 'failed' (linha válida não preenchida).
+        """
+        result[counter] += 1
+        if len(result['row_errors']) < self.max_row_errors:
+            item = {'line': line, 'error': error}
+            if date:
+                item['date'] = date
+            result['row_errors'].append(item)
+        else:
+            result['row_errors_truncated'] = True
+
+    def _fail_rows(self, result: Dict[str, object], rows: List[ImportRow], reason: str):
+        """Registra linhas válidas que não foram preenchidas (contador 'failed')."""
+        for row in rows:
+            self._row_error(result, row.line, reason, row.date.strftime('%d/%m/%Y'), counter='failed')
+
+    async def _account(self, accounts: Dict[str, AccountState], account: str,
+                       contract: Optional[str]) -> AccountState:
+        """Carrega (uma vez) credenciais e política de uma conta do arquivo."""
+        state = accounts.get(account)
+        if state is None:
+            email, password = await self._load_credentials(account or None)
+            state = AccountState(normalize_account_id(account or email), email, password,
+                                 self._resolve_policy(email, contract), [])
+            accounts[account] = state
+        return state
+
+    async def run(self, chunks: AsyncIterator[bytes], file_format: str, seed: int,
+                  run_id: Optional[str] = None, contract: Optional[str] = None,
+                  dry_run: bool = False, headless: Optional[bool] = None,
+                  batch_days: Optional[int] = None,
+                  cancel_token: Optional[CancellationToken] = None,
+                  result: Optional[Dict[str, object]] = None,
+                  auto_save: bool = False) -> Dict[str, object]:
+        """
+        Lê, valida e preenche o arquivo.
+
+        Args:
+            chunks: Corpo da requisição em pedaços (ex.: request.stream())
+            file_format: 'csv' ou 'jsonl'
+            seed: Semente dos horários (a mesma para todas as contas e lotes)
+            run_id: ID da importação
+            contract: Contrato de jornada (padrão: o configurado para cada conta)
+            dry_run: Só valida, sem abrir navegador
+            headless: Modo do navegador das sessões (None: mantém o atual)
+            batch_days: Dias por salvamento no formulário
+            cancel_token: Para a leitura e o preenchimento na próxima fronteira de etapa
+            result: Dicionário a preencher (permite acompanhar a importação em andamento)
+            auto_save: Clica em salvar e confirma cada lote; só dias salvos vão ao histórico
+
+        Returns:
+            Resumo com contagens por conta, erros por linha e erros de execução
+
+        Raises:
+            PlanImportError: Se o arquivo for ilegível desde o início (nada foi preenchido)
+        """
+        started = time.perf_counter()
+        result = result if result is not None else {}
+        result.update({
+            'success': True,
+            'run_id': run_id or uuid.uuid4().hex,
+            'dry_run': dry_run,
+            'seed': seed,
+            'rows': 0,
+            'accepted': 0,
+            'rejected': 0,
+            'failed': 0,
+            'chunks': 0,
+            'filled_days': 0,
+            'saved_days': 0,
+            'total_entries': 0,
+            'accounts': {},
+            'row_errors': [],
+            'row_errors_truncated': False,
+            'errors': [],
+            'history_run_ids': [],
+            'cancelled': False,
+        })
+        accounts: Dict[str, AccountState] = {}
+        seen: Dict[Tuple[str, str], int] = {}
+
+        def cancelled() -> bool:
+            return cancel_token is not None and cancel_token.cancelled
+
+        async def flush(state: AccountState):
+            rows, state.pending = state.pending, []
+            if not rows or dry_run:
+                return
+            if cancelled():
+                # Dias aceitos que nem chegaram a um lote continuam listados na resposta
+                self._fail_rows(result, rows, "Cancelado antes do preenchimento")
+                return
+            await self._fill_chunk(state, rows, result, seed, headless, batch_days, cancel_token, auto_save)
+
+        try:
+            async for line, record in iter_records(chunks, file_format):
+                if cancelled():
+                    break
+                result['rows'] += 1
+                if isinstance(record, str):
+                    self._row_error(result, line, record)
+                    continue
+                try:
+                    row = parse_row(line, record)
+                    state = await self._account(accounts, row.account, contract)
+                except Exception as e:
+                    self._row_error(result, line, getattr(e, 'detail', None) or str(e))
+                    continue
+
+                date_str = row.date.strftime('%d/%m/%Y')
+                first_line = seen.get((state.key, date_str))
+                if first_line is not None:
+                    self._row_error(result, line, f"Dia repetido (já informado na linha {first_line})", date_str)
+                    continue
+                seen[(state.key, date_str)] = line
+
+                result['accepted'] += 1
+                summary = result['accounts'].setdefault(
+                    state.key, {'rows': 0, 'filled_days': 0, 'total_entries': 0, 'policy': state.policy.name}
+                )
+                summary['rows'] += 1
+                state.pending.append(row)
+                if len(state.pending) >= self.chunk_days:
+                    await flush(state)
+        except PlanImportError as e:
+            if not result['rows']:
+                raise
+            # O arquivo quebrou no meio: o que já foi lido ainda é preenchido
+            result['errors'].append(str(e))
+
+        for state in accounts.values():
+            await flush(state)
+
+        result['cancelled'] = cancelled()
+        result['success'] = not (result['rejected'] or result['failed'] or result['errors']
+                                 or result['cancelled'])
+        result['duration_s'] = round(time.perf_counter() - started, 2)
+        print(f"[PlanImport] {result['accepted']}/{result['rows']} linhas válidas, "
+              f"{result['filled_days']} dias preenchidos em {result['chunks']} lote(s)")
+        return result
+
+    async def _fill_chunk(self, state: AccountState, rows: List[ImportRow], result: Dict[str, object],
+                          seed: int, headless: Optional[bool], batch_days: Optional[int],
+                          cancel_token: Optional[CancellationToken], auto_save: bool = False):
+        """Preenche um lote de uma conta e grava os dias salvos no histórico."""
+        result['chunks'] += 1
+        summary = result['accounts'][state.key]
+        chunk_run = {
+            'run_id': uuid.uuid4().hex,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'seed': seed,
+            'policy': state.policy.name,
+            'success': True,
+            'errors': [],
+            'total_entries': 0,
+        }
+        periods_history = []
+        filled = set()
+        saved = set()
+
+        if self._owns_session is not None and not await self._owns_session(state.key):
+            for row in rows:
+                self._row_error(result, row.line, "Sessão da conta pertence a outro worker",
+                                row.date.strftime('%d/%m/%Y'), counter='failed')
+            result['errors'].append(f"Sessão da conta {state.key} pertence a outro worker")
+            return
+
+        ranges = fill_ranges(rows)
+        try:
+            async with self.session_manager.session(state.key, cancel_token) as session:
+                await self._fill_ranges(session, state, ranges, result, chunk_run, periods_history,
+                                        filled, saved, seed, headless, batch_days, cancel_token,
+                                        auto_save)
+        except (SessionLimitError, RunCancelledError) as e:
+            # Sem sessão (limite de navegadores ou cancelada na fila): nenhum intervalo rodou
+            reason = str(e) if isinstance(e, SessionLimitError) else "Cancelado antes do preenchimento"
+            self._fail_rows(result, rows, reason)
+            if isinstance(e, SessionLimitError):
+                result['errors'].append(f"Conta {state.key}: {e}")
+
+        chunk_run['success'] = not chunk_run['errors'] and len(filled) == len(rows)
+        result['filled_days'] += len(filled)
+        result['saved_days'] += len(saved)
+        result['total_entries'] += chunk_run['total_entries']
+        summary['filled_days'] += len(filled)
+        summary['total_entries'] += chunk_run['total_entries']
+
+        # Como no agendador, só dias com salvamento confirmado entram no histórico
+        chunk_run['total_entries'] = sum(len(period['entries']) for period in periods_history)
+        if self.history is not None and saved:
+            try:
+                await run_blocking(self.history.record_run, chunk_run, state.key, periods_history, 'import')
+                result['history_run_ids'].append(chunk_run['run_id'])
+            except Exception as e:
+                print(f"[PlanImport] AVISO: não foi possível gravar o lote {chunk_run['run_id']}: {e}")
+
+    async def _fill_ranges(self, session, state: AccountState, ranges: List[List[ImportRow]],
+                           result: Dict[str, object], chunk_run: Dict[str, object],
+                           periods_history: List[Dict[str, object]], filled: set, saved: set,
+                           seed: int, headless: Optional[bool], batch_days: Optional[int],
+                           cancel_token: Optional[CancellationToken], auto_save: bool):
+        """
+        Faz login e preenche os intervalos de um lote na sessão já adquirida.
+
+        Um intervalo que falha (exceção no preenchimento) vira erro das suas linhas e os
+        demais continuam; ao cancelar, os intervalos que não rodaram são listados como
+        cancelados.
+        """
+        rows = [row for days in ranges for row in days]
+        if headless is not None:
+            await session.controller.set_headless(headless)
+        if not await session.controller.ensure_logged_in(state.email, state.password):
+            self._fail_rows(result, rows, "Falha no login")
+            result['errors'].append(f"Falha no login da conta {state.key}")
+            return
+
+        for position, days in enumerate(ranges):
+            if cancel_token is not None and cancel_token.cancelled:
+                self._fail_rows(result, [row for pending in ranges[position:] for row in pending],
+                                "Cancelado antes do preenchimento")
+                break
+            try:
+                fill = await session.form_filler.fill_date_range(
+                    days[0].date, days[-1].date, 0,
+                    days[0].desc_morning, days[0].desc_afternoon,
+                    description_morning_by_date='\n'.join(day.desc_morning for day in days),
+                    description_afternoon_by_date='\n'.join(day.desc_afternoon for day in days),
+                    policy=state.policy, seed=seed, task_key=days[0].task_key,
+                    batch_days=batch_days, cancel_token=cancel_token, auto_save=auto_save
+                )
+            except Exception as e:
+                error = (f"Erro no intervalo {days[0].date.strftime('%d/%m/%Y')} - "
+                         f"{days[-1].date.strftime('%d/%m/%Y')}: {e}")
+                chunk_run['errors'].append(error)
+                self._fail_rows(result, days, error)
+                continue
+            filled.update(fill['filled_dates'])
+            saved.update(fill['saved_dates'])
+            chunk_run['errors'].extend(fill['errors'])
+            chunk_run['total_entries'] += fill['total_entries']
+            periods_history.append({
+                'de': days[0].date.strftime('%d/%m/%Y'), 'ate': days[-1].date.strftime('%d/%m/%Y'),
+                'task_index': 0, 'task_key': days[0].task_key,
+                'desc_morning': days[0].desc_morning, 'desc_afternoon': days[0].desc_afternoon,
+                'entries': [entry for entry in fill['entries'] if entry['date'] in fill['saved_dates']]
+            })
+            # Dias do intervalo que não foram preenchidos viram erro da linha de origem
+            reason = '; '.join(fill['errors'][:3]) or ('Cancelado' if fill['cancelled'] else 'Não preenchido')
+            for day in days:
+                date_str = day.date.strftime('%d/%m/%Y')
+                if date_str not in fill['filled_dates']:
+                    self._row_error(result, day.line, reason, date_str, counter='failed')
+            if fill['cancelled']:
+                self._fail_rows(result, [row for pending in ranges[position + 1:] for row in pending],
+                                "Cancelado antes do preenchimento")
+                break
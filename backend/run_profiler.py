@@ -0,0 +1,264 @@
+"""
+Profiling opcional por execução (profile=true nas requisições).
+Roda a execução sob um profiler por amostragem e grava um arquivo speedscope
+(https://www.speedscope.app) por run_id, servido pela API.
+
+Usa o pyinstrument quando instalado (amostra só a task da requisição, em modo async);
+sem ele, um amostrador embutido lê a pilha da thread do event loop em intervalo fixo
+(inclui outras requisições simultâneas) e resume onde o tempo foi gasto.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.async_utils import run_blocking
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PROFILE_DIR = PROJECT_ROOT / "profiles"
+
+# Intervalo de amostragem (ms)
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+
+# run_id aceito nos nomes de arquivo (uuid hex), evita path traversal
+RUN_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def profile_dir() -> Path:
+    """Diretório dos perfis (PROFILE_DIR ou profiles/ na raiz)."""
+    return Path(os.getenv('PROFILE_DIR') or DEFAULT_PROFILE_DIR)
+
+
+def profile_path(run_id: str) -> Optional[Path]:
+    """Caminho do perfil de uma execução (None se o run_id for inválido)."""
+    if not RUN_ID_PATTERN.match(run_id):
+        return None
+    return profile_dir() / f"{run_id}.speedscope.json"
+
+
+def _category(filename: str) -> str:
+    """Classifica o frame mais interno de uma amostra."""
+    if filename.endswith('selectors.py'):
+        return 'espera'  # Event loop parado no select: aguardando rede/navegador
+    if 'playwright' in filename:
+        return 'playwright'  # IPC com o driver do Playwright
+    if filename.startswith(str(PROJECT_ROOT)) and 'site-packages' not in filename:
+        return 'aplicacao'
+    return 'outros'
+
+
+class _StackSampler:
+    """Amostrador embutido: lê a pilha de uma thread em intervalo fixo."""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.frames: List[Dict[str, object]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self.categories: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='run-profiler', daemon=True)
+        self.duration_ms = 0.0
+
+    def _frame_id(self, code) -> int:
+        """Índice do frame na tabela compartilhada do speedscope."""
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self.frames)
+            self._frame_index[key] = index
+            self.frames.append({'name': code.co_name, 'file': code.co_filename,
+                                'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_s):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            innermost = frame.f_code.co_filename
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            weight = (now - last) * 1000
+            last = now
+            self.samples.append(stack)
+            self.weights.append(round(weight, 3))
+            category = _category(innermost)
+            self.categories[category] = self.categories.get(category, 0.0) + weight
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def speedscope(self, name: str) -> Dict[str, object]:
+        """Perfil no formato speedscope ("sampled")."""
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'name': name,
+            'exporter': 'qualiwork-run-profiler',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round(sum(self.weights), 3),
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+        }
+
+    def summary(self) -> Dict[str, object]:
+        """Tempo amostrado por categoria (espera, playwright, aplicação, outros)."""
+        total = sum(self.categories.values()) or 1.0
+        return {
+            'samples': len(self.samples),
+            'time_ms': {key: round(value, 1) for key, value in sorted(self.categories.items())},
+            'percent': {key: round(100 * value / total, 1)
+                        for key, value in sorted(self.categories.items())},
+        }
+
+
+class RunProfiler:
+    """Profiler de uma execução; start/stop devem ser chamados na task da requisição."""
+
+    def __init__(self, run_id: str, name: str, interval_ms: float = PROFILE_INTERVAL_MS):
+        """
+        Args:
+            run_id: ID da execução (nome do arquivo)
+            name: Descrição exibida no speedscope (ex.: "execute")
+            interval_ms: Intervalo de amostragem
+        """
+        self.run_id = run_id
+        self.name = name
+        self.interval_s = max(interval_ms, 0.5) / 1000
+        self.engine = None
+        self._profiler = None
+        self._sampler: Optional[_StackSampler] = None
+        self._started_at = 0.0
+        self.duration_ms = 0.0
+
+    def start(self):
+        """Inicia a amostragem (pyinstrument se instalado, senão o amostrador embutido)."""
+        self._started_at = time.perf_counter()
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            self.engine = 'builtin'
+            self._sampler = _StackSampler(threading.get_ident(), self.interval_s)
+            self._sampler.start()
+            return
+        self.engine = 'pyinstrument'
+        self._profiler = Profiler(interval=self.interval_s, async_mode='enabled')
+        self._profiler.start()
+
+    def stop(self):
+        """Encerra a amostragem."""
+        if self._profiler is not None:
+            self._profiler.stop()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.duration_ms = (time.perf_counter() - self._started_at) * 1000
+
+    def _render(self) -> str:
+        """Serializa o perfil em JSON speedscope."""
+        name = f"{self.name} {self.run_id}"
+        if self._profiler is not None:
+            from pyinstrument.renderers import SpeedscopeRenderer
+            return self._profiler.output(SpeedscopeRenderer())
+        return json.dumps(self._sampler.speedscope(name))
+
+    def _write(self) -> Path:
+        """Grava o perfil (síncrono; chame via pool de threads)."""
+        path = profile_path(self.run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(self._render(), encoding='utf-8')
+        os.replace(tmp, path)
+        return path
+
+    async def save(self) -> Dict[str, object]:
+        """
+        Grava o arquivo speedscope da execução.
+
+        Returns:
+            Dicionário com run_id, engine, duração, URL do arquivo e (amostrador embutido)
+            o resumo por categoria
+        """
+        await run_blocking(self._write)
+        info = {
+            'run_id': self.run_id,
+            'engine': self.engine,
+            'duration_ms': round(self.duration_ms, 1),
+            'url': f"/api/profiles/{self.run_id}",
+        }
+        if self._sampler is not None:
+            info['summary'] = self._sampler.summary()
+        print(f"[RunProfiler] Perfil de {self.name} gravado: {info['url']} ({info['engine']})")
+        return info
+
+
+@asynccontextmanager
+async def profile_run(run_id: str, name: str, enabled: bool) -> AsyncIterator[Dict[str, object]]:
+    """
+    Roda o bloco sob o profiler quando `enabled`.
+
+    Produz um dicionário vazio que, ao sair do bloco, recebe as informações do perfil
+    gravado (continua vazio sem profiling). O perfil é gravado mesmo se o bloco falhar.
+
+    Args:
+        run_id: ID da execução
+        name: Tipo da execução ("execute", "tasks-load", ...)
+        enabled: Se False, não faz nada
+    """
+    info: Dict[str, object] = {}
+    if not enabled:
+        yield info
+        return
+    profiler = RunProfiler(run_id, name)
+    profiler.start()
+    try:
+        yield info
+    finally:
+        profiler.stop()
+        try:
+            info.update(await profiler.save())
+        except Exception as e:
+            print(f"[RunProfiler] AVISO: não foi possível gravar o perfil {run_id}: {e}")
+
+
+def list_profiles() -> List[Dict[str, object]]:
+    """Perfis gravados, do mais recente para o mais antigo."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in directory.glob('*.speedscope.json'):
+        stat = path.stat()
+        profiles.append({
+            'run_id': path.name.split('.', 1)[0],
+            'size_bytes': stat.st_size,
+            'modified_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stat.st_mtime)),
+            'url': f"/api/profiles/{path.name.split('.', 1)[0]}",
+        })
+    return sorted(profiles, key=lambda item: item['modified_at'], reverse=True)
@@ -0,0 +1,388 @@
+"""
+Agendador diário de preenchimento incremental.
+Em um horário configurado, preenche apenas o dia atual (ou os dias úteis pendentes desde
+o último sucesso) reaproveitando a sessão de navegador da conta, já aquecida minutos antes.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from automation.form_filler import weekdays_between
+from backend.async_utils import run_blocking
+from backend.history_store import HistoryStore
+from backend.session_manager import SessionManager
+from security.credential_vault import normalize_account_id
+from utils.time_generator import WorkdayPolicy, new_seed
+
+
+DEFAULT_STATE_FILE = Path(__file__).parent.parent / ".scheduler_state.json"
+
+
+@dataclass(frozen=True)
+class ScheduleConfig:
+    """Configuração do preenchimento diário."""
+    run_at: Optional[Tuple[int, int]] = None  # (hora, minuto); None desativa
+    task_index: int = 0
+    task_key: Optional[str] = None  # Chave estável da tarefa (tem prioridade sobre task_index)
+    desc_morning: str = ''
+    desc_afternoon: str = ''
+    account_id: Optional[str] = None  # Padrão: conta padrão do cofre
+    contract: Optional[str] = None  # Padrão: contrato configurado para a conta
+    catchup_days: int = 10  # Dias para trás considerados pendentes, no máximo
+    warmup_minutes: float = 2.0  # Antecedência do login que aquece a sessão (0 desativa)
+    auto_save: bool = False  # Sem usuário para salvar: o agendador só roda clicando em salvar
+
+    @property
+    def enabled(self) -> bool:
+        """True se há horário, descrições e salvamento automático configurados."""
+        return (self.run_at is not None and bool(self.desc_morning) and bool(self.desc_afternoon)
+                and self.auto_save)
+
+    @classmethod
+    def from_env(cls) -> "ScheduleConfig":
+        """
+        Lê a configuração das variáveis SCHEDULE_*.
+
+        Raises:
+            ValueError: Se SCHEDULE_TIME não estiver no formato HH:MM
+        """
+        run_at = None
+        raw_time = os.getenv('SCHEDULE_TIME', '').strip()
+        if raw_time:
+            try:
+                hour, minute = (int(part) for part in raw_time.split(':'))
+            except ValueError:
+                raise ValueError(f"SCHEDULE_TIME inválido: '{raw_time}' (use HH:MM)")
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(f"SCHEDULE_TIME inválido: '{raw_time}' (use HH:MM)")
+            run_at = (hour, minute)
+
+        return cls(
+            run_at=run_at,
+            task_index=int(os.getenv('SCHEDULE_TASK_INDEX', '0')),
+            task_key=os.getenv('SCHEDULE_TASK_KEY') or None,
+            desc_morning=os.getenv('SCHEDULE_DESC_MORNING', ''),
+            desc_afternoon=os.getenv('SCHEDULE_DESC_AFTERNOON', ''),
+            account_id=os.getenv('SCHEDULE_ACCOUNT') or None,
+            contract=os.getenv('SCHEDULE_CONTRACT') or None,
+            catchup_days=int(os.getenv('SCHEDULE_CATCHUP_DAYS', '10')),
+            warmup_minutes=float(os.getenv('SCHEDULE_WARMUP_MINUTES', '2')),
+            auto_save=os.getenv('SCHEDULE_AUTO_SAVE', '').strip().lower() in ('1', 'true', 'yes'),
+        )
+
+
+def _read_state(state_file: Path) -> Dict[str, str]:
+    """Lê o estado persistido do agendador ({} se não existir)."""
+    try:
+        return json.loads(state_file.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+
+def _write_state(state_file: Path, state: Dict[str, str]):
+    """Grava o estado do agendador de forma atômica."""
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=state_file.name + '.', suffix='.tmp', dir=state_file.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_file)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+class DailyScheduler:
+    """
+    Serviço asyncio que roda o preenchimento incremental uma vez por dia.
+
+    Só os dias úteis entre o último sucesso e hoje (limitados a `catchup_days`) são
+    preenchidos, agrupados por mês. Se não houver nada pendente, o navegador nem é aberto.
+    Como não há usuário para salvar o formulário, o agendador clica em salvar e só conta
+    como preenchidos (último sucesso e histórico) os dias com salvamento confirmado.
+    """
+
+    def __init__(self, config: ScheduleConfig, session_manager: SessionManager,
+                 load_credentials: Callable[[Optional[str]], Awaitable[Tuple[str, str]]],
+                 resolve_policy: Callable[[str, Optional[str]], WorkdayPolicy],
+                 state_file: Optional[Path] = None,
+                 history: Optional[HistoryStore] = None,
+                 owns_session: Optional[Callable[[str], Awaitable[bool]]] = None):
+        """
+        Inicializa o agendador.
+
+        Args:
+            config: Configuração do preenchimento diário
+            session_manager: Sessões de navegador por conta (a sessão da conta é reaproveitada)
+            load_credentials: Carrega (email, senha) de uma conta do cofre
+            resolve_policy: Resolve a política de jornada de (email, contrato)
+            state_file: Arquivo com a data do último sucesso (padrão: SCHEDULER_STATE_FILE)
+            history: Histórico onde cada execução com dias pendentes é gravada
+            owns_session: Com vários workers, assume a sessão da conta para este worker
+                (False se ela já pertence a outro worker vivo)
+        """
+        self.config = config
+        self.session_manager = session_manager
+        self._load_credentials = load_credentials
+        self._resolve_policy = resolve_policy
+        self.history = history
+        self._owns_session = owns_session
+        self.state_file = Path(state_file or os.getenv('SCHEDULER_STATE_FILE') or DEFAULT_STATE_FILE)
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock = asyncio.Lock()
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[Dict[str, object]] = None
+
+    # ------------------------------------------------------------------ estado
+
+    async def last_success(self) -> Optional[date]:
+        """Data do último dia preenchido com sucesso pelo agendador."""
+        state = await run_blocking(_read_state, self.state_file)
+        value = state.get('last_success')
+        return date.fromisoformat(value) if value else None
+
+    async def _save_last_success(self, day: date):
+        """Persiste a data do último dia preenchido com sucesso."""
+        await run_blocking(_write_state, self.state_file, {'last_success': day.isoformat()})
+
+    def pending_dates(self, today: date, last_success: Optional[date]) -> List[datetime]:
+        """
+        Dias úteis ainda não preenchidos até hoje (inclusive).
+
+        Args:
+            today: Data de referência
+            last_success: Último dia preenchido (None: apenas hoje)
+
+        Returns:
+            Datas em ordem crescente
+        """
+        start = today
+        if last_success is not None:
+            start = max(last_success + timedelta(days=1),
+                        today - timedelta(days=self.config.catchup_days))
+        return weekdays_between(datetime.combine(start, datetime.min.time()),
+                                datetime.combine(today, datetime.min.time()))
+
+    # ------------------------------------------------------------------ execução
+
+    async def warm_up(self):
+        """Abre o navegador e faz login na sessão da conta antes do horário agendado."""
+        email, password = await self._load_credentials(self.config.account_id)
+        key = normalize_account_id(self.config.account_id or email)
+        if self._owns_session is not None and not await self._owns_session(key):
+            print(f"[Scheduler] AVISO: sessão '{key}' pertence a outro worker; aquecimento ignorado")
+            return
+        async with self.session_manager.session(key) as session:
+            if await session.controller.ensure_logged_in(email, password):
+                print(f"[Scheduler] Sessão '{key}' aquecida")
+            else:
+                print(f"[Scheduler] AVISO: falha no login ao aquecer a sessão '{key}'")
+
+    async def run_once(self, today: Optional[date] = None) -> Dict[str, object]:
+        """
+        Preenche os dias pendentes até hoje.
+
+        Args:
+            today: Data de referência (padrão: hoje)
+
+        Returns:
+            Resultado da execução (também disponível em `last_run`)
+
+        Raises:
+            RuntimeError: Se outra execução do agendador estiver em andamento
+        """
+        if self._run_lock.locked():
+            raise RuntimeError("Execução do agendador já em andamento")
+
+        async with self._run_lock:
+            started = time.perf_counter()
+            today = today or date.today()
+            result = {
+                'run_id': uuid.uuid4().hex,
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'success': True,
+                'pending_dates': [],
+                'filled_dates': [],
+                'errors': [],
+                'total_entries': 0,
+                'seed': None,
+            }
+            try:
+                await self._fill_pending(today, result)
+            except Exception as e:
+                result['success'] = False
+                result['errors'].append(str(e))
+            result['duration_s'] = round(time.perf_counter() - started, 2)
+            self.last_run = result
+            print(f"[Scheduler] Execução concluída em {result['duration_s']}s: "
+                  f"{len(result['filled_dates'])}/{len(result['pending_dates'])} dias preenchidos")
+            return result
+
+    async def _fill_pending(self, today: date, result: Dict[str, object]):
+        """
+        Preenche e salva os dias pendentes (um período por mês) e atualiza o último sucesso.
+
+        Raises:
+            RuntimeError: Sem SCHEDULE_AUTO_SAVE (os dias ficariam no formulário sem salvar),
+                falha no login ou sessão pertencente a outro worker
+        """
+        if not self.config.auto_save:
+            raise RuntimeError("SCHEDULE_AUTO_SAVE não ativado: o agendador não preenche sem salvar")
+        last_success = await self.last_success()
+        pending = self.pending_dates(today, last_success)
+        result['pending_dates'] = [day.strftime('%d/%m/%Y') for day in pending]
+        if not pending:
+            return
+
+        email, password = await self._load_credentials(self.config.account_id)
+        policy = self._resolve_policy(email, self.config.contract)
+        seed = new_seed()
+        result['seed'] = seed
+        result['policy'] = policy.name
+        periods_history = []
+
+        # Agrupa por mês: o formulário é aberto uma vez por mês/ano
+        months: Dict[Tuple[int, int], List[datetime]] = {}
+        for day in pending:
+            months.setdefault((day.year, day.month), []).append(day)
+
+        key = normalize_account_id(self.config.account_id or email)
+        if self._owns_session is not None and not await self._owns_session(key):
+            raise RuntimeError(f"Sessão '{key}' pertence a outro worker")
+        async with self.session_manager.session(key) as session:
+            if not await session.controller.ensure_logged_in(email, password):
+                raise RuntimeError("Falha no login")
+
+            for days in months.values():
+                fill = await session.form_filler.fill_date_range(
+                    days[0], days[-1], self.config.task_index,
+                    self.config.desc_morning, self.config.desc_afternoon,
+                    policy=policy, seed=seed, task_key=self.config.task_key, auto_save=True
+                )
+                if not fill['filled_dates'] and fill['errors']:
+                    # A sessão aquecida pode ter expirado no servidor: refaz o login uma vez
+                    print("[Scheduler] Nenhum dia preenchido; refazendo login e tentando novamente")
+                    if await session.controller.login(email, password):
+                        fill = await session.form_filler.fill_date_range(
+                            days[0], days[-1], self.config.task_index,
+                            self.config.desc_morning, self.config.desc_afternoon,
+                            policy=policy, seed=seed, task_key=self.config.task_key,
+                            auto_save=True
+                        )
+
+                # Só dias salvos contam: os demais voltam a ficar pendentes na próxima execução
+                result['filled_dates'].extend(fill['saved_dates'])
+                result['errors'].extend(fill['errors'])
+                result['total_entries'] += fill['total_entries']
+                periods_history.append({
+                    'de': days[0].strftime('%d/%m/%Y'), 'ate': days[-1].strftime('%d/%m/%Y'),
+                    'task_index': self.config.task_index, 'task_key': self.config.task_key,
+                    'desc_morning': self.config.desc_morning,
+                    'desc_afternoon': self.config.desc_afternoon,
+                    'entries': [entry for entry in fill['entries'] if entry['date'] in fill['saved_dates']]
+                })
+                if not fill['success']:
+                    result['success'] = False
+                    break
+
+        # Avança o último sucesso até o último dia de uma sequência sem falhas
+        filled = set(result['filled_dates'])
+        new_last_success = None
+        for day in pending:
+            if day.strftime('%d/%m/%Y') not in filled:
+                result['success'] = False
+                break
+            new_last_success = day.date()
+        if new_last_success is not None:
+            await self._save_last_success(new_last_success)
+
+        if self.history is not None:
+            try:
+                await run_blocking(self.history.record_run, result, key, periods_history, 'scheduler')
+            except Exception as e:
+                print(f"[Scheduler] AVISO: não foi possível gravar a execução no histórico: {e}")
+
+    # ------------------------------------------------------------------ agenda
+
+    def _next_run_after(self, now: datetime) -> datetime:
+        """Próximo horário agendado após `now`."""
+        hour, minute = self.config.run_at
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        return candidate
+
+    @staticmethod
+    async def _sleep_until(moment: datetime):
+        """Dorme até um horário local (em passos curtos, tolerando ajustes do relógio)."""
+        while True:
+            remaining = (moment - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 60.0))
+
+    async def _loop(self):
+        """Laço do agendador: aquece a sessão e executa no horário configurado."""
+        while True:
+            self.next_run = self._next_run_after(datetime.now())
+            print(f"[Scheduler] Próxima execução: {self.next_run:%d/%m/%Y %H:%M}")
+
+            if self.config.warmup_minutes > 0:
+                await self._sleep_until(self.next_run - timedelta(minutes=self.config.warmup_minutes))
+                try:
+                    if self.pending_dates(self.next_run.date(), await self.last_success()):
+                        await self.warm_up()
+                except Exception as e:
+                    print(f"[Scheduler] AVISO: falha ao aquecer a sessão: {e}")
+
+            await self._sleep_until(self.next_run)
+            try:
+                await self.run_once(self.next_run.date())
+            except RuntimeError as e:
+                print(f"[Scheduler] {e}")
+
+    def start(self):
+        """Inicia o agendador (sem efeito se não estiver configurado)."""
+        if not self.config.enabled:
+            if self.config.run_at is not None and not (self.config.desc_morning and self.config.desc_afternoon):
+                print("[Scheduler] AVISO: SCHEDULE_DESC_MORNING/SCHEDULE_DESC_AFTERNOON "
+                      "não configurados; agendador desativado")
+            elif self.config.run_at is not None:
+                print("[Scheduler] AVISO: SCHEDULE_AUTO_SAVE não ativado; agendador desativado "
+                      "(sem ele os dias seriam preenchidos sem salvar)")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        """Para o agendador."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def status(self) -> Dict[str, object]:
+        """Resumo do agendador para a API."""
+        last_success = await self.last_success()
+        run_at = self.config.run_at
+        return {
+            'enabled': self.config.enabled,
+            'auto_save': self.config.auto_save,
+            'running': self._run_lock.locked(),
+            'run_at': f"{run_at[0]:02d}:{run_at[1]:02d}" if run_at else None,
+            'next_run': self.next_run.isoformat(timespec='minutes') if self.next_run and self._task else None,
+            'last_success': last_success.isoformat() if last_success else None,
+            'pending_dates': [day.strftime('%d/%m/%Y')
+                              for day in self.pending_dates(date.today(), last_success)],
+            'last_run': self.last_run,
+        }
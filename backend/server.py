@@ -1,42 +1,45 @@
 """
 Servidor FastAPI para automação de apontamentos.
+
+Execute a partir da raiz do projeto:
+    python -m backend.server
 """
-import sys
 import os
+import sys
 from pathlib import Path
-import uvicorn
 
-# Adiciona diretório raiz ao path para garantir que os imports funcionem
-# Obtém o diretório raiz do projeto (pai do diretório backend)
-root_dir = Path(__file__).parent.parent.resolve()
-root_dir_str = str(root_dir)
+if __package__ in (None, ''):
+    # Executado como script (python backend/server.py): só então a raiz do projeto
+    # precisa entrar no path para o uvicorn importar "backend.api"
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-# Adiciona ao PYTHONPATH se ainda não estiver
-if root_dir_str not in sys.path:
-    sys.path.insert(0, root_dir_str)
 
-# Também adiciona ao PYTHONPATH do ambiente
-os.environ['PYTHONPATH'] = root_dir_str + os.pathsep + os.environ.get('PYTHONPATH', '')
+def main():
+    """
+    Inicia o servidor (host/porta configuráveis por BACKEND_HOST/BACKEND_PORT).
 
-# Importa o app diretamente
-try:
-    from backend.api import app
-except ImportError as e:
-    print(f"ERRO ao importar backend.api: {e}")
-    print(f"Diretorio raiz: {root_dir_str}")
-    print(f"PYTHONPATH: {sys.path}")
-    raise
+    Com BACKEND_WORKERS > 1, sobe vários processos coordenados pelo registro de sessões
+    (backend/session_registry.py); o reload fica desligado, pois o uvicorn não combina os dois.
+    """
+    import platform
+    import uvicorn
+
+    workers = max(1, int(os.getenv('BACKEND_WORKERS', '1')))
 
-if __name__ == "__main__":
     # No Windows, usar reload pode causar problemas com multiprocessing
-    # Usar reload=False ou usar reload com reload_includes
-    import platform
-    use_reload = platform.system() != "Windows"
-    
+    use_reload = (workers == 1 and platform.system() != "Windows"
+                  and os.getenv('BACKEND_RELOAD', '1') == '1')
+
+    # O app é passado como string: o reload exige isso e a API só é importada pelo uvicorn
     uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
+        "backend.api:app",
+        host=os.getenv('BACKEND_HOST', '0.0.0.0'),
+        port=int(os.getenv('BACKEND_PORT', '8000')),
         reload=use_reload,
+        workers=workers,
         log_level="info"
     )
+
+
+if __name__ == "__main__":
+    main()
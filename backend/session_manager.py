@@ -0,0 +1,247 @@
+"""
+Gerenciador de sessões de navegador por cliente/conta.
+Cada sessão tem seu próprio PlaywrightController protegido por um asyncio.Lock,
+com limite de navegadores ativos, despejo LRU da sessão menos usada e fechamento
+de navegadores ociosos.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from automation.cancellation import CancellationToken, RunCancelledError, acquire_unless_cancelled
+from automation.form_filler import FormFiller
+from automation.playwright_controller import PlaywrightController
+
+
+class SessionLimitError(Exception):
+    """Todas as sessões estão ocupadas e o limite de navegadores foi atingido."""
+
+
+@dataclass
+class BrowserSession:
+    """Sessão de navegador de um cliente/conta."""
+    key: str
+    controller: PlaywrightController
+    form_filler: FormFiller
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    reaped: int = 0  # Quantas vezes o navegador foi fechado por inatividade
+    users: int = 0  # Requisições usando a sessão ou aguardando seu lock
+
+    @property
+    def busy(self) -> bool:
+        """True se alguma requisição está usando a sessão ou aguardando por ela."""
+        return self.users > 0 or self.lock.locked()
+
+    @property
+    def browser_open(self) -> bool:
+        """True se o navegador da sessão está inicializado."""
+        return self.controller.page is not None and self.controller._initialized
+
+    def describe(self) -> Dict[str, object]:
+        """Resumo da sessão para introspecção."""
+        return {
+            'key': self.key,
+            'age_seconds': round(time.time() - self.created_at, 1),
+            'idle_seconds': round(time.monotonic() - self.last_used, 1),
+            'busy': self.busy,
+            'browser_open': self.browser_open,
+            'headless': self.controller.headless,
+            'reaped': self.reaped,
+        }
+
+
+class SessionManager:
+    """
+    Mapeia cada cliente/conta para sua própria sessão de navegador.
+
+    Requisições da mesma sessão são serializadas pelo lock da sessão; sessões diferentes
+    rodam em paralelo. Ao atingir o limite de navegadores, a sessão ociosa usada há mais
+    tempo é fechada para dar lugar à nova.
+    """
+
+    def __init__(self, max_sessions: int = 2,
+                 controller_factory: Optional[Callable[[], PlaywrightController]] = None,
+                 on_evict: Optional[Callable[[str], Awaitable[None]]] = None):
+        """
+        Inicializa o gerenciador.
+
+        Args:
+            max_sessions: Máximo de navegadores ativos ao mesmo tempo
+            controller_factory: Cria o controller de uma nova sessão
+            on_evict: Aguardado com a chave de uma sessão despejada, depois de fechá-la
+                (ex.: liberar a sessão no registro compartilhado entre workers)
+        """
+        self.max_sessions = max(1, max_sessions)
+        self._controller_factory = controller_factory or (lambda: PlaywrightController(headless=False))
+        self._on_evict = on_evict
+        self._sessions: "OrderedDict[str, BrowserSession]" = OrderedDict()
+        self._registry_lock = asyncio.Lock()
+        self._reaper_task: Optional[asyncio.Task] = None
+        self.idle_timeout = 0.0
+
+    async def _get_or_create(self, key: str) -> BrowserSession:
+        """
+        Retorna a sessão da chave, criando-a (e despejando outra se preciso).
+
+        A sessão já sai marcada como em uso (`users`), ainda com o registro travado: entre
+        este retorno e o lock da sessão, o despejo LRU não pode fechá-la. O chamador deve
+        decrementar `users` ao terminar.
+        """
+        evicted = None
+        async with self._registry_lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                session.users += 1
+                return session
+
+            if len(self._sessions) >= self.max_sessions:
+                evicted = self._pop_lru()
+
+            controller = self._controller_factory()
+            session = BrowserSession(key=key, controller=controller,
+                                     form_filler=FormFiller(controller))
+            session.users += 1
+            self._sessions[key] = session
+
+        # Fechar o Chromium é lento: fora do lock, só esta requisição espera por ele
+        if evicted is not None:
+            await self._close_evicted(evicted)
+        return session
+
+    def _pop_lru(self) -> BrowserSession:
+        """Retira do registro a sessão ociosa usada há mais tempo (chamado com o registro travado)."""
+        for key, session in self._sessions.items():
+            if not session.busy:
+                del self._sessions[key]
+                print(f"[SessionManager] Sessão '{key}' despejada (LRU)")
+                return session
+        raise SessionLimitError(
+            f"Limite de {self.max_sessions} navegadores atingido e todas as sessões estão ocupadas"
+        )
+
+    async def _close_evicted(self, session: BrowserSession):
+        """Fecha o navegador de uma sessão despejada e a libera (on_evict)."""
+        try:
+            await session.controller.close()
+        except Exception as e:
+            print(f"[SessionManager] Erro ao fechar a sessão despejada '{session.key}': {e}")
+        # Se a chave voltou a ser usada enquanto fechava, a sessão nova continua deste worker
+        if self._on_evict is not None and session.key not in self._sessions:
+            try:
+                await self._on_evict(session.key)
+            except Exception as e:
+                print(f"[SessionManager] Erro ao liberar a sessão despejada '{session.key}': {e}")
+
+    @asynccontextmanager
+    async def session(self, key: str,
+                      cancel_token: Optional[CancellationToken] = None) -> AsyncIterator[BrowserSession]:
+        """
+        Usa a sessão de uma chave com exclusividade.
+
+        Args:
+            key: Cliente/conta dono da sessão
+            cancel_token: Token da execução; cancelado na fila, desiste de esperar a sessão
+
+        Yields:
+            BrowserSession com o lock adquirido
+
+        Raises:
+            RunCancelledError: Se a execução foi cancelada antes de obter a sessão
+        """
+        if cancel_token is not None and cancel_token.cancelled:
+            raise RunCancelledError(cancel_token.reason)
+        session = await self._get_or_create(key)
+        try:
+            if not await acquire_unless_cancelled(session.lock, cancel_token):
+                raise RunCancelledError(cancel_token.reason)
+            try:
+                session.last_used = time.monotonic()
+                yield session
+            finally:
+                session.last_used = time.monotonic()
+                session.lock.release()
+        finally:
+            session.users -= 1
+
+    def start_reaper(self, idle_timeout: float, interval: Optional[float] = None):
+        """
+        Inicia a tarefa que fecha navegadores ociosos.
+
+        A sessão continua registrada: o navegador é relançado sob demanda no próximo
+        login da sessão.
+
+        Args:
+            idle_timeout: Segundos sem uso até o navegador ser fechado (0 desativa)
+            interval: Intervalo entre verificações (padrão: metade do timeout, até 60s)
+        """
+        if idle_timeout <= 0 or (self._reaper_task and not self._reaper_task.done()):
+            return
+        self.idle_timeout = idle_timeout
+        interval = interval or min(60.0, idle_timeout / 2)
+        self._reaper_task = asyncio.get_running_loop().create_task(self._reap_loop(interval))
+
+    async def stop_reaper(self):
+        """Para a tarefa de limpeza de navegadores ociosos."""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+            self._reaper_task = None
+
+    async def _reap_loop(self, interval: float):
+        """Laço da tarefa de limpeza."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                print(f"[SessionManager] Erro ao fechar navegadores ociosos: {e}")
+
+    async def reap_idle(self) -> int:
+        """
+        Fecha os navegadores das sessões ociosas há mais de idle_timeout.
+
+        Returns:
+            Quantidade de navegadores fechados
+        """
+        now = time.monotonic()
+        closed = 0
+        for session in list(self._sessions.values()):
+            if session.busy or not session.browser_open:
+                continue
+            if now - session.last_used < self.idle_timeout:
+                continue
+            async with session.lock:
+                # Revalida após adquirir o lock (a sessão pode ter sido usada nesse meio tempo)
+                if time.monotonic() - session.last_used < self.idle_timeout:
+                    continue
+                await session.controller.close()
+                session.reaped += 1
+                closed += 1
+                print(f"[SessionManager] Navegador da sessão '{session.key}' fechado por inatividade")
+        return closed
+
+    def get(self, key: str) -> Optional[BrowserSession]:
+        """Retorna a sessão de uma chave, se existir (sem adquirir o lock)."""
+        return self._sessions.get(key)
+
+    def list_sessions(self) -> List[Dict[str, object]]:
+        """Lista as sessões ativas, da menos para a mais recentemente usada."""
+        return [session.describe() for session in self._sessions.values()]
+
+    async def close_all(self):
+        """Fecha todos os navegadores (shutdown da aplicação)."""
+        await self.stop_reaper()
+        async with self._registry_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            await session.controller.close()
@@ -0,0 +1,570 @@
+"""
+Registro de sessões e execuções compartilhado entre workers do backend.
+
+Cada navegador vive em um único worker (processo). O registro diz qual worker é dono de
+cada sessão (conta) e de cada execução; uma requisição que chega a outro worker é
+repassada ao dono por uma fila de jobs no próprio registro e a resposta volta pelo mesmo
+caminho. Há dois backends:
+
+- MemorySessionRegistry: um único worker (padrão); tudo local, nada é repassado.
+- SqliteSessionRegistry: vários workers na mesma máquina, coordenados por um arquivo
+  SQLite (WAL) com heartbeat de cada worker; sessões de um worker que parou de responder
+  podem ser assumidas por outro.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.async_utils import run_blocking
+
+
+DEFAULT_REGISTRY_FILE = Path(__file__).parent.parent / ".sessions.sqlite3"
+
+# Um worker sem heartbeat há mais que isso é considerado morto
+WORKER_TTL_SECONDS = float(os.getenv('WORKER_TTL_SECONDS', '15'))
+HEARTBEAT_SECONDS = WORKER_TTL_SECONDS / 3
+# Intervalo de consulta da fila de jobs (dono) e do resultado (quem repassou)
+JOB_POLL_SECONDS = 0.2
+
+JobHandler = Callable[[str, Dict[str, object]], Awaitable[Dict[str, object]]]
+LeaseLostHandler = Callable[[], Awaitable[None]]
+
+
+class WorkerUnavailableError(Exception):
+    """O worker dono da sessão parou de responder antes de concluir o job."""
+
+
+class SessionRegistry(ABC):
+    """
+    Interface do registro de sessões, execuções e jobs repassados entre workers.
+
+    Todas as operações são assíncronas; `worker_id` identifica o processo atual.
+    """
+
+    worker_id: str
+
+    @abstractmethod
+    async def start(self, handle_job: JobHandler):
+        """
+        Registra o worker e passa a atender jobs repassados por outros workers.
+
+        Args:
+            handle_job: Executa um job localmente: (tipo, payload) -> resposta serializável
+        """
+
+    @abstractmethod
+    async def stop(self):
+        """Libera as sessões, execuções e lideranças do worker e remove seu registro."""
+
+    @abstractmethod
+    async def claim_session(self, key: str) -> str:
+        """
+        Retorna o dono da sessão, assumindo-a para este worker se estiver livre ou se o
+        dono estiver morto.
+        """
+
+    @abstractmethod
+    async def session_owner(self, key: str) -> Optional[str]:
+        """Dono vivo da sessão (None se ninguém a possui)."""
+
+    @abstractmethod
+    async def release_session(self, key: str):
+        """Libera a sessão deste worker (ex.: despejada pelo LRU); outro worker pode assumi-la."""
+
+    @abstractmethod
+    async def register_run(self, run_id: str, session_key: str):
+        """Registra uma execução em andamento neste worker."""
+
+    @abstractmethod
+    async def finish_run(self, run_id: str):
+        """Remove uma execução concluída."""
+
+    @abstractmethod
+    async def run_owner(self, run_id: str) -> Optional[str]:
+        """Worker que roda a execução (None se não está em andamento)."""
+
+    @abstractmethod
+    async def list_runs(self) -> List[Dict[str, object]]:
+        """Execuções em andamento em todos os workers."""
+
+    @abstractmethod
+    async def submit(self, worker_id: str, kind: str, payload: Dict[str, object]) -> Dict[str, object]:
+        """
+        Executa um job no worker indicado e aguarda a resposta.
+
+        Raises:
+            WorkerUnavailableError: Se o worker morrer antes de responder
+        """
+
+    @abstractmethod
+    def lead(self, name: str, on_acquired: Callable[[], None],
+             on_lost: Optional[LeaseLostHandler] = None):
+        """
+        Disputa a liderança `name` (ex.: agendador): só um worker a mantém por vez.
+
+        Args:
+            name: Nome da liderança
+            on_acquired: Chamado quando este worker a obtém (pode ser de novo após perdê-la)
+            on_lost: Aguardado quando este worker deixa de mantê-la (outro worker a assumiu
+                ou o heartbeat deixou de ser gravado); deve parar o que on_acquired iniciou
+        """
+
+    @abstractmethod
+    async def describe(self) -> Dict[str, object]:
+        """Workers, sessões e lideranças para a API."""
+
+
+class MemorySessionRegistry(SessionRegistry):
+    """Registro de um único worker: todas as sessões e execuções são locais."""
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._runs: Dict[str, Dict[str, object]] = {}
+
+    async def start(self, handle_job: JobHandler):
+        pass
+
+    async def stop(self):
+        self._runs.clear()
+
+    async def claim_session(self, key: str) -> str:
+        return self.worker_id
+
+    async def session_owner(self, key: str) -> Optional[str]:
+        return self.worker_id
+
+    async def release_session(self, key: str):
+        pass
+
+    async def register_run(self, run_id: str, session_key: str):
+        self._runs[run_id] = {'run_id': run_id, 'session': session_key, 'worker_id': self.worker_id,
+                              'started_at': time.time()}
+
+    async def finish_run(self, run_id: str):
+        self._runs.pop(run_id, None)
+
+    async def run_owner(self, run_id: str) -> Optional[str]:
+        return self.worker_id if run_id in self._runs else None
+
+    async def list_runs(self) -> List[Dict[str, object]]:
+        return list(self._runs.values())
+
+    async def submit(self, worker_id: str, kind: str, payload: Dict[str, object]) -> Dict[str, object]:
+        raise WorkerUnavailableError(f"Worker desconhecido: {worker_id}")
+
+    def lead(self, name: str, on_acquired: Callable[[], None],
+             on_lost: Optional[LeaseLostHandler] = None):
+        # Único worker: a liderança nunca é perdida
+        on_acquired()
+
+    async def describe(self) -> Dict[str, object]:
+        return {'backend': 'memory', 'worker_id': self.worker_id}
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    session_key TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,  -- pending, running, done
+    response TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_worker ON jobs(worker_id, status);
+"""
+
+
+class SqliteSessionRegistry(SessionRegistry):
+    """
+    Registro compartilhado por vários workers em um arquivo SQLite.
+
+    As operações são curtas e rodam no pool de threads; disputas (duas requisições da
+    mesma conta chegando a workers diferentes) são resolvidas por transações IMMEDIATE.
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        """
+        Args:
+            db_file: Arquivo do registro (padrão: SESSION_REGISTRY_FILE ou .sessions.sqlite3)
+        """
+        self.db_file = Path(db_file or os.getenv('SESSION_REGISTRY_FILE') or DEFAULT_REGISTRY_FILE)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._handle_job: Optional[JobHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._job_tasks: set = set()
+        self._lead_tasks: set = set()
+        self._leads: Dict[str, Tuple[Callable[[], None], Optional[LeaseLostHandler]]] = {}
+        self._led: set = set()
+        self._heartbeat_at = time.time()  # Último heartbeat gravado com sucesso
+
+    # ------------------------------------------------------------------ conexão
+
+    def _connection(self) -> sqlite3.Connection:
+        """Retorna a conexão, criando o esquema na primeira chamada."""
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=10,
+                                   isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _run(self, func: Callable[[sqlite3.Connection], object]) -> object:
+        """Executa `func` em uma transação IMMEDIATE (síncrono; chame via pool de threads)."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = func(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return value
+
+    async def _call(self, func: Callable[[sqlite3.Connection], object]) -> object:
+        """Executa `func` no pool de threads."""
+        return await run_blocking(self._run, func)
+
+    def _read(self, func: Callable[[sqlite3.Connection], object]) -> object:
+        """
+        Executa uma leitura fora de transação IMMEDIATE (síncrono; chame via pool de threads).
+
+        No WAL, leitores não disputam o lock de escrita com os outros workers; consultas
+        frequentes (fila de jobs, resposta aguardada) usam este caminho.
+        """
+        with self._lock:
+            return func(self._connection())
+
+    async def _query(self, func: Callable[[sqlite3.Connection], object]) -> object:
+        """Executa a leitura `func` no pool de threads."""
+        return await run_blocking(self._read, func)
+
+    # ------------------------------------------------------------------ ciclo de vida
+
+    async def start(self, handle_job: JobHandler):
+        self._handle_job = handle_job
+        now = time.time()
+
+        def register(conn):
+            conn.execute("INSERT OR REPLACE INTO workers (worker_id, pid, started_at, heartbeat) "
+                         "VALUES (?, ?, ?, ?)", (self.worker_id, os.getpid(), now, now))
+            # Limpa o que ficou de workers mortos (sessões e execuções sem dono vivo)
+            cutoff = now - WORKER_TTL_SECONDS
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (cutoff,))
+            for table in ('sessions', 'runs', 'leases'):
+                conn.execute(f"DELETE FROM {table} WHERE worker_id NOT IN (SELECT worker_id FROM workers)")
+            conn.execute("DELETE FROM jobs WHERE worker_id NOT IN (SELECT worker_id FROM workers)")
+
+        await self._call(register)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._heartbeat_loop()), loop.create_task(self._job_loop())]
+        print(f"[SessionRegistry] Worker {self.worker_id} registrado em {self.db_file}")
+
+    async def stop(self):
+        tasks = self._tasks + list(self._job_tasks) + list(self._lead_tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+
+        def unregister(conn):
+            for table in ('sessions', 'runs', 'leases', 'workers'):
+                conn.execute(f"DELETE FROM {table} WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("UPDATE jobs SET status = 'done', response = ? WHERE worker_id = ? AND status != 'done'",
+                         (json.dumps({'status_code': 503, 'body': {'detail': 'Worker encerrado'}}),
+                          self.worker_id))
+
+        try:
+            await self._call(unregister)
+        finally:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+    async def _heartbeat_loop(self):
+        """Mantém o worker vivo no registro, confere as lideranças mantidas e disputa as pendentes."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                now = time.time()
+                # Upsert: se outro worker nos deu como mortos e apagou o registro, voltamos
+                # a aparecer (mas as lideranças apagadas junto são conferidas abaixo)
+                await self._call(lambda conn: conn.execute(
+                    "INSERT INTO workers (worker_id, pid, started_at, heartbeat) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                    (self.worker_id, os.getpid(), now, now)))
+                self._heartbeat_at = now
+                await self._renew_leads()
+            except Exception as e:
+                print(f"[SessionRegistry] Erro no heartbeat: {e}")
+                if self._led and time.time() - self._heartbeat_at >= WORKER_TTL_SECONDS:
+                    # Sem heartbeat pelo TTL, outro worker já pode ter assumido as lideranças
+                    await self._lose_leads(set(self._led))
+
+    # ------------------------------------------------------------------ sessões
+
+    async def claim_session(self, key: str) -> str:
+        now = time.time()
+
+        def claim(conn):
+            row = conn.execute(
+                "SELECT s.worker_id FROM sessions s JOIN workers w ON w.worker_id = s.worker_id "
+                "WHERE s.session_key = ? AND w.heartbeat >= ?", (key, now - WORKER_TTL_SECONDS)
+            ).fetchone()
+            if row is not None:
+                return row['worker_id']
+            conn.execute("INSERT OR REPLACE INTO sessions (session_key, worker_id, claimed_at) VALUES (?, ?, ?)",
+                         (key, self.worker_id, now))
+            return self.worker_id
+
+        return await self._call(claim)
+
+    async def session_owner(self, key: str) -> Optional[str]:
+        cutoff = time.time() - WORKER_TTL_SECONDS
+        row = await self._query(lambda conn: conn.execute(
+            "SELECT s.worker_id FROM sessions s JOIN workers w ON w.worker_id = s.worker_id "
+            "WHERE s.session_key = ? AND w.heartbeat >= ?", (key, cutoff)).fetchone())
+        return row['worker_id'] if row is not None else None
+
+    async def release_session(self, key: str):
+        await self._call(lambda conn: conn.execute(
+            "DELETE FROM sessions WHERE session_key = ? AND worker_id = ?", (key, self.worker_id)))
+
+    # ------------------------------------------------------------------ execuções
+
+    async def register_run(self, run_id: str, session_key: str):
+        await self._call(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO runs (run_id, session_key, worker_id, started_at) VALUES (?, ?, ?, ?)",
+            (run_id, session_key, self.worker_id, time.time())))
+
+    async def finish_run(self, run_id: str):
+        await self._call(lambda conn: conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,)))
+
+    async def run_owner(self, run_id: str) -> Optional[str]:
+        cutoff = time.time() - WORKER_TTL_SECONDS
+        row = await self._query(lambda conn: conn.execute(
+            "SELECT r.worker_id FROM runs r JOIN workers w ON w.worker_id = r.worker_id "
+            "WHERE r.run_id = ? AND w.heartbeat >= ?", (run_id, cutoff)).fetchone())
+        return row['worker_id'] if row is not None else None
+
+    async def list_runs(self) -> List[Dict[str, object]]:
+        cutoff = time.time() - WORKER_TTL_SECONDS
+        rows = await self._query(lambda conn: conn.execute(
+            "SELECT r.run_id, r.session_key AS session, r.worker_id, r.started_at FROM runs r "
+            "JOIN workers w ON w.worker_id = r.worker_id WHERE w.heartbeat >= ? "
+            "ORDER BY r.started_at", (cutoff,)).fetchall())
+        return [dict(row) for row in rows]
+
+    # ------------------------------------------------------------------ jobs
+
+    async def submit(self, worker_id: str, kind: str, payload: Dict[str, object]) -> Dict[str, object]:
+        job_id = uuid.uuid4().hex
+        await self._call(lambda conn: conn.execute(
+            "INSERT INTO jobs (job_id, worker_id, kind, payload, status, created_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?)",
+            (job_id, worker_id, kind, json.dumps(payload), time.time())))
+
+        def poll(conn):
+            # Só leitura: a remoção do job (escrita) acontece uma vez, ao fim da espera
+            row = conn.execute("SELECT status, response FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is not None and row['status'] == 'done':
+                return json.loads(row['response'])
+            alive = conn.execute("SELECT 1 FROM workers WHERE worker_id = ? AND heartbeat >= ?",
+                                 (worker_id, time.time() - WORKER_TTL_SECONDS)).fetchone()
+            if alive is None:
+                raise WorkerUnavailableError(f"Worker {worker_id} parou de responder")
+            return None
+
+        try:
+            while True:
+                try:
+                    response = await self._query(poll)
+                except WorkerUnavailableError:
+                    await self._call(lambda conn: conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)))
+                    raise
+                if response is not None:
+                    await self._call(lambda conn: conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)))
+                    return response
+                await asyncio.sleep(JOB_POLL_SECONDS)
+        except asyncio.CancelledError:
+            # Quem pediu desistiu (ex.: cliente desconectou): o job não é mais aguardado
+            await self._call(lambda conn: conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,)))
+            raise
+
+    async def _job_loop(self):
+        """Busca jobs repassados a este worker e os executa em paralelo."""
+        def pending(conn):
+            return conn.execute("SELECT 1 FROM jobs WHERE worker_id = ? AND status = 'pending' LIMIT 1",
+                                (self.worker_id,)).fetchone() is not None
+
+        def take(conn):
+            rows = conn.execute("SELECT job_id, kind, payload FROM jobs WHERE worker_id = ? AND status = 'pending'",
+                                (self.worker_id,)).fetchall()
+            for row in rows:
+                conn.execute("UPDATE jobs SET status = 'running' WHERE job_id = ?", (row['job_id'],))
+            return [dict(row) for row in rows]
+
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            try:
+                # Fila vazia (o caso comum) é conferida só com leitura; o lock de escrita
+                # do SQLite só é disputado quando há job para reservar
+                if not await self._query(pending):
+                    continue
+                jobs = await self._call(take)
+            except Exception as e:
+                print(f"[SessionRegistry] Erro ao buscar jobs: {e}")
+                continue
+            for job in jobs:
+                task = loop.create_task(self._run_job(job))
+                self._job_tasks.add(task)
+                task.add_done_callback(self._job_tasks.discard)
+
+    async def _run_job(self, job: Dict[str, object]):
+        """Executa um job e grava a resposta para quem o repassou."""
+        try:
+            response = await self._handle_job(job['kind'], json.loads(job['payload']))
+        except Exception as e:
+            response = {'status_code': 500, 'body': {'detail': f"Erro no worker {self.worker_id}: {e}"}}
+        await self._call(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'done', response = ? WHERE job_id = ?",
+            (json.dumps(response), job['job_id'])))
+
+    # ------------------------------------------------------------------ lideranças
+
+    def lead(self, name: str, on_acquired: Callable[[], None],
+             on_lost: Optional[LeaseLostHandler] = None):
+        self._leads[name] = (on_acquired, on_lost)
+        # O loop só guarda referência fraca às tarefas: mantém esta até terminar
+        task = asyncio.get_running_loop().create_task(self._renew_leads())
+        self._lead_tasks.add(task)
+        task.add_done_callback(self._lead_tasks.discard)
+
+    async def _renew_leads(self):
+        """
+        Confere as lideranças mantidas e tenta obter as pendentes.
+
+        Uma liderança é válida enquanto o dono grava heartbeat; se a linha dela não é mais
+        deste worker (outro a assumiu após um heartbeat atrasado), ela é dada como perdida.
+        """
+        held = set(self._led)
+        wanted = [name for name in self._leads if name not in held]
+        now = time.time()
+
+        def renew(conn):
+            lost = [name for name in held
+                    if (row := conn.execute("SELECT worker_id FROM leases WHERE name = ?",
+                                            (name,)).fetchone()) is None
+                    or row['worker_id'] != self.worker_id]
+            acquired = []
+            for name in wanted:
+                row = conn.execute(
+                    "SELECT l.worker_id FROM leases l JOIN workers w ON w.worker_id = l.worker_id "
+                    "WHERE l.name = ? AND w.heartbeat >= ?", (name, now - WORKER_TTL_SECONDS)).fetchone()
+                if row is not None and row['worker_id'] != self.worker_id:
+                    continue
+                conn.execute("INSERT OR REPLACE INTO leases (name, worker_id, acquired_at) VALUES (?, ?, ?)",
+                             (name, self.worker_id, now))
+                acquired.append(name)
+            return lost, acquired
+
+        lost, acquired = await self._call(renew)
+        await self._lose_leads(set(lost))
+        for name in acquired:
+            self._led.add(name)
+            print(f"[SessionRegistry] Worker {self.worker_id} assumiu '{name}'")
+            self._leads[name][0]()
+
+    async def _lose_leads(self, names: set):
+        """Marca lideranças como perdidas e aguarda o on_lost de cada uma."""
+        for name in names:
+            self._led.discard(name)
+            print(f"[SessionRegistry] AVISO: worker {self.worker_id} perdeu '{name}'")
+            on_lost = self._leads[name][1]
+            if on_lost is None:
+                continue
+            try:
+                await on_lost()
+            except Exception as e:
+                print(f"[SessionRegistry] Erro ao liberar '{name}': {e}")
+
+    async def describe(self) -> Dict[str, object]:
+        now = time.time()
+
+        def read(conn):
+            workers = conn.execute("SELECT worker_id, pid, started_at, heartbeat FROM workers "
+                                   "ORDER BY started_at").fetchall()
+            sessions = conn.execute("SELECT session_key, worker_id FROM sessions ORDER BY session_key").fetchall()
+            leases = conn.execute("SELECT name, worker_id FROM leases").fetchall()
+            return workers, sessions, leases
+
+        workers, sessions, leases = await self._query(read)
+        return {
+            'backend': 'sqlite',
+            'worker_id': self.worker_id,
+            'workers': [
+                {'worker_id': row['worker_id'], 'pid': row['pid'],
+                 'heartbeat_age_s': round(now - row['heartbeat'], 1),
+                 'alive': now - row['heartbeat'] < WORKER_TTL_SECONDS}
+                for row in workers
+            ],
+            'sessions': {row['session_key']: row['worker_id'] for row in sessions},
+            'leases': {row['name']: row['worker_id'] for row in leases},
+        }
+
+
+def create_registry() -> SessionRegistry:
+    """
+    Cria o registro configurado em SESSION_REGISTRY ('memory' ou 'sqlite').
+
+    Padrão: 'sqlite' quando BACKEND_WORKERS > 1, senão 'memory'.
+    """
+    default = 'sqlite' if int(os.getenv('BACKEND_WORKERS', '1')) > 1 else 'memory'
+    backend = os.getenv('SESSION_REGISTRY', default).strip().lower()
+    if backend == 'memory':
+        return MemorySessionRegistry()
+    if backend == 'sqlite':
+        return SqliteSessionRegistry()
+    raise ValueError(f"SESSION_REGISTRY inválido: '{backend}' (use memory ou sqlite)")
@@ -0,0 +1,127 @@
+"""
+Benchmark de vazão: navegador visível (headed) x headless.
+
+Preenche um formulário sintético com a mesma forma da tela de apontamentos
+(duas linhas por dia: data, início, fim e descrição) e mede dias preenchidos
+por segundo em cada modo. Não acessa o QualiWork nem exige credenciais.
+
+Uso:
+    python -m benchmarks.headless_vs_headed --days 40 --repeat 3
+
+No Linux sem display, o modo visível é ignorado (use xvfb-run para incluí-lo).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+
+# Formulário sintético: cada linha tem os mesmos campos de linhaH
+FORM_HTML = """<!DOCTYPE html>
+<html><body>
+<table id="apontamentos"><tbody></tbody></table>
+<button id="btnAdicionar" onclick="addRow()">Adicionar</button>
+<script>
+function addRow() {
+    const tbody = document.querySelector('#apontamentos tbody');
+    const tr = document.createElement('tr');
+    tr.className = 'linhaH';
+    tr.innerHTML = '<td><input name="data"></td><td><input name="inicio"></td>' +
+                   '<td><input name="fim"></td><td><textarea name="descricao"></textarea></td>';
+    tbody.appendChild(tr);
+}
+addRow();
+</script>
+</body></html>"""
+
+
+def _display_available() -> bool:
+    """Retorna True se é possível abrir uma janela (Windows/macOS ou Linux com DISPLAY)."""
+    if not sys.platform.startswith('linux'):
+        return True
+    return bool(os.getenv('DISPLAY') or os.getenv('WAYLAND_DISPLAY'))
+
+
+async def _fill_days(page, days: int):
+    """Preenche `days` dias (duas linhas cada), como o FormFiller faz."""
+    row = 0
+    for day in range(days):
+        date = f"{(day % 28) + 1:02d}/01/2025"
+        for start, end in (("08:00", "12:00"), ("13:00", "17:00")):
+            if row > 0:
+                await page.click('#btnAdicionar')
+            line = page.locator('tr.linhaH').nth(row)
+            await line.locator('input[name="data"]').fill(date)
+            await line.locator('input[name="inicio"]').fill(start)
+            await line.locator('input[name="fim"]').fill(end)
+            await line.locator('textarea[name="descricao"]').fill("Desenvolvimento")
+            row += 1
+
+
+async def run_mode(headless: bool, days: int, repeat: int) -> Dict[str, object]:
+    """
+    Mede um modo do navegador.
+
+    Args:
+        headless: Modo do navegador
+        days: Dias preenchidos por repetição
+        repeat: Quantidade de repetições (página nova a cada uma)
+
+    Returns:
+        Dicionário com tempo de lançamento e vazão (dias/s) por repetição
+    """
+    async with async_playwright() as playwright:
+        started = time.perf_counter()
+        browser = await playwright.chromium.launch(
+            headless=headless,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+        launch_s = time.perf_counter() - started
+        context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
+
+        throughput: List[float] = []
+        for _ in range(repeat):
+            page = await context.new_page()
+            await page.set_content(FORM_HTML)
+            started = time.perf_counter()
+            await _fill_days(page, days)
+            throughput.append(days / (time.perf_counter() - started))
+            await page.close()
+
+        await browser.close()
+
+    return {
+        'mode': 'headless' if headless else 'headed',
+        'launch_s': round(launch_s, 3),
+        'days_per_s': [round(value, 2) for value in throughput],
+        'median_days_per_s': round(statistics.median(throughput), 2),
+    }
+
+
+async def main(days: int, repeat: int) -> List[Dict[str, object]]:
+    """Executa o benchmark nos modos disponíveis."""
+    results = [await run_mode(True, days, repeat)]
+    if _display_available():
+        results.append(await run_mode(False, days, repeat))
+    else:
+        print("[Benchmark] Sem display: modo visível ignorado", file=sys.stderr)
+
+    if len(results) == 2:
+        headless, headed = results
+        ratio = headless['median_days_per_s'] / headed['median_days_per_s']
+        print(f"[Benchmark] headless {ratio:.2f}x a vazão do modo visível", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vazão de preenchimento: headed x headless")
+    parser.add_argument('--days', type=int, default=40, help="Dias preenchidos por repetição")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições por modo")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.days, args.repeat)), indent=2))
@@ -0,0 +1,333 @@
+"""
+Microbenchmarks dos caminhos quentes em Python puro, com baselines em JSON.
+
+Mede, sem navegador e sem rede:
+- geração e validação de horários (generate_daily_hours, validate_hours);
+- CredentialManager: construção (chave em cache e derivação a frio), gravação e leitura;
+- montagem do plano do fill_date_range (dias úteis + horários + validação) de 1 dia a 5 anos;
+- custo de uma requisição FastAPI em processo (TestClient; requer httpx, senão é pulado).
+
+Uso:
+    python -m benchmarks.hot_paths run --output benchmarks/baselines/hot_paths.json
+    python -m benchmarks.hot_paths compare                      # mede agora e compara
+    python -m benchmarks.hot_paths compare --current atual.json --threshold 0.25
+    python -m benchmarks.hot_paths run --filter plan --quick
+
+O compare sai com código 1 se algum benchmark ficou mais lento que a baseline além do
+limite (mediana por operação).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.import_profile import PROJECT_ROOT
+
+
+DEFAULT_BASELINE = PROJECT_ROOT / "benchmarks" / "baselines" / "hot_paths.json"
+DEFAULT_THRESHOLD = 0.20
+
+# Intervalos do plano de preenchimento (rótulo -> dias corridos)
+PLAN_RANGES = {'1d': 1, '1sem': 7, '1mes': 31, '1ano': 365, '5anos': 5 * 365}
+
+
+def measure(func: Callable[[], object], rounds: int = 5, min_round_s: float = 0.2,
+            max_number: int = 1_000_000) -> Dict[str, float]:
+    """
+    Mede o tempo por chamada de `func`.
+
+    Calibra quantas chamadas cabem em `min_round_s` (como o timeit.autorange) e repete a
+    rodada `rounds` vezes.
+
+    Returns:
+        Dicionário com median_us, min_us, ops_per_s, number (chamadas por rodada) e rounds
+    """
+    func()  # Aquecimento (imports tardios, caches)
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_s or number >= max_number:
+            break
+        number *= 10 if elapsed < min_round_s / 10 else 2
+
+    per_call: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - started) / number)
+
+    median = statistics.median(per_call)
+    return {
+        'median_us': round(median * 1e6, 3),
+        'min_us': round(min(per_call) * 1e6, 3),
+        'ops_per_s': round(1 / median, 1) if median > 0 else None,
+        'number': number,
+        'rounds': rounds,
+    }
+
+
+def bench_time_generator(rounds: int, min_round_s: float) -> Dict[str, Dict]:
+    """generate_daily_hours e validate_hours (política padrão)."""
+    import random
+    from utils.time_generator import generate_daily_hours, validate_hours
+
+    rng = random.Random(1)
+    hours = generate_daily_hours(rng=rng)
+    args = (hours['morning']['start'], hours['morning']['end'],
+            hours['afternoon']['start'], hours['afternoon']['end'])
+    return {
+        'time.generate_daily_hours': measure(lambda: generate_daily_hours(rng=rng), rounds, min_round_s),
+        'time.validate_hours': measure(lambda: validate_hours(*args), rounds, min_round_s),
+    }
+
+
+def bench_credentials(rounds: int, min_round_s: float, workdir: Path) -> Dict[str, Dict]:
+    """Construção, gravação e leitura do CredentialManager em um arquivo temporário."""
+    from security.credential_manager import CredentialManager, _derive_fernet_key
+
+    credentials_file = str(workdir / "bench.credentials.encrypted")
+
+    def construct_cold():
+        _derive_fernet_key.cache_clear()
+        CredentialManager(credentials_file)
+
+    manager = CredentialManager(credentials_file)
+    manager.save_credentials("bench@example.com", "senha-de-benchmark")
+    return {
+        # Derivação PBKDF2 a cada chamada: poucas rodadas curtas bastam
+        'credentials.construct_cold': measure(construct_cold, rounds, min_round_s=0, max_number=1),
+        'credentials.construct': measure(lambda: CredentialManager(credentials_file), rounds, min_round_s),
+        'credentials.save': measure(
+            lambda: manager.save_credentials("bench@example.com", "senha-de-benchmark"), rounds, min_round_s),
+        'credentials.load': measure(manager.load_credentials, rounds, min_round_s),
+    }
+
+
+def bench_fill_plan(rounds: int, min_round_s: float) -> Dict[str, Dict]:
+    """Plano do fill_date_range (build_fill_plan) para intervalos de 1 dia a 5 anos."""
+    from automation.form_filler import build_fill_plan
+
+    start = datetime(2025, 1, 6)
+    results = {}
+    for label, days in PLAN_RANGES.items():
+        end = start + timedelta(days=days - 1)
+        results[f'fill_plan.{label}'] = measure(lambda end=end: build_fill_plan(start, end, seed=42),
+                                                rounds, min_round_s)
+    return results
+
+
+def bench_api(rounds: int, min_round_s: float) -> Dict[str, Dict]:
+    """Requisições em processo (TestClient, sem lifespan: nada de navegador nem agendador)."""
+    try:
+        from fastapi.testclient import TestClient
+    except (ImportError, RuntimeError):
+        print("[Benchmark] httpx não instalado; benchmarks da API ignorados", file=sys.stderr)
+        return {}
+    from backend.api import app
+
+    client = TestClient(app)
+    plan_body = {'periods': [{'de': '01/01/2025', 'ate': '31/01/2025'}], 'seed': 42}
+
+    def health():
+        assert client.get('/api/health').status_code == 200
+
+    def plan():
+        assert client.post('/api/automation/plan', json=plan_body).status_code == 200
+
+    return {
+        'api.health': measure(health, rounds, min_round_s),
+        'api.plan_1mes': measure(plan, rounds, min_round_s),
+    }
+
+
+def _isolate_files(workdir: Path):
+    """Aponta os arquivos do backend para um diretório temporário antes do import da API."""
+    os.environ['CREDENTIALS_FILE'] = str(workdir / "credentials.encrypted")
+    os.environ['HISTORY_FILE'] = str(workdir / "history.sqlite3")
+    os.environ['SCHEDULER_STATE_FILE'] = str(workdir / "scheduler_state.json")
+    os.environ['PROFILE_DIR'] = str(workdir / "profiles")
+    os.environ['SESSION_REGISTRY'] = 'memory'
+    os.environ['SCHEDULE_TIME'] = ''
+
+
+def _selected(name: str, name_filter: Optional[str]) -> bool:
+    """
+    True se o benchmark (ou grupo) entra no filtro.
+
+    O grupo é a parte do nome antes do primeiro ponto; um filtro sem ponto precisa aparecer
+    no nome do grupo ("plan" seleciona fill_plan), um filtro com ponto precisa começar pelo
+    grupo ("fill_plan.1ano"). Depois disso o filtro precisa aparecer no nome completo.
+    """
+    if not name_filter:
+        return True
+    group = name.split('.', 1)[0]
+    return (name_filter in group or name_filter.startswith(group + '.')) and (
+        name == group or name_filter in name)
+
+
+def run(name_filter: Optional[str] = None, quick: bool = False) -> Dict[str, object]:
+    """
+    Executa os benchmarks.
+
+    Args:
+        name_filter: Só inclui os benchmarks do grupo e do nome filtrados (ver _selected)
+        quick: Rodadas menores e mais curtas (verificação rápida, resultados mais ruidosos)
+
+    Returns:
+        Documento da baseline: {'meta': {...}, 'results': {nome: medida}}
+    """
+    rounds, min_round_s = (3, 0.05) if quick else (5, 0.2)
+    with tempfile.TemporaryDirectory(prefix="qualiwork-bench-") as tmp:
+        workdir = Path(tmp)
+        _isolate_files(workdir)
+        groups = {
+            'time': lambda: bench_time_generator(rounds, min_round_s),
+            'credentials': lambda: bench_credentials(rounds, min_round_s, workdir),
+            'fill_plan': lambda: bench_fill_plan(rounds, min_round_s),
+            'api': lambda: bench_api(rounds, min_round_s),
+        }
+        results: Dict[str, Dict] = {}
+        for group, bench in groups.items():
+            # Grupos fora do filtro nem são medidos
+            if not _selected(group, name_filter):
+                continue
+            for name, value in bench().items():
+                if _selected(name, name_filter):
+                    results[name] = value
+                    print(f"[Benchmark] {name}: {value['median_us']:.1f} us", file=sys.stderr)
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.node(),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = DEFAULT_THRESHOLD) -> Dict[str, object]:
+    """
+    Compara duas execuções pela mediana por operação.
+
+    Args:
+        baseline: Documento gravado com `run --output`
+        current: Documento da execução atual
+        threshold: Aumento relativo tolerado (0.20 = até 20% mais lento)
+
+    Returns:
+        Dicionário com as linhas comparadas, as regressões e os benchmarks ausentes/novos
+    """
+    base_results = baseline['results']
+    current_results = current['results']
+    rows = []
+    for name in sorted(set(base_results) & set(current_results)):
+        before = base_results[name]['median_us']
+        after = current_results[name]['median_us']
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            'name': name,
+            'baseline_us': before,
+            'current_us': after,
+            'change': round(change, 4),
+            'status': 'regressao' if change > threshold else
+                      'melhoria' if change < -threshold else 'ok',
+        })
+    return {
+        'threshold': threshold,
+        'rows': rows,
+        'regressions': [row['name'] for row in rows if row['status'] == 'regressao'],
+        'missing': sorted(set(base_results) - set(current_results)),
+        'new': sorted(set(current_results) - set(base_results)),
+    }
+
+
+def _print_comparison(report: Dict[str, object]):
+    """Tabela legível da comparação."""
+    print(f"{'benchmark':<30} {'baseline (us)':>14} {'atual (us)':>14} {'variação':>9}  status")
+    for row in report['rows']:
+        print(f"{row['name']:<30} {row['baseline_us']:>14.1f} {row['current_us']:>14.1f} "
+              f"{row['change']:>+9.1%}  {row['status']}")
+    for name in report['missing']:
+        print(f"{name:<30} ausente na execução atual")
+    for name in report['new']:
+        print(f"{name:<30} novo (sem baseline)")
+    if report['regressions']:
+        print(f"\n{len(report['regressions'])} regressão(ões) acima de {report['threshold']:.0%}: "
+              f"{', '.join(report['regressions'])}")
+    else:
+        print(f"\nNenhuma regressão acima de {report['threshold']:.0%}")
+
+
+def _write_json(path: Path, document: Dict[str, object]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2), encoding='utf-8')
+    print(f"[Benchmark] Resultados gravados em {path}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks dos caminhos quentes (offline)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Executa e imprime (ou grava) os resultados")
+    run_parser.add_argument('--output', type=Path, help="Arquivo JSON (ex.: a baseline)")
+    run_parser.add_argument('--filter', help="Grupo (ex.: fill_plan) ou prefixo de nome (ex.: fill_plan.1ano)")
+    run_parser.add_argument('--quick', action='store_true', help="Rodadas curtas (mais ruído)")
+
+    compare_parser = commands.add_parser('compare', help="Compara com a baseline")
+    compare_parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                                help=f"Baseline (padrão: {DEFAULT_BASELINE.relative_to(PROJECT_ROOT)})")
+    compare_parser.add_argument('--current', type=Path,
+                                help="Resultados já gravados (padrão: executa agora)")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Aumento relativo tolerado (padrão: 0.20)")
+    compare_parser.add_argument('--filter', help="Grupo (ex.: fill_plan) ou prefixo de nome (ex.: fill_plan.1ano)")
+    compare_parser.add_argument('--quick', action='store_true', help="Rodadas curtas (mais ruído)")
+    compare_parser.add_argument('--json', action='store_true', help="Imprime o relatório em JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        document = run(args.filter, args.quick)
+        if args.output:
+            _write_json(args.output, document)
+        else:
+            print(json.dumps(document, indent=2))
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Baseline não encontrada: {args.baseline} (gere com: run --output {args.baseline})",
+              file=sys.stderr)
+        return 2
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if args.current:
+        current = json.loads(args.current.read_text(encoding='utf-8'))
+    else:
+        current = run(args.filter, args.quick)
+    if args.filter:
+        baseline['results'] = {name: value for name, value in baseline['results'].items()
+                               if _selected(name, args.filter)}
+    report = compare(baseline, current, args.threshold)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_comparison(report)
+    return 1 if report['regressions'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Perfil de tempo de import do backend, agrupado por subsistema.
+
+Roda `python -X importtime -c "import <módulo>"` em um processo novo e soma o
+tempo próprio (self) de cada módulo no subsistema a que ele pertence
+(web, navegador, criptografia, aplicação, biblioteca padrão...).
+
+Uso:
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile --module backend.server --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Pacote de topo -> subsistema (o restante é 'stdlib' ou 'outros')
+SUBSYSTEMS = {
+    'fastapi': 'web', 'starlette': 'web', 'pydantic': 'web', 'pydantic_core': 'web',
+    'anyio': 'web', 'uvicorn': 'web', 'h11': 'web', 'annotated_types': 'web',
+    'typing_extensions': 'web', 'sniffio': 'web', 'idna': 'web', 'email_validator': 'web',
+    'playwright': 'navegador', 'greenlet': 'navegador', 'pyee': 'navegador',
+    'cryptography': 'criptografia', 'cffi': 'criptografia', '_cffi_backend': 'criptografia',
+    'automation': 'aplicacao', 'backend': 'aplicacao', 'security': 'aplicacao', 'utils': 'aplicacao',
+}
+
+
+def _subsystem(module: str) -> str:
+    """Classifica um módulo pelo pacote de topo."""
+    top = module.split('.', 1)[0]
+    if top in SUBSYSTEMS:
+        return SUBSYSTEMS[top]
+    if top in sys.stdlib_module_names or top.lstrip('_') in sys.stdlib_module_names:
+        return 'stdlib'
+    return 'outros'
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """
+    Lê a saída de -X importtime.
+
+    Returns:
+        Lista de (módulo, self_us, cumulativo_us)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_import(module: str = 'backend.api', top: int = 10) -> Dict[str, object]:
+    """
+    Mede o import de um módulo em um interpretador novo.
+
+    Args:
+        module: Módulo importado
+        top: Quantidade de módulos mais caros listados
+
+    Returns:
+        Dicionário com total, tempo por subsistema e os módulos mais caros (ms)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    entries = parse_importtime(completed.stderr)
+    by_subsystem: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_subsystem[_subsystem(name)] += self_us
+
+    total_us = sum(self_us for _, self_us, _ in entries)
+    slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+    return {
+        'module': module,
+        'total_ms': round(total_us / 1000, 1),
+        'subsystems_ms': {
+            name: round(value / 1000, 1)
+            for name, value in sorted(by_subsystem.items(), key=lambda item: item[1], reverse=True)
+        },
+        'slowest_modules_ms': [
+            {'module': name, 'self_ms': round(self_us / 1000, 1), 'subsystem': _subsystem(name)}
+            for name, self_us, _ in slowest
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo de import por subsistema")
+    parser.add_argument('--module', default='backend.api', help="Módulo a importar")
+    parser.add_argument('--top', type=int, default=10, help="Módulos mais caros listados")
+    args = parser.parse_args()
+    print(json.dumps(profile_import(args.module, args.top), indent=2, ensure_ascii=False))
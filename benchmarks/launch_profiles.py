@@ -0,0 +1,139 @@
+"""
+Benchmark dos perfis de lançamento do Chromium (BROWSER_LAUNCH_PROFILE).
+
+Para cada perfil de LAUNCH_PROFILES mede o tempo de lançamento, o tempo da primeira
+navegação (por padrão a página de login do QualiWork, sem credenciais) e o RSS dos
+processos do Chromium logo após ela. Também confere se a página renderizou (um seletor
+visível) e pode gravar uma captura por perfil para comparação visual.
+
+Uso:
+    python -m benchmarks.launch_profiles --repeat 3
+    python -m benchmarks.launch_profiles --screenshots profiles/launch --profiles default lean
+    python -m benchmarks.launch_profiles --url https://exemplo.local --selector body
+
+O perfil recomendado é o de menor RSS entre os que renderizaram em todas as repetições.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from automation.playwright_controller import LAUNCH_PROFILES, LOGIN_URL, launch_chromium
+from automation.resource_usage import process_tree_memory
+from benchmarks.headless_vs_headed import _display_available
+
+
+# Campo de e-mail da página de login: visível quando o QualiWork renderizou
+DEFAULT_SELECTOR = '#inputEmail'
+
+
+async def measure_once(playwright, profile: str, headless: bool, url: str, selector: str,
+                       screenshot: Optional[Path] = None) -> Dict[str, object]:
+    """
+    Lança o Chromium com um perfil, navega uma vez e mede.
+
+    Returns:
+        Dicionário com launch_ms, first_navigation_ms, browser_rss_mb, browser_processes,
+        rendered e (se a navegação falhar) error
+    """
+    started = time.perf_counter()
+    browser = await launch_chromium(playwright, headless, profile)
+    launch_ms = (time.perf_counter() - started) * 1000
+    try:
+        context = await browser.new_context(**LAUNCH_PROFILES[profile]['context'])
+        page = await context.new_page()
+
+        result: Dict[str, object] = {'launch_ms': round(launch_ms, 1)}
+        started = time.perf_counter()
+        try:
+            await page.goto(url, wait_until="networkidle", timeout=60000)
+            result['first_navigation_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            result['rendered'] = await page.locator(selector).first.is_visible()
+        except Exception as e:
+            result['first_navigation_ms'] = None
+            result['rendered'] = False
+            result['error'] = str(e).splitlines()[0]
+
+        # RSS com a página carregada: só o Chromium deste perfil está aberto
+        memory = process_tree_memory()
+        result['browser_rss_mb'] = memory.get('browser_rss_mb')
+        result['browser_processes'] = memory.get('browser_processes')
+
+        if screenshot is not None:
+            screenshot.parent.mkdir(parents=True, exist_ok=True)
+            await page.screenshot(path=str(screenshot), full_page=True)
+        return result
+    finally:
+        await browser.close()
+
+
+def _median(samples: List[Dict[str, object]], field: str) -> Optional[float]:
+    values = [sample[field] for sample in samples if sample.get(field) is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+async def run_profile(playwright, profile: str, headless: bool, url: str, selector: str,
+                      repeat: int, screenshots: Optional[Path]) -> Dict[str, object]:
+    """Mede um perfil `repeat` vezes (um navegador novo a cada vez) e resume."""
+    samples = []
+    for attempt in range(repeat):
+        shot = screenshots / f"{profile}.png" if screenshots is not None and attempt == 0 else None
+        samples.append(await measure_once(playwright, profile, headless, url, selector, shot))
+    return {
+        'profile': profile,
+        'mode': 'headless' if headless else 'headed',
+        'viewport': LAUNCH_PROFILES[profile]['context']['viewport'],
+        'median_launch_ms': _median(samples, 'launch_ms'),
+        'median_first_navigation_ms': _median(samples, 'first_navigation_ms'),
+        'median_browser_rss_mb': _median(samples, 'browser_rss_mb'),
+        'rendered': all(sample['rendered'] for sample in samples),
+        'samples': samples,
+    }
+
+
+async def main(profiles: List[str], repeat: int, url: str, selector: str, headless: bool,
+               screenshots: Optional[Path]) -> Dict[str, object]:
+    """Executa o benchmark nos perfis pedidos e indica o mais barato que renderizou."""
+    results = []
+    async with async_playwright() as playwright:
+        for profile in profiles:
+            results.append(await run_profile(playwright, profile, headless, url, selector,
+                                             repeat, screenshots))
+            print(f"[Benchmark] {profile}: lançamento {results[-1]['median_launch_ms']} ms, "
+                  f"navegação {results[-1]['median_first_navigation_ms']} ms, "
+                  f"RSS {results[-1]['median_browser_rss_mb']} MB", file=sys.stderr)
+
+    rendered = [result for result in results
+                if result['rendered'] and result['median_browser_rss_mb'] is not None]
+    recommended = min(rendered, key=lambda result: (result['median_browser_rss_mb'],
+                                                    result['median_launch_ms']), default=None)
+    return {
+        'url': url,
+        'selector': selector,
+        'profiles': results,
+        'recommended': recommended['profile'] if recommended else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lançamento, primeira navegação e RSS por perfil do Chromium")
+    parser.add_argument('--profiles', nargs='+', default=list(LAUNCH_PROFILES),
+                        choices=list(LAUNCH_PROFILES), help="Perfis medidos (padrão: todos)")
+    parser.add_argument('--repeat', type=int, default=3, help="Lançamentos por perfil")
+    parser.add_argument('--url', default=LOGIN_URL, help="Página da primeira navegação")
+    parser.add_argument('--selector', default=DEFAULT_SELECTOR,
+                        help="Seletor que deve estar visível se a página renderizou")
+    parser.add_argument('--headed', action='store_true', help="Mede com janela visível")
+    parser.add_argument('--screenshots', type=Path, help="Diretório para uma captura por perfil")
+    args = parser.parse_args()
+
+    if args.headed and not _display_available():
+        parser.error("Sem display para o modo visível (use xvfb-run)")
+    print(json.dumps(asyncio.run(main(args.profiles, args.repeat, args.url, args.selector,
+                                      not args.headed, args.screenshots)), indent=2))
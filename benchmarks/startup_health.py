@@ -0,0 +1,81 @@
+"""
+Benchmark de tempo até o primeiro health check do backend.
+
+Sobe `python -m backend.server` (sem reload) em uma porta livre e mede o tempo
+entre o início do processo e a primeira resposta 200 de /api/health.
+
+Uso:
+    python -m benchmarks.startup_health --repeat 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+from benchmarks.import_profile import PROJECT_ROOT
+
+
+def _free_port() -> int:
+    """Reserva uma porta TCP livre no localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_health(timeout: float = 30.0) -> float:
+    """
+    Mede uma inicialização do servidor.
+
+    Args:
+        timeout: Tempo máximo aguardando o health check (segundos)
+
+    Returns:
+        Milissegundos entre o início do processo e o primeiro health check 200
+    """
+    port = _free_port()
+    env = dict(os.environ, BACKEND_HOST='127.0.0.1', BACKEND_PORT=str(port), BACKEND_RELOAD='0')
+    url = f"http://127.0.0.1:{port}/api/health"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'backend.server'],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Servidor encerrou com código {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"Sem health check em {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(repeat: int) -> Dict[str, object]:
+    """Executa `repeat` inicializações e resume os tempos."""
+    samples: List[float] = [time_to_first_health() for _ in range(repeat)]
+    return {
+        'samples_ms': [round(value, 1) for value in samples],
+        'median_ms': round(statistics.median(samples), 1),
+        'min_ms': round(min(samples), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo até o primeiro /api/health")
+    parser.add_argument('--repeat', type=int, default=5, help="Quantidade de inicializações")
+    args = parser.parse_args()
+    print(json.dumps(main(args.repeat), indent=2))
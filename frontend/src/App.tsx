@@ -18,6 +18,7 @@ function App() {
   const [logs, setLogs] = useState<LogEntry[]>([])
   const [isLoading, setIsLoading] = useState(false)
   const [progress, setProgress] = useState(0)
+  const [currentRunId, setCurrentRunId] = useState<string | null>(null)
 
   useEffect(() => {
     // Verifica se o backend está disponível ao iniciar
@@ -94,7 +95,7 @@ function App() {
       id: Date.now(),
       de: '',
       ate: '',
-      taskIndex: -1,
+      taskKey: '',
       descMorning: '',
       descAfternoon: ''
     }])
@@ -122,7 +123,7 @@ function App() {
         return
       }
       
-      const invalidPeriods = periods.filter(p => !p.de || !p.ate || p.taskIndex < 0)
+      const invalidPeriods = periods.filter(p => !p.de || !p.ate || !p.taskKey)
       if (invalidPeriods.length > 0) {
         addLog('Alguns períodos estão incompletos', 'error')
         return
@@ -146,14 +147,20 @@ function App() {
         : periods.map(p => ({
             de: p.de,
             ate: p.ate,
-            task_index: p.taskIndex,
+            // A chave identifica a tarefa; o índice é resolvido na mesma lista das chaves
+            task_index: Math.max(0, tasks.findIndex(t => t.key === p.taskKey)),
+            task_key: p.taskKey,
             desc_morning: p.descMorning,
             desc_afternoon: p.descAfternoon
           }))
 
-      const response = await api.executeAutomation(periodsToSend, true)
+      const runId = crypto.randomUUID().replace(/-/g, '')
+      setCurrentRunId(runId)
+      const response = await api.executeAutomation(periodsToSend, undefined, runId)
       
-      if (response.success) {
+      if (response.cancelled) {
+        addLog(`Automação cancelada: ${response.total_entries} entradas preenchidas, ${response.remaining_dates.length} dia(s) pendente(s)`, 'info')
+      } else if (response.success) {
         addLog(`Automação concluída! ${response.total_entries} entradas preenchidas`, 'success')
       } else {
         addLog(`Automação concluída com erros: ${response.errors.join(', ')}`, 'error')
@@ -172,11 +179,22 @@ function App() {
       addLog(`Erro: ${errorMessage}`, 'error')
       console.error('Erro ao executar automação:', error)
     } finally {
+      setCurrentRunId(null)
       setIsLoading(false)
       setProgress(100)
     }
   }
 
+  const handleCancelAutomation = async () => {
+    if (!currentRunId) return
+    try {
+      await api.cancelRun(currentRunId)
+      addLog('Cancelamento solicitado: a automação para após o dia atual', 'info')
+    } catch (error: any) {
+      addLog(`Erro ao cancelar: ${error.response?.data?.detail || error.message}`, 'error')
+    }
+  }
+
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-900 via-blue-900 to-slate-900">
       <div className="container mx-auto px-4 py-8">
@@ -225,6 +243,7 @@ function App() {
           {/* Automation Controls */}
           <AutomationSection
             onExecute={handleExecuteAutomation}
+            onCancel={currentRunId ? handleCancelAutomation : undefined}
             isLoading={isLoading}
             progress={progress}
           />
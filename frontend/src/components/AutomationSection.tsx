@@ -1,13 +1,15 @@
-import { Play, Square } from 'lucide-react'
+import { Play, Square, X } from 'lucide-react'
 
 interface AutomationSectionProps {
   onExecute: () => void
+  onCancel?: () => void
   isLoading: boolean
   progress: number
 }
 
 export function AutomationSection({
   onExecute,
+  onCancel,
   isLoading,
   progress,
 }: AutomationSectionProps) {
@@ -43,6 +45,15 @@ export function AutomationSection({
               </>
             )}
           </button>
+          {isLoading && onCancel && (
+            <button
+              onClick={onCancel}
+              className="px-6 py-3 bg-red-600 hover:bg-red-700 text-white font-medium rounded-lg transition-colors flex items-center gap-2"
+            >
+              <X className="w-5 h-5" />
+              Cancelar
+            </button>
+          )}
         </div>
       </div>
 
@@ -121,10 +121,7 @@ function PeriodWidget({
   onUpdate: (updates: Partial<Period>) => void
   onRemove: () => void
 }) {
-  const availableTasks = tasks.filter(t => {
-    const saldo = parseFloat(t.saldo.replace(',', '.'))
-    return saldo > 0
-  })
+  const availableTasks = tasks.filter(t => (t.saldo_min ?? 0) > 0)
 
   return (
     <div className="bg-slate-800/30 border border-slate-700 rounded-xl p-4 space-y-4">
@@ -170,13 +167,13 @@ function PeriodWidget({
             Projeto
           </label>
           <select
-            value={period.taskIndex}
-            onChange={(e) => onUpdate({ taskIndex: Number(e.target.value) })}
+            value={period.taskKey}
+            onChange={(e) => onUpdate({ taskKey: e.target.value })}
             className="w-full px-4 py-2 bg-slate-800/50 border border-slate-700 rounded-lg text-white focus:outline-none focus:ring-2 focus:ring-blue-500"
           >
-            <option value={-1}>Selecione um projeto...</option>
-            {availableTasks.map((task, idx) => (
-              <option key={idx} value={idx}>
+            <option value="">Selecione um projeto...</option>
+            {availableTasks.map((task) => (
+              <option key={task.key} value={task.key}>
                 {task.cliente} - {task.projeto} - {task.tarefa} (Saldo: {task.saldo})
               </option>
             ))}
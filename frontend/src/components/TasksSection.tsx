@@ -71,7 +71,7 @@ export function TasksSection({
                   <td className="px-4 py-3 text-right text-gray-300">{task.horas_liberadas}</td>
                   <td className="px-4 py-3 text-right text-gray-300">{task.horas_apontadas}</td>
                   <td className={`px-4 py-3 text-right font-medium ${
-                    parseFloat(task.saldo.replace(',', '.')) > 0 
+                    (task.saldo_min ?? 0) > 0
                       ? 'text-green-400' 
                       : 'text-gray-400'
                   }`}>
@@ -64,14 +64,23 @@ export const api = {
     return response.data
   },
 
-  async executeAutomation(periods: any[], headless: boolean = true) {
+  // headless omitido: o backend usa o padrão BROWSER_HEADLESS. runId (uuid hex) permite
+  // cancelar a execução antes da resposta
+  async executeAutomation(periods: any[], headless?: boolean, runId?: string) {
     const response = await apiClient.post('/api/automation/execute', {
       periods,
       headless,
+      run_id: runId,
     })
     return response.data
   },
 
+  // Para a execução na próxima fronteira de etapa; o resultado parcial chega pela execução
+  async cancelRun(runId: string) {
+    const response = await apiClient.post(`/api/automation/runs/${runId}/cancel`)
+    return response.data
+  },
+
   async getAutomationStatus() {
     const response = await apiClient.get('/api/automation/status')
     return response.data
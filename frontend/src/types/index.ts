@@ -6,13 +6,18 @@ export interface Task {
   horas_liberadas: string
   horas_apontadas: string
   saldo: string
+  key: string // "proposta|projeto|tarefa", estável mesmo se a ordem da tabela mudar
+  // Colunas de horas em minutos, lidas pelo backend (null se a célula não pôde ser lida)
+  horas_liberadas_min: number | null
+  horas_apontadas_min: number | null
+  saldo_min: number | null
 }
 
 export interface Period {
   id: number
   de: string
   ate: string
-  taskIndex: number
+  taskKey: string
   descMorning: string
   descAfternoon: string
 }
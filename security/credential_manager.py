@@ -1,13 +1,50 @@
 """
 Gerenciador de credenciais com criptografia segura.
-Armazena email e senha de forma criptografada usando Fernet.
+Armazena email e senha de forma criptografada usando Fernet; o serviço do processo
+(CredentialService) guarda várias contas em um cofre único (ver credential_vault).
 """
 import os
 import base64
+import getpass
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from typing import Optional
+
+from security.credential_vault import CredentialVault
+
+
+# Parâmetros da derivação de chave (PBKDF2-HMAC-SHA256)
+KDF_SALT = b'qualiwork_salt_2025'  # Salt fixo para consistência
+KDF_ITERATIONS = 100000
+
+# Tempo (ms) de cada derivação efetivamente executada, por chave de sistema
+_key_derivation_ms: dict[str, float] = {}
+
+
+@lru_cache(maxsize=None)
+def _derive_fernet_key(system_key: str) -> bytes:
+    """
+    Deriva a chave Fernet a partir da chave do sistema.
+    
+    O PBKDF2 com 100.000 iterações custa dezenas de milissegundos de CPU e a chave
+    nunca muda durante a vida do processo, então o resultado fica em cache.
+    """
+    # Import tardio: o cryptography só é carregado no primeiro uso das credenciais
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    
+    started = time.perf_counter()
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=KDF_SALT,
+        iterations=KDF_ITERATIONS,
+    )
+    key = base64.urlsafe_b64encode(kdf.derive(system_key.encode()))
+    _key_derivation_ms[system_key] = (time.perf_counter() - started) * 1000
+    return key
 
 
 class CredentialManager:
@@ -28,22 +65,22 @@ class CredentialManager:
         """Inicializa o objeto Fernet com chave derivada do sistema."""
         # Deriva chave única baseada no usuário do sistema
         # Usa uma combinação de informações do sistema para criar uma chave única
+        from cryptography.fernet import Fernet
+        
         system_key = self._derive_system_key()
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'qualiwork_salt_2025',  # Salt fixo para consistência
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(system_key.encode()))
-        self._fernet = Fernet(key)
+        self._fernet = Fernet(_derive_fernet_key(system_key))
+        self.key_derivation_ms = _key_derivation_ms.get(system_key, 0.0)
     
     def _derive_system_key(self) -> str:
         """
         Deriva uma chave única baseada no sistema.
         Usa nome de usuário e caminho do diretório home.
         """
-        username = os.getlogin() if hasattr(os, 'getlogin') else os.getenv('USERNAME', 'default_user')
+        try:
+            username = os.getlogin()
+        except OSError:
+            # Sem terminal de controle (serviço, container, cron): getlogin falha com ENXIO
+            username = getpass.getuser()
         home = os.path.expanduser('~')
         # Combina informações para criar chave única
         system_key = f"{username}_{home}_qualiwork_2025"
@@ -123,3 +160,131 @@ class CredentialManager:
         except Exception as e:
             print(f"Erro ao deletar credenciais: {e}")
             return False
+
+
+# Cofre padrão na raiz do projeto (independente do diretório de trabalho);
+# pode ser sobrescrito pela variável de ambiente CREDENTIALS_FILE
+DEFAULT_CREDENTIALS_FILE = Path(__file__).parent.parent / ".credentials.encrypted"
+
+
+class CredentialService:
+    """
+    Serviço de credenciais do processo (uma instância compartilhada por todas as requisições).
+    
+    A chave é derivada uma única vez e as contas ficam em um CredentialVault: várias
+    contas em um único arquivo criptografado, com índice em memória por ID de conta e
+    escrita atômica. Senhas em memória são zeradas na exclusão explícita. As strings
+    devolvidas aos chamadores são imutáveis e não podem ser zeradas; apenas a cópia
+    mantida pelo cofre é.
+    """
+    
+    def __init__(self, credentials_file: Optional[str] = None):
+        """
+        Inicializa o serviço, derivando a chave e medindo o tempo da derivação.
+        
+        Args:
+            credentials_file: Arquivo do cofre (padrão: CREDENTIALS_FILE ou
+                .credentials.encrypted na raiz do projeto)
+        """
+        vault_file = Path(credentials_file or os.getenv('CREDENTIALS_FILE') or DEFAULT_CREDENTIALS_FILE)
+        manager = CredentialManager(str(vault_file))
+        self.key_derivation_ms = manager.key_derivation_ms
+        self.vault = CredentialVault(vault_file, manager._fernet)
+    
+    def has_credentials(self, account_id: Optional[str] = None) -> bool:
+        """
+        Verifica se existem credenciais salvas.
+        
+        Args:
+            account_id: ID da conta (qualquer conta se None)
+        
+        Returns:
+            True se existem credenciais salvas, False caso contrário
+        """
+        if account_id is None:
+            return self.vault.has_accounts()
+        return self.vault.get(account_id) is not None
+    
+    def load_credentials(self, account_id: Optional[str] = None) -> tuple[str, str] | None:
+        """
+        Retorna as credenciais de uma conta a partir do índice em memória.
+        
+        Args:
+            account_id: ID da conta (conta padrão se None)
+        
+        Returns:
+            Tupla (email, password) ou None se não encontrar/erro
+        """
+        try:
+            return self.vault.get(account_id)
+        except Exception as e:
+            print(f"Erro ao carregar credenciais: {e}")
+            return None
+    
+    def list_accounts(self) -> list[dict]:
+        """
+        Lista as contas salvas (sem senhas).
+        
+        Returns:
+            Lista de {'account_id', 'email', 'default'}
+        """
+        return self.vault.list_accounts()
+    
+    def save_credentials(self, email: str, password: str, account_id: Optional[str] = None,
+                         make_default: bool = False) -> bool:
+        """
+        Salva (ou atualiza) as credenciais de uma conta.
+        
+        Args:
+            email: Email do usuário
+            password: Senha do usuário
+            account_id: ID da conta (padrão: o próprio email)
+            make_default: Se True, torna a conta padrão
+        
+        Returns:
+            True se salvou com sucesso, False caso contrário
+        """
+        try:
+            self.vault.put(email, password, account_id=account_id, make_default=make_default)
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar credenciais: {e}")
+            return False
+    
+    def delete_credentials(self, account_id: Optional[str] = None) -> bool:
+        """
+        Remove credenciais salvas e zera a cópia em memória.
+        
+        Args:
+            account_id: ID da conta (todas as contas se None)
+        
+        Returns:
+            True se removeu com sucesso, False caso contrário
+        """
+        try:
+            if account_id is None:
+                self.vault.clear()
+                return True
+            return self.vault.delete(account_id)
+        except Exception as e:
+            print(f"Erro ao deletar credenciais: {e}")
+            return False
+
+
+_credential_service: Optional[CredentialService] = None
+_credential_service_lock = threading.Lock()
+
+
+def get_credential_service() -> CredentialService:
+    """
+    Retorna o serviço de credenciais do processo, criando-o na primeira chamada.
+    
+    Returns:
+        CredentialService compartilhado
+    """
+    global _credential_service
+    if _credential_service is None:
+        with _credential_service_lock:
+            if _credential_service is None:
+                _credential_service = CredentialService()
+    return _credential_service
@@ -0,0 +1,330 @@
+"""
+Cofre de credenciais com várias contas em um único arquivo criptografado.
+Mantém um índice em memória por ID de conta e grava de forma atômica
+(arquivo temporário + rename), sob um lock de arquivo compartilhado entre processos.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
+
+# Versão do formato do conteúdo criptografado
+VAULT_FORMAT_VERSION = 2
+
+# Separador do formato antigo (uma única conta: "email|||senha")
+LEGACY_SEPARATOR = '|||'
+
+
+@dataclass
+class _VaultEntry:
+    """Conta mantida no índice em memória (senha em buffer mutável para poder zerar)."""
+    email: str
+    password: bytearray
+
+    def wipe(self):
+        """Zera a senha mantida em memória."""
+        self.password[:] = b'\x00' * len(self.password)
+
+
+def normalize_account_id(account_id: str) -> str:
+    """Normaliza o ID da conta (sem espaços nas pontas, minúsculo)."""
+    return account_id.strip().lower()
+
+
+class CredentialVault:
+    """
+    Cofre multi-conta.
+
+    Leituras usam um snapshot imutável do índice (sem lock e sem acesso a disco);
+    escritas são serializadas por um lock de thread e por um lock exclusivo no arquivo
+    `<cofre>.lock` (vários workers gravam o mesmo cofre), relêem o arquivo dentro do lock,
+    aplicam a mudança e gravam em arquivo temporário trocado com os.replace, então um
+    leitor nunca vê um arquivo pela metade e nenhuma escrita perde a de outro processo.
+    Se outro processo alterar o arquivo, o índice é recarregado na próxima leitura após
+    `max_staleness`.
+    """
+
+    def __init__(self, vault_file: Path, fernet: "Fernet", max_staleness: float = 2.0):
+        """
+        Inicializa o cofre e carrega o índice.
+
+        Args:
+            vault_file: Caminho do arquivo criptografado
+            fernet: Instância Fernet com a chave já derivada
+            max_staleness: Intervalo mínimo (segundos) entre verificações de mudança no arquivo
+        """
+        self.vault_file = Path(vault_file)
+        self.lock_file = self.vault_file.with_name(self.vault_file.name + '.lock')
+        self._fernet = fernet
+        self._write_lock = threading.Lock()
+        self.max_staleness = max_staleness
+        self._index: Dict[str, _VaultEntry] = {}
+        self._default_account: Optional[str] = None
+        self._file_signature: Optional[tuple[int, int]] = None
+        self._last_check = 0.0
+        self._reload()
+
+    # ------------------------------------------------------------------ leitura
+
+    def _current_signature(self) -> Optional[tuple[int, int]]:
+        """Retorna (mtime_ns, tamanho) do arquivo ou None se não existir."""
+        try:
+            stat = self.vault_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _decode(self, encrypted: bytes) -> tuple[Dict[str, _VaultEntry], Optional[str]]:
+        """Descriptografa o conteúdo do arquivo (formato atual ou antigo)."""
+        plain = self._fernet.decrypt(encrypted).decode()
+
+        if not plain.startswith('{'):
+            # Formato antigo: uma única conta "email|||senha"
+            email, password = plain.split(LEGACY_SEPARATOR, 1)
+            account_id = normalize_account_id(email)
+            return {account_id: _VaultEntry(email, bytearray(password.encode()))}, account_id
+
+        data = json.loads(plain)
+        index = {
+            account_id: _VaultEntry(values['email'], bytearray(values['password'].encode()))
+            for account_id, values in data.get('accounts', {}).items()
+        }
+        return index, data.get('default')
+
+    def _load(self):
+        """
+        Lê o arquivo e troca o índice (o chamador segura o _write_lock).
+
+        Contas que não mudaram mantêm a entrada já em memória (a cópia recém-decodificada
+        é zerada), então quem segura a entrada antiga continua vendo a senha válida e as
+        entradas que saíram do índice podem ser zeradas pelo _swap_index.
+        """
+        signature = self._current_signature()
+        if signature is None:
+            index, default_account = {}, None
+        else:
+            index, default_account = self._decode(self.vault_file.read_bytes())
+            for account_id, entry in index.items():
+                current = self._index.get(account_id)
+                if current is not None and (current.email, current.password) == (entry.email, entry.password):
+                    entry.wipe()
+                    index[account_id] = current
+        self._swap_index(index, default_account, signature)
+
+    def _reload(self):
+        """Recarrega o índice a partir do arquivo."""
+        with self._write_lock:
+            self._load()
+
+    def _refresh_if_stale(self):
+        """Recarrega o índice se o arquivo mudou (verificado no máximo a cada max_staleness)."""
+        now = time.monotonic()
+        if now - self._last_check < self.max_staleness:
+            return
+        self._last_check = now
+        if self._current_signature() != self._file_signature:
+            self._reload()
+
+    def _swap_index(self, index: Dict[str, _VaultEntry], default_account: Optional[str],
+                    signature: Optional[tuple[int, int]]):
+        """
+        Troca o índice em memória (leitores em andamento continuam com o snapshot antigo)
+        e zera as senhas das entradas que o novo índice não referencia mais.
+        """
+        outgoing = self._index
+        self._index = index
+        self._default_account = default_account
+        self._file_signature = signature
+        self._last_check = time.monotonic()
+        kept = {id(entry) for entry in index.values()}
+        for entry in outgoing.values():
+            if id(entry) not in kept:
+                entry.wipe()
+
+    def list_accounts(self) -> List[Dict[str, object]]:
+        """
+        Lista as contas do cofre (sem senhas).
+
+        Returns:
+            Lista de {'account_id', 'email', 'default'}
+        """
+        self._refresh_if_stale()
+        index, default_account = self._index, self._default_account
+        return [
+            {'account_id': account_id, 'email': entry.email, 'default': account_id == default_account}
+            for account_id, entry in index.items()
+        ]
+
+    def get(self, account_id: Optional[str] = None) -> Optional[tuple[str, str]]:
+        """
+        Busca as credenciais de uma conta em O(1), sem acesso a disco.
+
+        Args:
+            account_id: ID da conta (conta padrão se None)
+
+        Returns:
+            Tupla (email, password) ou None se a conta não existir
+        """
+        self._refresh_if_stale()
+        index = self._index
+        key = normalize_account_id(account_id) if account_id else self._default_account
+        entry = index.get(key) if key else None
+        if entry is None:
+            return None
+        return entry.email, entry.password.decode()
+
+    def has_accounts(self) -> bool:
+        """Retorna True se o cofre tiver ao menos uma conta."""
+        self._refresh_if_stale()
+        return bool(self._index)
+
+    @property
+    def default_account(self) -> Optional[str]:
+        """ID da conta padrão."""
+        self._refresh_if_stale()
+        return self._default_account
+
+    # ------------------------------------------------------------------ escrita
+
+    @contextmanager
+    def _file_lock(self):
+        """Lock exclusivo entre processos no arquivo `<cofre>.lock` (bloqueia até obter)."""
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, 'a+b') as handle:
+            if os.name == 'nt':
+                # msvcrt.locking tenta por ~10s antes de falhar com OSError
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        Seção de escrita: locks de thread e de arquivo, com o índice relido do disco.
+
+        O índice em memória pode estar até `max_staleness` atrasado em relação a uma
+        escrita de outro processo; relê-lo dentro do lock garante que a mudança é
+        aplicada sobre o conteúdo atual do arquivo.
+        """
+        with self._write_lock, self._file_lock():
+            self._load()
+            yield
+
+    def _write(self, index: Dict[str, _VaultEntry], default_account: Optional[str]):
+        """Grava o cofre de forma atômica e atualiza o índice em memória."""
+        if not index:
+            self.vault_file.unlink(missing_ok=True)
+            self._swap_index({}, None, None)
+            return
+
+        payload = json.dumps({
+            'version': VAULT_FORMAT_VERSION,
+            'default': default_account,
+            'accounts': {
+                account_id: {'email': entry.email, 'password': entry.password.decode()}
+                for account_id, entry in index.items()
+            }
+        }).encode()
+        encrypted = self._fernet.encrypt(payload)
+
+        self.vault_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=self.vault_file.name + '.', suffix='.tmp',
+                                        dir=self.vault_file.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encrypted)
+                f.flush()
+                os.fsync(f.fileno())
+            # Define permissões restritas (apenas leitura para o dono)
+            if os.name != 'nt':  # Unix-like
+                os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.vault_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._swap_index(index, default_account, self._current_signature())
+
+    def put(self, email: str, password: str, account_id: Optional[str] = None,
+            make_default: bool = False) -> str:
+        """
+        Adiciona ou atualiza uma conta.
+
+        Args:
+            email: Email do usuário
+            password: Senha do usuário
+            account_id: ID da conta (padrão: o próprio email)
+            make_default: Se True, torna a conta padrão (a primeira conta sempre é)
+
+        Returns:
+            ID normalizado da conta
+        """
+        key = normalize_account_id(account_id or email)
+        if not key:
+            raise ValueError("ID de conta vazio")
+
+        with self._exclusive():
+            index = dict(self._index)
+            index[key] = _VaultEntry(email, bytearray(password.encode()))
+            default_account = self._default_account
+            if make_default or default_account not in index:
+                default_account = key
+            self._write(index, default_account)
+        return key
+
+    def delete(self, account_id: str) -> bool:
+        """
+        Remove uma conta e zera sua senha em memória.
+
+        Returns:
+            True se a conta existia, False caso contrário
+        """
+        key = normalize_account_id(account_id)
+        # Entrada servida pelo get() até aqui; o _load do _exclusive pode trocá-la
+        previous = self._index.get(key)
+        with self._exclusive():
+            if key not in self._index:
+                return False
+            index = dict(self._index)
+            removed = index.pop(key)
+            default_account = self._default_account
+            if default_account == key:
+                default_account = next(iter(index), None)
+            self._write(index, default_account)
+            removed.wipe()
+        if previous is not None:
+            previous.wipe()
+        return True
+
+    def clear(self):
+        """Remove todas as contas (e o arquivo) e zera as senhas em memória."""
+        previous = list(self._index.values())
+        with self._exclusive():
+            removed = list(self._index.values())
+            self._write({}, None)
+        for entry in previous + removed:
+            entry.wipe()
@@ -170,7 +170,7 @@ echo [OK] Estrutura do backend verificada.
 
 REM Testa importação do backend
 echo Testando importação do backend...
-%PYTHON_CMD% -c "import sys; sys.path.insert(0, '.'); from backend.api import app; print('[OK] Backend pode ser importado')" 2>nul
+%PYTHON_CMD% -c "from backend.api import app; print('[OK] Backend pode ser importado')" 2>nul
 if errorlevel 1 (
     echo [AVISO] Backend não pôde ser importado, mas continuando...
     echo Isso pode ser normal se houver dependências faltando.
@@ -241,7 +241,7 @@ echo.
 
 REM Testa se backend pode iniciar (sem realmente iniciar)
 echo Testando backend...
-%PYTHON_CMD% -c "import sys; sys.path.insert(0, '.'); from backend.api import app; print('[OK] Backend está funcional')" 2>nul
+%PYTHON_CMD% -c "from backend.api import app; print('[OK] Backend está funcional')" 2>nul
 if errorlevel 1 (
     echo [AVISO] Backend pode ter problemas, mas tentando iniciar mesmo assim...
 ) else (
@@ -272,7 +272,7 @@ echo.
 
 REM Inicia backend em nova janela
 echo Iniciando Backend na porta 8000...
-start "Backend API - Automação de Apontamentos" cmd /k "cd /d %PROJECT_DIR% && call venv\Scripts\activate.bat && %PYTHON_CMD% backend\server.py"
+start "Backend API - Automação de Apontamentos" cmd /k "cd /d %PROJECT_DIR% && call venv\Scripts\activate.bat && %PYTHON_CMD% -m backend.server"
 
 REM Aguarda backend iniciar
 echo Aguardando backend iniciar (5 segundos)...
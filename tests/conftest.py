@@ -0,0 +1,22 @@
+"""
+Configuração comum dos testes.
+Coloca a raiz do projeto no sys.path e aponta os arquivos do backend para um diretório
+temporário antes de qualquer import da API (o cofre, o histórico e o estado do agendador
+reais nunca são tocados).
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_workdir = Path(tempfile.mkdtemp(prefix="qualiwork-tests-"))
+os.environ['CREDENTIALS_FILE'] = str(_workdir / "credentials.encrypted")
+os.environ['HISTORY_FILE'] = str(_workdir / "history.sqlite3")
+os.environ['SCHEDULER_STATE_FILE'] = str(_workdir / "scheduler_state.json")
+os.environ['PROFILE_DIR'] = str(_workdir / "profiles")
+os.environ['SESSION_REGISTRY'] = 'memory'
+os.environ['SCHEDULE_TIME'] = ''
@@ -0,0 +1,59 @@
+"""Execução na fila desiste da espera pela sessão assim que é cancelada."""
+import asyncio
+
+import pytest
+
+from automation.cancellation import CancellationToken, RunCancelledError, acquire_unless_cancelled
+from backend.session_manager import SessionManager
+
+
+class _Controller:
+    headless = True
+    page = None
+    _initialized = False
+
+    async def close(self):
+        pass
+
+
+def test_cancel_wakes_a_run_waiting_for_the_lock():
+    async def main():
+        lock, token = asyncio.Lock(), CancellationToken()
+        await lock.acquire()
+        waiter = asyncio.ensure_future(acquire_unless_cancelled(lock, token))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        token.cancel()
+        assert await asyncio.wait_for(waiter, 1) is False
+        # O lock continua com quem o tinha e volta livre ao ser liberado
+        lock.release()
+        assert not lock.locked()
+
+    asyncio.run(main())
+
+
+def test_queued_session_is_abandoned_on_cancel_and_released():
+    async def main():
+        manager = SessionManager(max_sessions=1, controller_factory=_Controller)
+        token = CancellationToken()
+
+        async def queued():
+            async with manager.session('conta', token):
+                pytest.fail("a sessão não deveria ser obtida")
+
+        async with manager.session('conta'):
+            waiter = asyncio.ensure_future(queued())
+            await asyncio.sleep(0.01)
+            token.cancel("teste")
+            with pytest.raises(RunCancelledError, match="teste"):
+                await asyncio.wait_for(waiter, 1)
+            assert manager.get('conta').users == 1
+
+        assert not manager.get('conta').busy
+        # Já cancelada, nem cria sessão
+        with pytest.raises(RunCancelledError):
+            async with manager.session('outra', token):
+                pass
+        assert manager.get('outra') is None
+
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""Latência medida pelo governador: pausas fixas (fixed_delay) não contam."""
+import asyncio
+
+from automation.concurrency_governor import ConcurrencyGovernor, fixed_delay, governed
+
+
+class _Controller:
+    def __init__(self, governor):
+        self.governor = governor
+
+    @governed('acao')
+    async def action(self, wait_s, padding_s):
+        await asyncio.sleep(wait_s)  # Resposta da página
+        await fixed_delay(padding_s)
+        await self.nested(padding_s)
+        return True
+
+    @governed('aninhada')
+    async def nested(self, padding_s):
+        # Ação aninhada roda na vaga da externa; a pausa dela é descontada da externa
+        await fixed_delay(padding_s)
+
+
+def test_fixed_delay_is_excluded_from_action_latency():
+    governor = ConcurrencyGovernor()
+    assert asyncio.run(_Controller(governor).action(0.05, 0.2)) is True
+
+    latency = governor.snapshot()['latency']
+    assert list(latency) == ['acao']
+    assert 40 <= latency['acao']['last_ms'] < 150
+
+
+def test_fixed_delay_outside_a_slot_is_a_plain_sleep():
+    async def main():
+        started = asyncio.get_running_loop().time()
+        await fixed_delay(0.05)
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(main()) >= 0.05
@@ -0,0 +1,45 @@
+"""Senhas zeradas em memória quando a conta sai do índice do cofre."""
+from cryptography.fernet import Fernet
+
+from security.credential_vault import CredentialVault
+
+
+def _vault(tmp_path, key=Fernet.generate_key()):
+    return CredentialVault(tmp_path / ".credentials.encrypted", Fernet(key), max_staleness=0)
+
+
+def test_delete_zeroes_the_entry_served_before(tmp_path):
+    vault = _vault(tmp_path)
+    vault.put('a@x.com', 'secretA')
+    vault.put('b@x.com', 'secretB')
+    served = vault._index['a@x.com']
+
+    assert vault.delete('a@x.com') is True
+    assert bytes(served.password) == b'\x00' * len(b'secretA')
+    assert vault.get('b@x.com') == ('b@x.com', 'secretB')
+
+
+def test_clear_zeroes_every_entry(tmp_path):
+    vault = _vault(tmp_path)
+    vault.put('a@x.com', 'secretA')
+    vault.put('b@x.com', 'secretB')
+    served = list(vault._index.values())
+
+    vault.clear()
+    assert all(not any(entry.password) for entry in served)
+    assert not vault.has_accounts()
+
+
+def test_reload_keeps_unchanged_entries_and_zeroes_replaced_ones(tmp_path):
+    key = Fernet.generate_key()
+    vault, other = _vault(tmp_path, key), _vault(tmp_path, key)
+    vault.put('a@x.com', 'secretA')
+    vault.put('b@x.com', 'secretB')
+    served_a, served_b = vault._index['a@x.com'], vault._index['b@x.com']
+
+    # Outro processo troca a senha de uma conta; a releitura só substitui essa entrada
+    other.put('b@x.com', 'novaSenha')
+    assert vault.get('b@x.com') == ('b@x.com', 'novaSenha')
+    assert vault._index['a@x.com'] is served_a
+    assert bytes(served_a.password) == b'secretA'
+    assert not any(served_b.password)
@@ -0,0 +1,89 @@
+"""
+Os endpoints com trabalho de CPU (PBKDF2 e Fernet nas credenciais, geração do plano de
+horários) não podem bloquear o event loop: medido com o LoopLagMonitor durante as
+requisições.
+
+Para não depender do tempo de parede da máquina de CI, a geração do plano ganha uma
+espera bloqueante injetada (BLOCK_S), muito maior que o limite: fora do loop ela não
+aparece no atraso; no loop (controle), aparece inteira.
+"""
+import asyncio
+import time
+
+import httpx
+
+from backend import api
+from backend.async_utils import LoopLagMonitor
+from security import credential_manager
+
+# Trecho bloqueante injetado e limite do atraso: metade dele, com folga para CI carregado
+BLOCK_S = 0.5
+MAX_LAG_MS = BLOCK_S * 1000 / 2
+
+
+def _inject_blocking_plan(monkeypatch):
+    """Faz a geração do plano bloquear a thread que a executa por BLOCK_S."""
+    hours_plan = api._hours_plan
+
+    def slow_hours_plan(*args, **kwargs):
+        time.sleep(BLOCK_S)
+        return hours_plan(*args, **kwargs)
+
+    monkeypatch.setattr(api, '_hours_plan', slow_hours_plan)
+
+
+async def _exercise_endpoints(monitor: LoopLagMonitor):
+    # Chave a frio: a primeira requisição de credenciais paga a derivação PBKDF2
+    credential_manager._derive_fernet_key.cache_clear()
+    credential_manager._credential_service = None
+
+    async with api.lifespan(api.app):
+        monitor.start()
+        # Deixa o monitor armar a primeira medição antes das requisições
+        await asyncio.sleep(0)
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for index in range(3):
+                response = await client.post("/api/credentials/save", json={
+                    'email': f"user{index}@example.com", 'password': "s3cret", 'make_default': index == 0,
+                })
+                assert response.status_code == 200, response.text
+
+            response = await client.get("/api/credentials/load")
+            assert response.json()['has_credentials'] is True
+            response = await client.get("/api/credentials/accounts")
+            assert len(response.json()['accounts']) == 3
+
+            response = await client.post("/api/automation/plan", json={
+                'periods': [{'de': "01/01/2026", 'ate': "31/12/2030"}], 'seed': 42,
+            })
+            assert response.status_code == 200, response.text
+            assert len(response.json()['plan']) == 1304
+
+            response = await client.delete("/api/credentials")
+            assert response.status_code == 200, response.text
+        # Dá ao monitor ao menos uma medição depois da última requisição
+        await asyncio.sleep(monitor.interval * 2)
+        await monitor.stop()
+
+
+def test_credential_and_plan_endpoints_do_not_block_event_loop(monkeypatch):
+    _inject_blocking_plan(monkeypatch)
+    monitor = LoopLagMonitor(interval=0.005, warn_threshold_ms=MAX_LAG_MS)
+    asyncio.run(_exercise_endpoints(monitor))
+
+    assert monitor.samples > 0
+    monitor.assert_below(MAX_LAG_MS)
+
+
+def test_monitor_catches_the_same_work_run_inline(monkeypatch):
+    # Controle: com run_blocking executando na própria thread do loop, o atraso aparece
+    async def inline(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    _inject_blocking_plan(monkeypatch)
+    monkeypatch.setattr(api, 'run_blocking', inline)
+    monitor = LoopLagMonitor(interval=0.005, warn_threshold_ms=MAX_LAG_MS)
+    asyncio.run(_exercise_endpoints(monitor))
+
+    assert monitor.max_lag_ms >= BLOCK_S * 1000
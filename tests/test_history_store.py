@@ -0,0 +1,49 @@
+"""Unicidade dos apontamentos no histórico: pela chave da tarefa, com o índice como reserva."""
+from backend.history_store import SCHEMA_VERSION, HistoryStore
+
+
+def _run(run_id, periods):
+    return {'run_id': run_id, 'seed': 1, 'policy': 'padrao', 'success': True, 'errors': [],
+            'total_entries': sum(len(period['entries']) for period in periods)}
+
+
+def _period(task_key, start='09:00', task_index=0):
+    return {'de': '05/01/2026', 'ate': '05/01/2026', 'task_index': task_index, 'task_key': task_key,
+            'entries': [{'date': '05/01/2026', 'shift': 'morning', 'start': start, 'end': '12:00'}]}
+
+
+def test_different_task_keys_on_same_day_do_not_collide(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    periods = [_period('P1|J1|T1'), _period('P2|J2|T2')]
+    store.record_run(_run('a' * 32, periods), 'conta', periods)
+
+    entries = store.query_entries('conta')
+    assert sorted(entry['task_key'] for entry in entries) == ['P1|J1|T1', 'P2|J2|T2']
+
+
+def test_refill_replaces_by_key_or_by_index_without_key(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    first = [_period('P1|J1|T1'), _period(None, task_index=3)]
+    store.record_run(_run('a' * 32, first), 'conta', first)
+    # A tarefa mudou de posição na tabela: a chave continua identificando o apontamento
+    second = [_period('P1|J1|T1', start='08:55', task_index=2), _period(None, start='08:58', task_index=3)]
+    store.record_run(_run('b' * 32, second), 'conta', second)
+
+    entries = store.query_entries('conta')
+    assert len(entries) == 2
+    assert {(entry['task_key'], entry['task_index'], entry['start_time']) for entry in entries} == {
+        ('P1|J1|T1', 2, '08:55'), (None, 3, '08:58')}
+
+
+def test_schema_is_unique_on_task_key_with_index_fallback(tmp_path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    conn = store._connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    unique = [row for row in conn.execute("PRAGMA index_list(entries)") if row['unique']]
+    assert [row['name'] for row in unique] == ['idx_entries_unique']
+
+    # Sem chave, o índice da tarefa decide; com chave, o índice não importa
+    periods = [_period(None, task_index=1), _period(None, task_index=2),
+               _period('P1|J1|T1', task_index=1)]
+    store.record_run(_run('a' * 32, periods), 'conta', periods)
+    assert len(store.query_entries('conta')) == 3
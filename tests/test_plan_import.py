@@ -0,0 +1,104 @@
+"""Validação das linhas importadas e resultados parciais quando um lote não roda inteiro."""
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import asyncio
+
+import pytest
+
+from automation.cancellation import CancellationToken
+from automation.form_filler import weekdays_between
+from backend.plan_import import PlanImporter, parse_row
+from backend.session_manager import SessionLimitError
+from utils.time_generator import WorkdayPolicy
+
+HEADER = "account;task_key;date;desc_morning;desc_afternoon\n"
+
+
+class _Controller:
+    async def ensure_logged_in(self, email, password):
+        return True
+
+
+class _Filler:
+    def __init__(self, calls, on_fill=None):
+        self.calls = calls
+        self.on_fill = on_fill
+
+    async def fill_date_range(self, start, end, task_index, desc_morning, desc_afternoon, **kwargs):
+        self.calls.append((start, end))
+        if self.on_fill is not None:
+            self.on_fill()
+        dates = [day.strftime('%d/%m/%Y') for day in weekdays_between(start, end)]
+        return {'filled_dates': dates, 'errors': [], 'total_entries': 2 * len(dates),
+                'entries': [], 'cancelled': False, 'saved_dates': []}
+
+
+class _Sessions:
+    def __init__(self, full_accounts=(), on_fill=None):
+        self.full_accounts = full_accounts
+        self.calls = []
+        self.on_fill = on_fill
+
+    @asynccontextmanager
+    async def session(self, key, cancel_token=None):
+        if key in self.full_accounts:
+            raise SessionLimitError("Limite de 1 navegadores atingido")
+        yield SimpleNamespace(controller=_Controller(), form_filler=_Filler(self.calls, self.on_fill))
+
+
+def _import(sessions, text, **kwargs):
+    async def credentials(account):
+        return account or 'padrao@x.com', 'senha'
+
+    async def chunks():
+        yield text.encode()
+
+    importer = PlanImporter(sessions, credentials, lambda email, contract: WorkdayPolicy(), chunk_days=100)
+    return asyncio.run(importer.run(chunks(), 'csv', seed=1, **kwargs))
+
+
+@pytest.mark.parametrize("record, error", [
+    ({'task_key': 'P1|T1', 'date': '05/01/2026'}, "Chave de tarefa inválida"),
+    ({'task_key': 'P1||T1', 'date': '05/01/2026'}, "Chave de tarefa inválida"),
+    ({'task_key': 'P1|J1|T1', 'date': '31/02/2026'}, "Data inválida"),
+    ({'task_key': 'P1|J1|T1', 'date': '10/01/2026'}, "fim de semana"),
+])
+def test_parse_row_rejects_invalid_rows(record, error):
+    with pytest.raises(ValueError, match=error):
+        parse_row(2, {'desc_morning': 'a', 'desc_afternoon': 'b', **record})
+
+
+def test_parse_row_normalizes_task_key():
+    row = parse_row(2, {'task_key': ' P1 |J1  x| T1', 'date': '2026-01-05',
+                        'desc_morning': 'a', 'desc_afternoon': 'b'})
+    assert row.task_key == 'P1|J1 x|T1'
+
+
+def test_duplicate_dates_are_rejected_per_account():
+    result = _import(_Sessions(), HEADER + ";P|J|T;05/01/2026;a;b\n;P|J|U;05/01/2026;a;b\n", dry_run=True)
+    assert (result['accepted'], result['rejected']) == (1, 1)
+    assert "Dia repetido" in result['row_errors'][0]['error']
+
+
+def test_session_limit_keeps_results_of_other_accounts():
+    sessions = _Sessions(full_accounts={'b@x.com'})
+    result = _import(sessions, HEADER + "a@x.com;P|J|T;05/01/2026;a;b\nb@x.com;P|J|T;06/01/2026;a;b\n")
+
+    assert result['filled_days'] == 1
+    assert result['accounts']['a@x.com']['filled_days'] == 1
+    assert result['failed'] == 1
+    assert result['row_errors'] == [{'line': 3, 'error': "Limite de 1 navegadores atingido", 'date': '06/01/2026'}]
+    assert not result['success']
+
+
+def test_cancel_lists_the_ranges_that_never_ran():
+    token = CancellationToken()
+    sessions = _Sessions(on_fill=token.cancel)
+    # Duas tarefas: dois intervalos; o cancelamento chega durante o primeiro
+    text = HEADER + ";P|J|T;05/01/2026;a;b\n;P|J|T;06/01/2026;a;b\n;P|J|U;07/01/2026;a;b\n"
+    result = _import(sessions, text, cancel_token=token)
+
+    assert len(sessions.calls) == 1
+    assert result['cancelled'] and result['filled_days'] == 2
+    assert result['row_errors'] == [{'line': 4, 'error': "Cancelado antes do preenchimento",
+                                     'date': '07/01/2026'}]
@@ -0,0 +1,55 @@
+"""Despejo LRU: o navegador é fechado fora do lock do registro e a sessão é liberada."""
+import asyncio
+
+from backend.session_manager import SessionManager
+
+
+class _Controller:
+    headless = True
+    page = None
+    _initialized = False
+    close_started: asyncio.Event
+    close_delay = 0.0
+
+    async def close(self):
+        self.close_started.set()
+        await asyncio.sleep(self.close_delay)
+
+
+def test_slow_eviction_does_not_block_other_sessions():
+    async def main():
+        released = []
+
+        async def on_evict(key):
+            released.append(key)
+
+        close_started = asyncio.Event()
+
+        def factory():
+            controller = _Controller()
+            controller.close_started = close_started
+            controller.close_delay = 0.5
+            return controller
+
+        manager = SessionManager(max_sessions=2, controller_factory=factory, on_evict=on_evict)
+        for key in ('a', 'b'):
+            async with manager.session(key):
+                pass
+
+        async def use(key):
+            async with manager.session(key):
+                pass
+
+        # 'c' despeja 'a' (LRU) e espera o fechamento lento; 'b' já existe e não espera
+        evicting = asyncio.ensure_future(use('c'))
+        await close_started.wait()
+        started = asyncio.get_running_loop().time()
+        await asyncio.wait_for(use('b'), 1)
+        assert asyncio.get_running_loop().time() - started < 0.1
+        assert not evicting.done()
+
+        await evicting
+        assert released == ['a']
+        assert [session['key'] for session in manager.list_sessions()] == ['c', 'b']
+
+    asyncio.run(main())
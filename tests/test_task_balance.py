@@ -0,0 +1,85 @@
+"""Leitura das horas da tabela de tarefas, conferência de saldo e distribuição por saldo."""
+import pytest
+
+from utils.task_balance import (
+    BalanceError, TaskBalance, check_plan_balances, format_minutes, parse_hours, spread_by_balance,
+)
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("12:30", 750),
+    ("120:05", 7205),
+    ("-3:15", -195),
+    ("0:00", 0),
+    ("12,5", 750),
+    ("12.5", 750),
+    ("1.234,5", 74070),
+    ("1,234.5", 74070),
+    (" 8h ", 480),
+    ("-2", -120),
+])
+def test_parse_hours(text, minutes):
+    assert parse_hours(text) == minutes
+
+
+@pytest.mark.parametrize("text", [None, "", "  ", "-", "--", "abc", "12:xx"])
+def test_parse_hours_unreadable(text):
+    assert parse_hours(text) is None
+
+
+def test_format_minutes():
+    assert format_minutes(750) == "12:30"
+    assert format_minutes(-195) == "-03:15"
+
+
+def test_balance_from_task_computes_missing_saldo():
+    balance = TaskBalance.from_task({'key': 'P|J|T', 'horas_liberadas': '40:00',
+                                     'horas_apontadas': '12,5', 'saldo': ''})
+    assert balance.remaining == 2400 - 750
+
+
+def test_check_plan_balances_flags_overbooking_and_unknown():
+    balances = {'a': TaskBalance('a', None, None, 600), 'b': TaskBalance('b', None, None, None)}
+    report = check_plan_balances({'a': 900, 'b': 100, 'c': 100}, balances)
+    assert not report['ok']
+    assert report['over'] == ['a']
+    assert report['unknown'] == ['b', 'c']
+    assert report['tasks'][0]['excess_minutes'] == 300
+
+
+@pytest.mark.parametrize("remaining", [0, -120, None])
+def test_spread_ignores_tasks_without_positive_saldo(remaining):
+    balances = [TaskBalance('vazia', None, None, remaining), TaskBalance('ok', None, None, 5000)]
+    assert spread_by_balance([480] * 5, balances) == [('ok', 0, 5)]
+
+
+def test_spread_ignores_tasks_smaller_than_the_shortest_day():
+    balances = [TaskBalance('pequena', None, None, 300), TaskBalance('ok', None, None, 5000)]
+    assert spread_by_balance([480] * 5, balances) == [('ok', 0, 5)]
+
+
+@pytest.mark.parametrize("remaining", [0, -60])
+def test_spread_without_any_positive_saldo_raises(remaining):
+    with pytest.raises(BalanceError):
+        spread_by_balance([480] * 3, [TaskBalance('a', None, None, remaining)])
+
+
+def test_spread_raises_when_total_exceeds_summed_balance():
+    balances = [TaskBalance('a', None, None, 1000), TaskBalance('b', None, None, 900)]
+    with pytest.raises(BalanceError, match="excede o saldo somado"):
+        spread_by_balance([480] * 4, balances)
+
+
+def test_spread_is_proportional_and_never_exceeds_a_balance():
+    days = [480, 470, 490, 480, 485, 475, 480, 480, 495, 465]
+    balances = [TaskBalance('a', None, None, 3000), TaskBalance('b', None, None, 1500),
+                TaskBalance('c', None, None, 600)]
+    blocks = spread_by_balance(days, balances)
+
+    # Blocos contíguos, na ordem das tarefas, cobrindo todos os dias
+    assert [key for key, _, _ in blocks] == ['a', 'b', 'c']
+    assert blocks[0][1] == 0 and blocks[-1][2] == len(days)
+    assert all(blocks[i][2] == blocks[i + 1][1] for i in range(len(blocks) - 1))
+    remaining = {balance.key: balance.remaining for balance in balances}
+    for key, start, end in blocks:
+        assert sum(days[start:end]) <= remaining[key]
@@ -0,0 +1,95 @@
+"""Tabela pré-calculada de horários, determinismo por (semente, data) e políticas compiladas."""
+import itertools
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from utils.time_generator import (
+    WorkdayPolicy, compile_policy, generate_daily_hours, generate_hours_for_dates,
+    minutes_to_time, time_to_minutes, validate_hours, validate_hours_batch,
+)
+
+# Mesmo contrato de workday_policies.example.json
+SHORT_DAY = WorkdayPolicy.from_dict("turno-6h", {
+    'afternoon_end': ["16:00", "16:15"],
+    'total_minutes': [345, 375],
+})
+
+DATES = [date(2026, 1, 1) + timedelta(days=offset) for offset in range(400)]
+
+
+def _window(window):
+    return range(time_to_minutes(window[0]), time_to_minutes(window[1]) + 1)
+
+
+def _brute_force_count(policy):
+    """Conta as tuplas válidas testando todas as combinações de minutos das janelas."""
+    compiled = compile_policy(policy)
+    combinations = itertools.product(_window(policy.morning_start), _window(policy.morning_end),
+                                     _window(policy.afternoon_start), _window(policy.afternoon_end))
+    return sum(compiled.validate_minutes(*minutes)[0] for minutes in combinations)
+
+
+@pytest.mark.parametrize("policy", [WorkdayPolicy(), SHORT_DAY], ids=lambda policy: policy.name)
+def test_every_table_tuple_passes_validate_hours(policy):
+    compiled = compile_policy(policy)
+    for index in range(compiled.count):
+        hours = compiled.hours_from_index(index)
+        valid, message = validate_hours(hours['morning']['start'], hours['morning']['end'],
+                                        hours['afternoon']['start'], hours['afternoon']['end'],
+                                        policy=policy)
+        assert valid, (index, hours, message)
+
+
+@pytest.mark.parametrize("policy", [WorkdayPolicy(), SHORT_DAY], ids=lambda policy: policy.name)
+def test_table_size_matches_brute_force(policy):
+    compiled = compile_policy(policy)
+    assert len(compiled.table) == 4 * compiled.count
+    assert compiled.count == _brute_force_count(policy)
+    # Sem tuplas repetidas
+    tuples = {tuple(compiled.table[4 * index:4 * index + 4]) for index in range(compiled.count)}
+    assert len(tuples) == compiled.count
+
+
+def test_same_date_and_seed_give_same_hours():
+    assert generate_hours_for_dates(DATES, seed=1234) == generate_hours_for_dates(DATES, seed=1234)
+
+
+def test_hours_of_a_date_do_not_depend_on_the_other_dates():
+    full = generate_hours_for_dates(DATES, seed=1234)
+    # Refazer só alguns dias (ex.: os que falharam) produz os mesmos horários, em qualquer ordem
+    subset = DATES[250:260][::-1]
+    assert generate_hours_for_dates(subset, seed=1234) == full[250:260][::-1]
+
+
+def test_different_seeds_give_different_plans():
+    assert generate_hours_for_dates(DATES, seed=1) != generate_hours_for_dates(DATES, seed=2)
+
+
+def test_generated_hours_honour_compiled_policy():
+    plan = generate_hours_for_dates(DATES, seed=99, policy=SHORT_DAY)
+    assert all(valid for valid, _ in validate_hours_batch(plan, policy=SHORT_DAY))
+    for hours in plan:
+        assert time_to_minutes(hours['afternoon']['end']) in _window(SHORT_DAY.afternoon_end)
+    # Horários do turno de 6h não passam na política padrão
+    assert not any(valid for valid, _ in validate_hours_batch(plan))
+
+
+def test_generate_daily_hours_uses_given_rng_and_policy():
+    first = [generate_daily_hours(SHORT_DAY, random.Random(7)) for _ in range(5)]
+    second = [generate_daily_hours(SHORT_DAY, random.Random(7)) for _ in range(5)]
+    assert first == second
+    assert all(valid for valid, _ in validate_hours_batch(first, policy=SHORT_DAY))
+
+
+def test_compile_policy_is_cached_and_rejects_impossible_policies():
+    assert compile_policy(WorkdayPolicy()) is WorkdayPolicy().compile()
+    with pytest.raises(ValueError):
+        compile_policy(WorkdayPolicy(name="impossivel", total_minutes=(600, 620)))
+    with pytest.raises(ValueError):
+        compile_policy(WorkdayPolicy(name="invertida", morning_start=("09:00", "08:00")))
+
+
+def test_minutes_round_trip():
+    assert all(time_to_minutes(minutes_to_time(minutes)) == minutes for minutes in range(24 * 60))
@@ -0,0 +1,213 @@
+"""
+Saldo de horas das tarefas.
+Converte as colunas de horas da tabela de tarefas (liberadas, apontadas, saldo) em minutos,
+confere o total de um plano contra o saldo de cada tarefa e distribui os dias de um período
+entre várias tarefas na proporção do saldo restante.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.time_generator import time_to_minutes
+
+
+class BalanceError(ValueError):
+    """O plano não cabe no saldo das tarefas."""
+
+
+def parse_hours(text: Optional[str]) -> Optional[int]:
+    """
+    Converte um valor de horas da tabela de tarefas em minutos.
+
+    Aceita "HH:MM" ("120:30"), horas decimais com vírgula ou ponto ("12,5", "12.5",
+    "1.234,5") e sinal negativo (saldo estourado). Sufixo "h" e espaços são ignorados.
+
+    Args:
+        text: Valor exibido na tabela
+
+    Returns:
+        Minutos (arredondados), ou None se vazio ou ilegível
+    """
+    if text is None:
+        return None
+    value = text.strip().lower().rstrip('h').replace(' ', '')
+    if not value or value in ('-', '--'):
+        return None
+    sign = -1 if value.startswith('-') else 1
+    value = value.lstrip('+-')
+    try:
+        if ':' in value:
+            hours, minutes = value.split(':', 1)
+            return sign * time_to_minutes(f"{hours.replace('.', '') or 0}:{minutes}")
+        if ',' in value and '.' in value:
+            # O último separador é o decimal; o outro separa milhares
+            if value.rfind(',') > value.rfind('.'):
+                value = value.replace('.', '').replace(',', '.')
+            else:
+                value = value.replace(',', '')
+        else:
+            value = value.replace(',', '.')
+        return sign * round(float(value) * 60)
+    except ValueError:
+        return None
+
+
+def format_minutes(minutes: int) -> str:
+    """Formata minutos como horas ("HH:MM", com sinal se negativo)."""
+    sign = '-' if minutes < 0 else ''
+    hours, mins = divmod(abs(minutes), 60)
+    return f"{sign}{hours:02d}:{mins:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class TaskBalance:
+    """Horas de uma tarefa em minutos (None quando a célula não pôde ser lida)."""
+    key: str
+    released: Optional[int]
+    booked: Optional[int]
+    remaining: Optional[int]
+
+    @classmethod
+    def from_task(cls, task: Dict[str, str]) -> "TaskBalance":
+        """
+        Lê as colunas de horas de uma tarefa de get_available_tasks.
+
+        Se o saldo não puder ser lido, é calculado como liberadas - apontadas.
+        """
+        released = parse_hours(task.get('horas_liberadas'))
+        booked = parse_hours(task.get('horas_apontadas'))
+        remaining = parse_hours(task.get('saldo'))
+        if remaining is None and released is not None and booked is not None:
+            remaining = released - booked
+        return cls(task['key'], released, booked, remaining)
+
+    def describe(self) -> Dict[str, Optional[int]]:
+        """Minutos de cada coluna, para as respostas da API."""
+        return {
+            'horas_liberadas_min': self.released,
+            'horas_apontadas_min': self.booked,
+            'saldo_min': self.remaining,
+        }
+
+
+def day_minutes(daily_hours: Dict[str, Dict[str, str]]) -> int:
+    """Minutos trabalhados em um dia no formato de generate_daily_hours."""
+    return sum(time_to_minutes(daily_hours[shift]['end']) - time_to_minutes(daily_hours[shift]['start'])
+               for shift in ('morning', 'afternoon'))
+
+
+def check_plan_balances(plan_minutes: Dict[str, int],
+                        balances: Dict[str, TaskBalance]) -> Dict[str, object]:
+    """
+    Confere o total planejado de cada tarefa contra o saldo dela.
+
+    Args:
+        plan_minutes: Minutos planejados por chave de tarefa (somando todos os períodos)
+        balances: Saldos por chave de tarefa
+
+    Returns:
+        {
+            'ok': bool,  # False se alguma tarefa estoura o saldo
+            'tasks': [{'task_key', 'plan_minutes', 'saldo_minutes', 'excess_minutes'}],
+            'over': [chaves que estouram o saldo],
+            'unknown': [chaves sem saldo legível (não conferidas)]
+        }
+    """
+    tasks = []
+    over = []
+    unknown = []
+    for key, minutes in plan_minutes.items():
+        balance = balances.get(key)
+        remaining = balance.remaining if balance is not None else None
+        excess = max(0, minutes - remaining) if remaining is not None else None
+        if remaining is None:
+            unknown.append(key)
+        elif excess:
+            over.append(key)
+        tasks.append({'task_key': key, 'plan_minutes': minutes, 'saldo_minutes': remaining,
+                      'excess_minutes': excess})
+    return {'ok': not over, 'tasks': tasks, 'over': over, 'unknown': unknown}
+
+
+def describe_overbooking(report: Dict[str, object]) -> str:
+    """Mensagem legível das tarefas que estouram o saldo em um relatório de check_plan_balances."""
+    parts = [
+        f"{task['task_key']}: plano {format_minutes(task['plan_minutes'])}, "
+        f"saldo {format_minutes(task['saldo_minutes'])}"
+        for task in report['tasks'] if task['task_key'] in report['over']
+    ]
+    return "Plano excede o saldo de horas: " + "; ".join(parts)
+
+
+def spread_by_balance(minutes_per_day: Sequence[int],
+                      balances: Iterable[TaskBalance]) -> List[Tuple[str, int, int]]:
+    """
+    Distribui dias consecutivos entre tarefas na proporção do saldo restante.
+
+    Cada tarefa recebe um bloco contíguo de dias (uma troca de tarefa por bloco, como
+    períodos separados), na ordem informada. As fronteiras seguem o total acumulado de
+    minutos e depois são ajustadas para nenhum bloco passar do saldo da sua tarefa.
+
+    Args:
+        minutes_per_day: Minutos planejados de cada dia, em ordem
+        balances: Tarefas candidatas (as sem saldo para um dia inteiro são ignoradas)
+
+    Returns:
+        Lista de (chave da tarefa, índice do primeiro dia, índice após o último dia), sem
+        blocos vazios
+
+    Raises:
+        BalanceError: Nenhuma tarefa com saldo, ou o total não cabe no saldo somado
+    """
+    # Tarefas com saldo menor que o dia mais curto não comportam nenhum dia
+    shortest = min(minutes_per_day, default=1)
+    eligible = [balance for balance in balances
+                if balance.remaining is not None and balance.remaining >= max(shortest, 1)]
+    if not eligible:
+        raise BalanceError("Nenhuma das tarefas tem saldo para um dia inteiro")
+    total = sum(minutes_per_day)
+    capacity = sum(balance.remaining for balance in eligible)
+    if total > capacity:
+        raise BalanceError(f"Plano de {format_minutes(total)} excede o saldo somado das tarefas "
+                           f"({format_minutes(capacity)})")
+
+    # Cada dia vai para a tarefa cuja fatia do total acumulado contém o meio do dia
+    cuts = []
+    accumulated = 0
+    for balance in eligible:
+        accumulated += balance.remaining
+        cuts.append(total * accumulated / capacity)
+    sizes = [0] * len(eligible)
+    elapsed = 0
+    task = 0
+    for minutes in minutes_per_day:
+        middle = elapsed + minutes / 2
+        while task < len(cuts) - 1 and middle >= cuts[task]:
+            task += 1
+        sizes[task] += 1
+        elapsed += minutes
+
+    def block_minutes(position: int) -> int:
+        start = sum(sizes[:position])
+        return sum(minutes_per_day[start:start + sizes[position]])
+
+    # Arredondar para dias inteiros pode estourar um saldo em até meio dia: empurra o
+    # excesso para a tarefa seguinte e, se a última estourar, devolve em cascata para as
+    # anteriores
+    for position in range(len(eligible) - 1):
+        while sizes[position] and block_minutes(position) > eligible[position].remaining:
+            sizes[position] -= 1
+            sizes[position + 1] += 1
+    for position in range(len(eligible) - 1, 0, -1):
+        while sizes[position] and block_minutes(position) > eligible[position].remaining:
+            sizes[position] -= 1
+            sizes[position - 1] += 1
+
+    blocks = []
+    start = 0
+    for position, (balance, size) in enumerate(zip(eligible, sizes)):
+        if block_minutes(position) > balance.remaining:
+            raise BalanceError(f"Não foi possível distribuir os dias sem estourar o saldo de {balance.key}")
+        if size:
+            blocks.append((balance.key, start, start + size))
+        start += size
+    return blocks
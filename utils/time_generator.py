@@ -3,8 +3,12 @@ Gerador de horários aleatórios para apontamentos.
 Gera horários respeitando intervalos e validações especificadas.
 """
 import random
-from datetime import datetime, timedelta
-from typing import Dict
+import secrets
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 
 def time_to_minutes(time_str: str) -> int:
@@ -36,13 +40,50 @@ def minutes_to_time(minutes: int) -> str:
     return f"{hours:02d}:{mins:02d}"
 
 
-def random_time_in_range(start_str: str, end_str: str) -> str:
+# Gerador sem estado compartilhado, usado quando nenhuma semente/gerador é informado.
+# Nenhuma função deste módulo usa o estado global de `random`.
+_SYSTEM_RNG = random.SystemRandom()
+
+_MASK_64 = (1 << 64) - 1
+
+
+def new_seed() -> int:
+    """
+    Gera uma semente nova para uma execução.
+    
+    Returns:
+        Inteiro de 63 bits (cabe em INTEGER do SQLite e em JSON sem perda)
+    """
+    return secrets.randbits(63)
+
+
+def _mix64(value: int) -> int:
+    """Finalizador do SplitMix64: espalha bits de forma determinística e barata."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
+
+
+def _index_for_date(seed: int, day: date, count: int) -> int:
+    """
+    Índice da tabela para uma data, derivado apenas de (semente, data).
+    
+    Não depende da ordem nem de quais outras datas são geradas na mesma chamada:
+    refazer só os dias que faltaram após uma falha produz exatamente os mesmos horários.
+    """
+    return _mix64(_mix64(seed & _MASK_64) ^ day.toordinal()) % count
+
+
+def random_time_in_range(start_str: str, end_str: str,
+                         rng: Optional[random.Random] = None) -> str:
     """
     Gera um horário aleatório dentro de um intervalo.
     
     Args:
         start_str: Hora inicial no formato "HH:MM"
         end_str: Hora final no formato "HH:MM"
+        rng: Gerador aleatório a usar (padrão: entropia do sistema, sem estado global)
         
     Returns:
         Hora aleatória no formato "HH:MM"
@@ -55,7 +96,7 @@ def random_time_in_range(start_str: str, end_str: str) -> str:
         end_minutes += 24 * 60
     
     # Gera um horário aleatório no intervalo
-    random_minutes = random.randint(start_minutes, end_minutes)
+    random_minutes = (rng or _SYSTEM_RNG).randint(start_minutes, end_minutes)
     
     # Normaliza para o mesmo dia (0-1439 minutos)
     random_minutes = random_minutes % (24 * 60)
@@ -63,15 +104,235 @@ def random_time_in_range(start_str: str, end_str: str) -> str:
     return minutes_to_time(random_minutes)
 
 
-def generate_daily_hours() -> Dict[str, Dict[str, str]]:
+# Limite de tuplas na tabela pré-calculada de uma política (protege contra janelas
+# largas demais, que gerariam tabelas enormes)
+MAX_TABLE_ENTRIES = 1_000_000
+
+
+@dataclass(frozen=True)
+class WorkdayPolicy:
+    """
+    Regras de horário de um dia de trabalho (por conta ou por contrato).
+    
+    Janelas são pares ("HH:MM", "HH:MM") com limites inclusivos; intervalos de almoço
+    e de total trabalhado (manhã + tarde) são pares de minutos (mínimo, máximo).
+    """
+    name: str = "padrao"
+    morning_start: Tuple[str, str] = ("08:55", "09:00")
+    morning_end: Tuple[str, str] = ("12:00", "12:15")
+    afternoon_start: Tuple[str, str] = ("13:00", "13:15")
+    afternoon_end: Tuple[str, str] = ("18:00", "18:15")
+    lunch_minutes: Tuple[int, int] = (45, 75)
+    total_minutes: Tuple[int, int] = (465, 495)
+    
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> "WorkdayPolicy":
+        """
+        Cria uma política a partir de um dicionário de configuração.
+        
+        Campos ausentes usam os valores da política padrão.
+        
+        Args:
+            name: Nome da política (ex: "meio-periodo")
+            data: Dicionário com os campos da política
+            
+        Returns:
+            WorkdayPolicy correspondente
+        """
+        known_fields = {f for f in cls.__dataclass_fields__ if f != 'name'}
+        unknown = set(data) - known_fields
+        if unknown:
+            raise ValueError(f"Política '{name}': campos desconhecidos {sorted(unknown)}")
+        values = {key: tuple(value) for key, value in data.items()}
+        for key, value in values.items():
+            if len(value) != 2:
+                raise ValueError(f"Política '{name}': '{key}' deve ter exatamente 2 valores")
+        return cls(name=name, **values)
+    
+    def compile(self) -> "CompiledWorkdayPolicy":
+        """Compila a política em limites inteiros (resultado em cache por política)."""
+        return compile_policy(self)
+
+
+@dataclass(frozen=True)
+class CompiledWorkdayPolicy:
+    """
+    Política compilada em limites inteiros (minutos desde meia-noite).
+    
+    Compartilhada pelo gerador e pelo validador; inclui a tabela de todas as tuplas
+    (início manhã, fim manhã, início tarde, fim tarde) válidas.
+    """
+    policy: WorkdayPolicy
+    morning_start: Tuple[int, int]
+    morning_end: Tuple[int, int]
+    afternoon_start: Tuple[int, int]
+    afternoon_end: Tuple[int, int]
+    lunch_minutes: Tuple[int, int]
+    total_minutes: Tuple[int, int]
+    table: array = field(repr=False)
+    
+    @property
+    def count(self) -> int:
+        """Quantidade de tuplas válidas."""
+        return len(self.table) // 4
+    
+    def hours_from_index(self, index: int) -> Dict[str, Dict[str, str]]:
+        """Monta o dicionário de horários a partir de um índice da tabela."""
+        base = 4 * index
+        return {
+            'morning': {
+                'start': minutes_to_time(self.table[base]),
+                'end': minutes_to_time(self.table[base + 1])
+            },
+            'afternoon': {
+                'start': minutes_to_time(self.table[base + 2]),
+                'end': minutes_to_time(self.table[base + 3])
+            }
+        }
+    
+    def validate_minutes(self, morning_start: int, morning_end: int,
+                         afternoon_start: int, afternoon_end: int) -> Tuple[bool, str]:
+        """
+        Valida horários já convertidos para minutos contra os limites compilados.
+        
+        Returns:
+            Tupla (é_válido, mensagem_erro)
+        """
+        policy = self.policy
+        
+        if not (self.morning_start[0] <= morning_start <= self.morning_start[1]):
+            return False, f"Início da manhã fora do intervalo permitido ({_window_label(policy.morning_start)})"
+        
+        if not (self.morning_end[0] <= morning_end <= self.morning_end[1]):
+            return False, f"Fim da manhã fora do intervalo permitido ({_window_label(policy.morning_end)})"
+        
+        if not (self.afternoon_start[0] <= afternoon_start <= self.afternoon_start[1]):
+            return False, f"Início da tarde fora do intervalo permitido ({_window_label(policy.afternoon_start)})"
+        
+        if not (self.afternoon_end[0] <= afternoon_end <= self.afternoon_end[1]):
+            return False, f"Fim da tarde fora do intervalo permitido ({_window_label(policy.afternoon_end)})"
+        
+        # Valida intervalo entre fim manhã e início tarde
+        interval_minutes = afternoon_start - morning_end
+        if interval_minutes < 0:
+            interval_minutes += 24 * 60
+        
+        lunch_min, lunch_max = self.lunch_minutes
+        if not (lunch_min <= interval_minutes <= lunch_max):
+            return False, (f"Intervalo entre fim manhã e início tarde inválido: {interval_minutes}min "
+                           f"(deve ser {lunch_min}-{lunch_max}min, entre "
+                           f"{policy.morning_end[0]}-{policy.afternoon_start[1]})")
+        
+        # Valida total trabalhado no dia (manhã + tarde)
+        total_minutes = (morning_end - morning_start) + (afternoon_end - afternoon_start)
+        total_min, total_max = self.total_minutes
+        if not (total_min <= total_minutes <= total_max):
+            return False, (f"Total de horas do dia inválido: {total_minutes}min "
+                           f"(deve ser {total_min}-{total_max}min)")
+        
+        return True, "Horários válidos"
+
+
+def _window_label(window: Tuple[str, str]) -> str:
+    """Formata uma janela ("HH:MM", "HH:MM") para mensagens."""
+    return f"{window[0]}-{window[1]}"
+
+
+def _parse_window(label: str, window: Tuple[str, str]) -> Tuple[int, int]:
+    """Converte uma janela ("HH:MM", "HH:MM") em minutos, validando a ordem."""
+    start, end = time_to_minutes(window[0]), time_to_minutes(window[1])
+    if start > end:
+        raise ValueError(f"Janela '{label}' inválida: {window[0]} é posterior a {window[1]}")
+    return start, end
+
+
+def _build_valid_table(morning_start: Tuple[int, int], morning_end: Tuple[int, int],
+                       afternoon_start: Tuple[int, int], afternoon_end: Tuple[int, int],
+                       lunch: Tuple[int, int], total: Tuple[int, int]) -> array:
+    """
+    Enumera todas as tuplas (início manhã, fim manhã, início tarde, fim tarde) válidas.
+    
+    Para cada combinação de início manhã, fim manhã e início tarde com almoço válido,
+    os fins de tarde que respeitam o total do dia formam um intervalo contínuo, então
+    não é preciso testar cada minuto da última janela.
+    
+    Returns:
+        Array plano de minutos com 4 valores por tupla
+    """
+    table = array('H')
+    for m_start in range(morning_start[0], morning_start[1] + 1):
+        for m_end in range(max(morning_end[0], m_start + 1), morning_end[1] + 1):
+            morning_minutes = m_end - m_start
+            for a_start in range(afternoon_start[0], afternoon_start[1] + 1):
+                if not (lunch[0] <= a_start - m_end <= lunch[1]):
+                    continue
+                # Total trabalhado = manhã + tarde, limitado por total
+                first_end = max(afternoon_end[0], a_start + 1,
+                                a_start + total[0] - morning_minutes)
+                last_end = min(afternoon_end[1], a_start + total[1] - morning_minutes)
+                for a_end in range(first_end, last_end + 1):
+                    table.extend((m_start, m_end, a_start, a_end))
+                if len(table) > 4 * MAX_TABLE_ENTRIES:
+                    raise ValueError("Janelas largas demais: tabela de horários excede o limite")
+    return table
+
+
+@lru_cache(maxsize=None)
+def compile_policy(policy: WorkdayPolicy) -> CompiledWorkdayPolicy:
+    """
+    Compila uma política em limites inteiros e pré-calcula a tabela de tuplas válidas.
+    
+    O resultado fica em cache: cada política é compilada uma única vez por processo.
+    Sortear um índice uniforme da tabela equivale a sortear uma tupla uniforme entre
+    todas as válidas, em O(1) e sempre com resultado válido.
+    
+    Args:
+        policy: Política a compilar
+        
+    Returns:
+        CompiledWorkdayPolicy
+        
+    Raises:
+        ValueError: Se a política for inconsistente ou não admitir nenhum horário
+    """
+    bounds = {
+        'morning_start': _parse_window('morning_start', policy.morning_start),
+        'morning_end': _parse_window('morning_end', policy.morning_end),
+        'afternoon_start': _parse_window('afternoon_start', policy.afternoon_start),
+        'afternoon_end': _parse_window('afternoon_end', policy.afternoon_end),
+        'lunch_minutes': tuple(int(v) for v in policy.lunch_minutes),
+        'total_minutes': tuple(int(v) for v in policy.total_minutes),
+    }
+    table = _build_valid_table(bounds['morning_start'], bounds['morning_end'],
+                               bounds['afternoon_start'], bounds['afternoon_end'],
+                               bounds['lunch_minutes'], bounds['total_minutes'])
+    if not table:
+        raise ValueError(f"Política '{policy.name}' não admite nenhum horário válido")
+    return CompiledWorkdayPolicy(policy=policy, table=table, **bounds)
+
+
+DEFAULT_POLICY = WorkdayPolicy()
+
+
+def _compiled(policy: Optional[WorkdayPolicy]) -> CompiledWorkdayPolicy:
+    """Retorna a política compilada (padrão se None)."""
+    return compile_policy(policy or DEFAULT_POLICY)
+
+
+def generate_daily_hours(policy: Optional[WorkdayPolicy] = None,
+                         rng: Optional[random.Random] = None) -> Dict[str, Dict[str, str]]:
     """
     Gera horários aleatórios para um dia completo de trabalho.
     
-    Retorna horários que respeitam:
+    Com a política padrão, retorna horários que respeitam:
     - Manhã: Início entre 08:55-09:00, Fim entre 12:00-12:15
     - Tarde: Início entre 13:00-13:15, Fim entre 18:00-18:15
     - Intervalo entre fim manhã e início tarde: ~1h (45min a 1h15min, entre 12:00-13:15)
-    - Total do dia: ~8h (480 minutos ± 15min de tolerância)
+    - Total trabalhado no dia (manhã + tarde): ~8h (480 minutos ± 15min de tolerância)
+    
+    Args:
+        policy: Política de horários (padrão se None)
+        rng: Gerador aleatório a usar (padrão: entropia do sistema, sem estado global)
     
     Returns:
         Dicionário com horários formatados:
@@ -80,63 +341,37 @@ def generate_daily_hours() -> Dict[str, Dict[str, str]]:
             'afternoon': {'start': 'HH:MM', 'end': 'HH:MM'}
         }
     """
-    max_attempts = 200
-    attempt = 0
+    compiled = _compiled(policy)
+    return compiled.hours_from_index((rng or _SYSTEM_RNG).randrange(compiled.count))
+
+
+def generate_hours_for_dates(dates: Sequence[date], seed: Optional[int] = None,
+                             policy: Optional[WorkdayPolicy] = None) -> List[Dict[str, Dict[str, str]]]:
+    """
+    Gera horários para vários dias de uma vez (mês, ano ou qualquer lista de datas).
     
-    while attempt < max_attempts:
-        # Gera horários da manhã: início entre 08:55-09:00, fim entre 12:00-12:15
-        morning_start_min = random.randint(time_to_minutes("08:55"), time_to_minutes("09:00"))
-        morning_end_min = random.randint(time_to_minutes("12:00"), time_to_minutes("12:15"))
-        
-        # Gera horários da tarde: início entre 13:00-13:15, fim entre 18:00-18:15
-        afternoon_start_min = random.randint(time_to_minutes("13:00"), time_to_minutes("13:15"))
-        afternoon_end_min = random.randint(time_to_minutes("18:00"), time_to_minutes("18:15"))
-        
-        # Valida intervalo entre fim manhã e início tarde (deve ser ~1h)
-        # O intervalo está entre 12:00-13:15, então pode variar de 45min a 1h15min
-        interval_minutes = afternoon_start_min - morning_end_min
-        
-        # Valida intervalo: deve estar entre 45min e 1h15min (75min)
-        if not (45 <= interval_minutes <= 75):
-            attempt += 1
-            continue
-        
-        # Valida total do dia (início manhã até fim tarde)
-        total_minutes = afternoon_end_min - morning_start_min
-        
-        # Valida total: deve ser aproximadamente 8h (480 minutos ± 15min de tolerância)
-        # Isso permite variação de 7h45min (465min) a 8h15min (495min)
-        if not (465 <= total_minutes <= 495):
-            attempt += 1
-            continue
-        
-        # Se passou todas as validações, retorna os horários
-        return {
-            'morning': {
-                'start': minutes_to_time(morning_start_min),
-                'end': minutes_to_time(morning_end_min)
-            },
-            'afternoon': {
-                'start': minutes_to_time(afternoon_start_min),
-                'end': minutes_to_time(afternoon_end_min)
-            }
-        }
+    Os horários de cada data dependem apenas de (semente, política, data): o mesmo
+    plano pode ser reconstruído a qualquer momento guardando só a semente da execução,
+    e execuções concorrentes não compartilham nenhum estado aleatório.
     
-    # Se não conseguiu gerar após várias tentativas, retorna valores padrão válidos (8h exatas)
-    return {
-        'morning': {
-            'start': '09:00',
-            'end': '12:00'
-        },
-        'afternoon': {
-            'start': '13:00',
-            'end': '18:00'
-        }
-    }
+    Args:
+        dates: Datas a gerar (a ordem é preservada no resultado)
+        seed: Semente da execução (ver new_seed); se None, usa uma semente nova
+        policy: Política de horários (padrão se None)
+        
+    Returns:
+        Lista de horários no mesmo formato de generate_daily_hours, alinhada com dates
+    """
+    compiled = _compiled(policy)
+    if seed is None:
+        seed = new_seed()
+    count = compiled.count
+    return [compiled.hours_from_index(_index_for_date(seed, day, count)) for day in dates]
 
 
 def validate_hours(morning_start: str, morning_end: str, 
-                  afternoon_start: str, afternoon_end: str) -> tuple[bool, str]:
+                  afternoon_start: str, afternoon_end: str,
+                  policy: Optional[WorkdayPolicy] = None) -> tuple[bool, str]:
     """
     Valida se os horários gerados estão dentro dos parâmetros esperados.
     
@@ -145,45 +380,38 @@ def validate_hours(morning_start: str, morning_end: str,
         morning_end: Fim da manhã (HH:MM)
         afternoon_start: Início da tarde (HH:MM)
         afternoon_end: Fim da tarde (HH:MM)
+        policy: Política de horários (padrão se None)
         
     Returns:
         Tupla (é_válido, mensagem_erro)
     """
-    morning_start_min = time_to_minutes(morning_start)
-    morning_end_min = time_to_minutes(morning_end)
-    afternoon_start_min = time_to_minutes(afternoon_start)
-    afternoon_end_min = time_to_minutes(afternoon_end)
-    
-    # Valida intervalo manhã (08:55-09:00 para início, 12:00-12:15 para fim)
-    if not (time_to_minutes("08:55") <= morning_start_min <= time_to_minutes("09:00")):
-        return False, "Início da manhã fora do intervalo permitido (08:55-09:00)"
-    
-    if not (time_to_minutes("12:00") <= morning_end_min <= time_to_minutes("12:15")):
-        return False, "Fim da manhã fora do intervalo permitido (12:00-12:15)"
-    
-    # Valida intervalo tarde (13:00-13:15 para início, 18:00-18:15 para fim)
-    if not (time_to_minutes("13:00") <= afternoon_start_min <= time_to_minutes("13:15")):
-        return False, "Início da tarde fora do intervalo permitido (13:00-13:15)"
-    
-    if not (time_to_minutes("18:00") <= afternoon_end_min <= time_to_minutes("18:15")):
-        return False, "Fim da tarde fora do intervalo permitido (18:00-18:15)"
-    
-    # Valida intervalo entre fim manhã e início tarde
-    # O intervalo está entre 12:00-13:15, então pode variar de 45min a 1h15min
-    interval_minutes = afternoon_start_min - morning_end_min
-    if interval_minutes < 0:
-        interval_minutes += 24 * 60
-    
-    if not (45 <= interval_minutes <= 75):
-        return False, f"Intervalo entre fim manhã e início tarde inválido: {interval_minutes}min (deve ser 45-75min, entre 12:00-13:15)"
-    
-    # Valida total do dia (deve ser aproximadamente 8h)
-    total_minutes = afternoon_end_min - morning_start_min
-    if total_minutes < 0:
-        total_minutes += 24 * 60
-    
-    # Permite variação de 7h45min (465min) a 8h15min (495min) para total de 8h
-    if not (465 <= total_minutes <= 495):
-        return False, f"Total de horas do dia inválido: {total_minutes}min (deve ser 465-495min, aproximadamente 8h)"
+    return _compiled(policy).validate_minutes(
+        time_to_minutes(morning_start),
+        time_to_minutes(morning_end),
+        time_to_minutes(afternoon_start),
+        time_to_minutes(afternoon_end)
+    )
+
+
+def validate_hours_batch(entries: Iterable[Dict[str, Dict[str, str]]],
+                         policy: Optional[WorkdayPolicy] = None) -> List[Tuple[bool, str]]:
+    """
+    Valida vários dias de uma vez, numa única passada sobre os limites compilados.
     
-    return True, "Horários válidos"
+    Args:
+        entries: Horários no formato de generate_daily_hours
+        policy: Política de horários (padrão se None)
+        
+    Returns:
+        Lista de tuplas (é_válido, mensagem_erro), alinhada com entries
+    """
+    validate = _compiled(policy).validate_minutes
+    return [
+        validate(
+            time_to_minutes(entry['morning']['start']),
+            time_to_minutes(entry['morning']['end']),
+            time_to_minutes(entry['afternoon']['start']),
+            time_to_minutes(entry['afternoon']['end'])
+        )
+        for entry in entries
+    ]
@@ -0,0 +1,112 @@
+"""
+Carregamento de políticas de jornada a partir de arquivo de configuração.
+Permite regras de horário diferentes por conta ou por contrato (meio período,
+turnos de 6h, janelas de almoço diferentes).
+
+Formato do arquivo (JSON):
+{
+    "default": "padrao",
+    "contracts": {
+        "padrao": {},
+        "turno-6h": {"afternoon_end": ["16:00", "16:15"], "total_minutes": [345, 375]}
+    },
+    "accounts": {
+        "usuario@empresa.com.br": "turno-6h"
+    }
+}
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.time_generator import DEFAULT_POLICY, WorkdayPolicy, compile_policy
+
+
+# Arquivo padrão na raiz do projeto (pode ser sobrescrito por WORKDAY_POLICY_FILE)
+DEFAULT_POLICY_FILE = Path(__file__).parent.parent / "workday_policies.json"
+
+
+@dataclass
+class WorkdayPolicyConfig:
+    """Conjunto de políticas por contrato e mapeamento de contas para contratos."""
+    contracts: Dict[str, WorkdayPolicy] = field(default_factory=dict)
+    accounts: Dict[str, str] = field(default_factory=dict)
+    default_contract: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "WorkdayPolicyConfig":
+        """
+        Cria a configuração a partir de um dicionário, compilando cada política.
+        
+        Compilar na carga garante que erros de configuração apareçam na inicialização,
+        não no meio de uma automação.
+        
+        Raises:
+            ValueError: Se alguma política for inválida ou uma conta apontar para
+                um contrato inexistente
+        """
+        contracts = {
+            name: WorkdayPolicy.from_dict(name, values or {})
+            for name, values in data.get('contracts', {}).items()
+        }
+        for policy in contracts.values():
+            compile_policy(policy)
+        
+        accounts = {account.lower(): contract for account, contract in data.get('accounts', {}).items()}
+        default_contract = data.get('default')
+        
+        for contract in list(accounts.values()) + ([default_contract] if default_contract else []):
+            if contract not in contracts:
+                raise ValueError(f"Contrato '{contract}' não definido em 'contracts'")
+        
+        return cls(contracts=contracts, accounts=accounts, default_contract=default_contract)
+    
+    def resolve(self, account: Optional[str] = None, contract: Optional[str] = None) -> WorkdayPolicy:
+        """
+        Resolve a política a usar.
+        
+        Prioridade: contrato explícito > contrato da conta > contrato padrão > política padrão.
+        
+        Args:
+            account: Conta (email) do usuário
+            contract: Nome do contrato informado explicitamente
+            
+        Returns:
+            WorkdayPolicy a usar
+            
+        Raises:
+            KeyError: Se o contrato informado explicitamente não existir
+        """
+        if contract:
+            if contract not in self.contracts:
+                raise KeyError(f"Contrato de jornada desconhecido: {contract}")
+            return self.contracts[contract]
+        
+        if account and account.lower() in self.accounts:
+            return self.contracts[self.accounts[account.lower()]]
+        
+        if self.default_contract:
+            return self.contracts[self.default_contract]
+        
+        return DEFAULT_POLICY
+
+
+def load_policy_config(path: Optional[str] = None) -> WorkdayPolicyConfig:
+    """
+    Carrega a configuração de políticas de jornada.
+    
+    Args:
+        path: Caminho do arquivo JSON (padrão: WORKDAY_POLICY_FILE ou
+            workday_policies.json na raiz do projeto)
+        
+    Returns:
+        WorkdayPolicyConfig (vazia, usando apenas a política padrão, se o arquivo não existir)
+    """
+    policy_file = Path(path or os.getenv('WORKDAY_POLICY_FILE') or DEFAULT_POLICY_FILE)
+    if not policy_file.exists():
+        return WorkdayPolicyConfig()
+    
+    with open(policy_file, 'r', encoding='utf-8') as f:
+        return WorkdayPolicyConfig.from_dict(json.load(f))